@@ -0,0 +1,165 @@
+"""Speed and correctness of the China boundary test.
+
+Compares ``out_of_china`` with the rectangle it replaced on a set of
+labelled places near the border and on random points, and reports how
+many random points needed the point-in-polygon fallback.
+
+Run with::
+
+    python -m benchmarks.bench_china_boundary --points 100000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+from custom_components.ha_traccar import coord_transform
+from custom_components.ha_traccar.coord_transform import out_of_china
+
+from .common import print_table
+
+HEADERS = ["test", "points_per_s", "border_correct", "border_points"]
+
+# (名称, 经度, 纬度, 是否在境内)
+BORDER_POINTS = [
+    ("Urumqi", 87.6, 43.8, True),
+    ("Kashgar", 75.99, 39.47, True),
+    ("Khorgos", 80.42, 44.21, True),
+    ("Altay", 88.13, 47.85, True),
+    ("Hotan", 79.9, 37.1, True),
+    ("Shiquanhe", 80.1, 32.5, True),
+    ("Lhasa", 91.1, 29.65, True),
+    ("Kunming", 102.7, 25.04, True),
+    ("Jinghong", 100.8, 22.0, True),
+    ("Mengla", 101.56, 21.46, True),
+    ("Nanning", 108.3, 22.8, True),
+    ("Fangchenggang", 108.35, 21.6, True),
+    ("Haikou", 110.33, 20.03, True),
+    ("Sanya", 109.5, 18.25, True),
+    ("Hong Kong", 114.17, 22.3, True),
+    ("Macau", 113.54, 22.19, True),
+    ("Xiamen", 118.09, 24.48, True),
+    ("Zhoushan", 122.2, 30.0, True),
+    ("Weihai", 122.1, 37.5, True),
+    ("Dalian", 121.6, 38.9, True),
+    ("Yanji", 129.5, 42.9, True),
+    ("Hunchun", 130.37, 42.87, True),
+    ("Fuyuan", 134.29, 48.36, True),
+    ("Mohe", 122.53, 52.97, True),
+    ("Hailar", 119.7, 49.2, True),
+    ("Manzhouli", 117.43, 49.6, True),
+    ("Erenhot", 111.98, 43.65, True),
+    ("Ulaanbaatar", 106.9, 47.9, False),
+    ("Choibalsan", 114.5, 48.07, False),
+    ("Dalanzadgad", 104.4, 43.57, False),
+    ("Khovd", 91.64, 48.0, False),
+    ("Chita", 113.5, 52.0, False),
+    ("Ulan-Ude", 107.6, 51.8, False),
+    ("Khabarovsk", 135.07, 48.48, False),
+    ("Vladivostok", 131.9, 43.1, False),
+    ("Rason", 130.3, 42.25, False),
+    ("Hyesan", 128.18, 41.4, False),
+    ("Pyongyang", 125.75, 39.03, False),
+    ("Seoul", 126.98, 37.57, False),
+    ("Busan", 129.07, 35.18, False),
+    ("Tokyo", 139.7, 35.7, False),
+    ("Taipei", 121.56, 25.04, False),
+    ("Kaohsiung", 120.3, 22.6, False),
+    ("Manila", 120.98, 14.6, False),
+    ("Hanoi", 105.85, 21.03, False),
+    ("Haiphong", 106.68, 20.86, False),
+    ("Cao Bang", 106.25, 22.67, False),
+    ("Sa Pa", 103.84, 22.34, False),
+    ("Luang Prabang", 102.13, 19.88, False),
+    ("Vientiane", 102.6, 17.97, False),
+    ("Chiang Mai", 98.98, 18.79, False),
+    ("Mandalay", 96.08, 21.97, False),
+    ("Myitkyina", 97.4, 25.38, False),
+    ("Dhaka", 90.4, 23.8, False),
+    ("Thimphu", 89.64, 27.47, False),
+    ("Tawang", 91.86, 27.59, False),
+    ("Kathmandu", 85.3, 27.7, False),
+    ("Delhi", 77.2, 28.6, False),
+    ("Leh", 77.58, 34.16, False),
+    ("Gilgit", 74.3, 35.9, False),
+    ("Islamabad", 73.05, 33.7, False),
+    ("Osh", 72.8, 40.5, False),
+    ("Bishkek", 74.6, 42.87, False),
+    ("Almaty", 76.9, 43.25, False),
+    ("Ust-Kamenogorsk", 82.6, 49.95, False),
+]
+
+
+def _rectangle_out_of_china(lng: float, lat: float) -> bool:
+    """The rectangle test used before the boundary polygon."""
+    if lng < 72.004 or lng > 137.8347:
+        return True
+    if lat < 0.8293 or lat > 55.8271:
+        return True
+    return False
+
+
+def _polygon_out_of_china(lng: float, lat: float) -> bool:
+    """The boundary test without the precomputed grid."""
+    return not coord_transform._in_boundary(lng, lat)
+
+
+def _throughput(
+    test: Callable[[float, float], bool], points: list[tuple[float, float]]
+) -> float:
+    """Return how many points per second the test classifies."""
+    start = time.perf_counter()
+    for lng, lat in points:
+        test(lng, lat)
+    return len(points) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    points = [
+        (rng.uniform(70.0, 140.0), rng.uniform(15.0, 56.0))
+        for _ in range(args.points)
+    ]
+    rows = []
+    for name, test in (
+        ("rectangle", _rectangle_out_of_china),
+        ("boundary", out_of_china),
+        ("polygon_only", _polygon_out_of_china),
+    ):
+        correct = sum(
+            test(lng, lat) != inside for _, lng, lat, inside in BORDER_POINTS
+        )
+        rows.append([name, _throughput(test, points), correct, len(BORDER_POINTS)])
+    print_table(HEADERS, rows)
+
+    # 统计需要点在多边形内判断的比例
+    in_boundary = coord_transform._in_boundary
+    fallbacks = 0
+
+    def _counting(lng: float, lat: float) -> bool:
+        nonlocal fallbacks
+        fallbacks += 1
+        return in_boundary(lng, lat)
+
+    coord_transform._in_boundary = _counting
+    try:
+        for lng, lat in points:
+            out_of_china(lng, lat)
+    finally:
+        coord_transform._in_boundary = in_boundary
+    print(f"\npoint-in-polygon fallback: {fallbacks / len(points):.1%} of points")
+    for name, lng, lat, inside in BORDER_POINTS:
+        if out_of_china(lng, lat) == inside:
+            print(f"misclassified: {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Time to send a command to a whole fleet and collect the results.
+
+Sends ``positionPeriodic`` to every device of the fake server through the
+coordinator's command tracker, once without waiting for results and once
+waiting for the ``commandResult`` events, for each concurrency limit. The
+fake server answers each request after ``--latency`` seconds and the device
+answers the command ``--result-delay`` seconds later.
+
+Run with::
+
+    python -m benchmarks.bench_commands --devices 1000 --concurrency 5 20 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from custom_components.ha_traccar import commands
+
+from .common import (
+    async_client,
+    async_test_home_assistant,
+    create_coordinator,
+    print_table,
+)
+from .fake_traccar import FakeTraccarServer, Fleet
+
+HEADERS = ["concurrency", "devices", "accepted_s", "results_s", "delivered", "failed"]
+
+
+async def _bench(args: argparse.Namespace, concurrency: int) -> list:
+    """Send the command to the fleet with one concurrency limit."""
+    server = FakeTraccarServer(
+        Fleet(size=args.devices, rate=0),
+        command_latency=args.latency,
+        command_result_delay=args.result_delay,
+    )
+    async with server, async_client(
+        server
+    ) as client, async_test_home_assistant() as hass:
+        coordinator = create_coordinator(hass, client)
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success, coordinator.last_exception
+        subscription = asyncio.create_task(coordinator.subscribe())
+        # 等待 WebSocket 连接并收到初始数据
+        while not coordinator.frame_queue.frames:
+            await asyncio.sleep(0.05)
+
+        commands.COMMAND_CONCURRENCY = concurrency
+        device_ids = list(coordinator.data)
+        start = time.perf_counter()
+        await coordinator.commands.async_send(
+            client, device_ids, "positionPeriodic", {"frequency": 60}, 0
+        )
+        accepted = time.perf_counter() - start
+        # 设备对未等待命令的结果到达前，不会等待新命令的结果
+        while coordinator.commands.statistics["unanswered"]:
+            await asyncio.sleep(0.05)
+
+        start = time.perf_counter()
+        outcomes = await coordinator.commands.async_send(
+            client, device_ids, "positionPeriodic", {"frequency": 60}, args.timeout
+        )
+        results = time.perf_counter() - start
+
+        subscription.cancel()
+        await asyncio.gather(subscription, return_exceptions=True)
+    statuses = [outcome["status"] for outcome in outcomes.values()]
+    return [
+        concurrency,
+        len(device_ids),
+        accepted,
+        results,
+        statuses.count(commands.COMMAND_DELIVERED),
+        statuses.count(commands.COMMAND_FAILED),
+    ]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    """Run every concurrency limit and print the results."""
+    print_table(
+        HEADERS, [await _bench(args, concurrency) for concurrency in args.concurrency]
+    )
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--result-delay", type=float, default=0.5, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
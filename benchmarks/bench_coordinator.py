@@ -0,0 +1,136 @@
+"""End-to-end coordinator benchmark against the fake Traccar server.
+
+For each fleet size this measures:
+
+* coordinator refresh time (``_async_update_data`` over REST),
+* memory held per device by a coordinator populated from empty,
+* latency from a websocket frame leaving the server to the tracker state
+  being written to the state machine,
+* event-loop blocking while the subscription is running.
+
+Run with::
+
+    python -m benchmarks.bench_coordinator --sizes 10 100 1000 10000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from custom_components.ha_traccar.device_tracker import TraccarServerDeviceTracker
+
+from .common import (
+    FLEET_SIZES,
+    LoopMonitor,
+    async_client,
+    async_test_home_assistant,
+    create_coordinator,
+    percentile,
+    print_table,
+)
+from .fake_traccar import FakeTraccarServer, Fleet
+
+HEADERS = [
+    "devices",
+    "refresh_ms",
+    "kib_per_device",
+    "latency_p50_ms",
+    "latency_p99_ms",
+    "writes",
+    "max_block_ms",
+    "blocked_ms",
+]
+
+
+async def _bench_fleet(size: int, rate: float, duration: float, refreshes: int) -> list:
+    """Benchmark a single fleet size."""
+    async with FakeTraccarServer(Fleet(size=size, rate=rate)) as server, async_client(
+        server
+    ) as client, async_test_home_assistant() as hass:
+        # 从空协调器到首次刷新完成，测量数据常驻的内存
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        coordinator = create_coordinator(hass, client)
+        await coordinator.async_refresh()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        assert coordinator.last_update_success, coordinator.last_exception
+        held = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+        refresh_times = []
+        for _ in range(refreshes):
+            start = time.perf_counter()
+            await coordinator.async_refresh()
+            refresh_times.append(time.perf_counter() - start)
+
+        latencies: list[float] = []
+        for device_id, entry in coordinator.data.items():
+            tracker = TraccarServerDeviceTracker(coordinator, entry["device"])
+            entity_id = f"device_tracker.bench_{device_id}"
+
+            def _write_state(
+                tracker: TraccarServerDeviceTracker = tracker,
+                entity_id: str = entity_id,
+            ) -> None:
+                hass.states.async_set(
+                    entity_id,
+                    "not_home",
+                    {
+                        "latitude": tracker.latitude,
+                        "longitude": tracker.longitude,
+                        **tracker.extra_state_attributes,
+                    },
+                )
+                sent_at = server.fleet.sent_at.pop(tracker.traccar_position["id"], None)
+                if sent_at is not None:
+                    latencies.append(time.perf_counter() - sent_at)
+
+            # 与集成相同，通过实体订阅的字段信号写入状态
+            tracker.hass = hass
+            tracker.async_write_ha_state = _write_state  # type: ignore[method-assign]
+            await tracker.async_added_to_hass()
+
+        monitor = LoopMonitor()
+        monitor.start()
+        subscription = asyncio.create_task(coordinator.subscribe())
+        await asyncio.sleep(duration)
+        subscription.cancel()
+        await asyncio.gather(subscription, return_exceptions=True)
+        await monitor.stop()
+
+        return [
+            size,
+            statistics.median(refresh_times) * 1000,
+            held / size / 1024,
+            percentile(latencies, 50) * 1000,
+            percentile(latencies, 99) * 1000,
+            len(latencies),
+            monitor.max_lag * 1000,
+            monitor.total_lag * 1000,
+        ]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    """Run the benchmark for every requested fleet size."""
+    rows = [
+        await _bench_fleet(size, args.rate, args.duration, args.refreshes)
+        for size in args.sizes
+    ]
+    print_table(HEADERS, rows)
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(FLEET_SIZES))
+    parser.add_argument("--rate", type=float, default=0.2, help="positions/s per device")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--refreshes", type=int, default=3)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
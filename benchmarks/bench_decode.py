@@ -0,0 +1,60 @@
+"""JSON decode time per MB for realistic Traccar payloads.
+
+Compares the standard library ``json`` module that pytraccar uses with the
+orjson based ``json_loads`` the integration now uses for REST responses.
+
+Run with::
+
+    python -m benchmarks.bench_decode --sizes 1000 10000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Callable
+
+from homeassistant.util.json import json_loads
+
+from .common import print_table
+from .fake_traccar import Fleet
+
+HEADERS = ["payload", "devices", "mb", "decoder", "ms_per_mb"]
+
+
+def _time_decode(loads: Callable[[bytes], Any], payload: bytes, rounds: int) -> float:
+    """Return the mean decode time in seconds."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        loads(payload)
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        fleet = Fleet(size=size)
+        payloads = {
+            "devices": [fleet.device_model(device) for device in fleet.devices],
+            "positions": list(fleet.positions.values()),
+            "geofences": fleet.geofences,
+        }
+        for name, value in payloads.items():
+            payload = json.dumps(value).encode()
+            megabytes = len(payload) / 1_000_000
+            for decoder, loads in (("json", json.loads), ("orjson", json_loads)):
+                seconds = _time_decode(loads, payload, args.rounds)
+                rows.append(
+                    [name, size, megabytes, decoder, seconds * 1000 / megabytes]
+                )
+    print_table(HEADERS, rows)
+
+
+if __name__ == "__main__":
+    main()
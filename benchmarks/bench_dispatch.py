@@ -0,0 +1,143 @@
+"""Entity state writes caused by subscription frames.
+
+Builds every entity of a fleet and feeds the coordinator frames that mix
+position updates, devices going on- and offline, repeated device models
+and devices the integration does not track. Reports the entity writes per
+frame and the time to handle a frame including the writes, once with
+every entity written on any change of its device and once with the
+field signals, which only reach the entities depending on a changed field.
+
+Run with::
+
+    python -m benchmarks.bench_dispatch --devices 1000 --frames 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Any
+
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from custom_components.ha_traccar import binary_sensor, device_tracker, sensor
+from custom_components.ha_traccar.const import DOMAIN
+
+from .common import (
+    async_client,
+    async_test_home_assistant,
+    create_coordinator,
+    percentile,
+    print_table,
+)
+from .fake_traccar import FakeTraccarServer, Fleet
+
+HEADERS = ["mode", "entities", "writes_per_frame", "frame_p50_ms", "frame_p99_ms"]
+
+PLATFORMS = (binary_sensor, device_tracker, sensor)
+
+
+async def _add_entities(hass: Any, entities: list[Any], counter: list[int]) -> None:
+    """Attach the entities to the dispatcher with a counting state write."""
+    for entity in entities:
+
+        def _write(entity: Any = entity) -> None:
+            counter[0] += 1
+            # 计算状态和属性，近似真实写入的开销
+            entity.state  # noqa: B018
+            entity.extra_state_attributes  # noqa: B018
+
+        entity.hass = hass
+        entity.async_write_ha_state = _write
+        await entity.async_added_to_hass()
+
+
+def _frame(fleet: Fleet, rng: random.Random, args: argparse.Namespace) -> dict:
+    """Return a frame with positions, status changes and unknown devices."""
+    devices = []
+    positions = []
+    for device in fleet.devices:
+        roll = rng.random()
+        if roll < args.positions:
+            positions.append(fleet.move(device, 10.0))
+        elif roll < args.positions + args.status:
+            device.status = "offline" if device.status == "online" else "online"
+            devices.append(fleet.device_model(device))
+        elif roll < args.positions + args.status + args.repeated:
+            devices.append(fleet.device_model(device))
+    for offset in range(args.unknown):
+        # 不在 Home Assistant 中跟踪的设备
+        unknown = fleet.device_model(fleet.devices[0])
+        unknown["id"] = fleet.size + 1 + offset
+        devices.append(unknown)
+    return {"devices": devices, "positions": positions}
+
+
+async def _bench(mode: str, args: argparse.Namespace) -> list:
+    """Feed ``args.frames`` frames and count the entity writes."""
+    fleet = Fleet(size=args.devices, seed=args.seed)
+    async with FakeTraccarServer(fleet) as server, async_client(
+        server
+    ) as client, async_test_home_assistant() as hass:
+        coordinator = create_coordinator(hass, client)
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success, coordinator.last_exception
+        # 未知设备会触发刷新，测量时忽略
+        coordinator._find_new_devices = lambda _: set()  # type: ignore[method-assign]
+
+        entities = [
+            entity
+            for entry in coordinator.data.values()
+            for platform in PLATFORMS
+            for entity in platform._create_entities(coordinator, entry)
+        ]
+        if mode == "broadcast":
+            # 每次变化都写入设备的全部实体
+            coordinator._async_signal_device = (  # type: ignore[method-assign]
+                lambda device_id, fields=None: async_dispatcher_send(
+                    hass, f"{DOMAIN}_{device_id}"
+                )
+            )
+        counter = [0]
+        await _add_entities(hass, entities, counter)
+
+        rng = random.Random(args.seed)
+        durations = []
+        for _ in range(args.frames):
+            frame = _frame(fleet, rng, args)
+            start = time.perf_counter()
+            await coordinator.handle_subscription_data(frame)
+            durations.append(time.perf_counter() - start)
+
+        return [
+            mode,
+            len(entities),
+            counter[0] / args.frames,
+            percentile(durations, 50) * 1000,
+            percentile(durations, 99) * 1000,
+        ]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    """Run both modes and print the results."""
+    print_table(
+        HEADERS, [await _bench(mode, args) for mode in ("broadcast", "fields")]
+    )
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1_000)
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--positions", type=float, default=0.1, help="share of devices")
+    parser.add_argument("--status", type=float, default=0.1, help="share of devices")
+    parser.add_argument("--repeated", type=float, default=0.1, help="share of devices")
+    parser.add_argument("--unknown", type=int, default=100, help="devices per frame")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
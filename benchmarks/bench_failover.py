@@ -0,0 +1,147 @@
+"""Failover time between two Traccar nodes.
+
+Starts a primary and a standby fake server, connects the client to the
+primary, stops it and measures how long it takes until a REST request
+succeeds again and until the websocket delivers the next frame from the
+standby. Before the rounds it checks that cancelling a request in flight
+neither fails over nor counts a failover.
+
+Run with::
+
+    python -m benchmarks.bench_failover --rounds 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from aiohttp import ClientSession, CookieJar
+
+from custom_components.ha_traccar.api import TraccarServerApiClient
+
+from .common import percentile, print_table
+from .fake_traccar import FakeTraccarServer, Fleet
+
+HEADERS = ["path", "rounds", "p50_ms", "max_ms", "standby_logins"]
+
+
+def _client(
+    session: ClientSession,
+    host: str,
+    port: int,
+    standby: FakeTraccarServer,
+) -> TraccarServerApiClient:
+    """Return a client for the primary with the standby as failover."""
+    client = TraccarServerApiClient(
+        client_session=session,
+        host=host,
+        port=port,
+        username="bench",
+        password="bench",
+        ssl=False,
+        verify_ssl=False,
+    )
+    client.set_standby([f"{standby.host}:{standby.port}"])
+    return client
+
+
+async def _round(devices: int) -> tuple[float, float, int]:
+    """Fail over once and return the REST and websocket failover times."""
+    primary = FakeTraccarServer(Fleet(size=devices, rate=1, seed=1))
+    standby = FakeTraccarServer(Fleet(size=devices, rate=1, seed=1))
+    await primary.start()
+    await standby.start()
+    frames: asyncio.Queue[float] = asyncio.Queue()
+
+    async def _on_frame(_: object) -> None:
+        frames.put_nowait(time.perf_counter())
+
+    async with ClientSession(cookie_jar=CookieJar(unsafe=True)) as session:
+        client = _client(session, primary.host, primary.port, standby)
+        await client.async_probe()
+        logins = standby.logins
+        subscription = asyncio.create_task(client.subscribe(_on_frame))
+        try:
+            await frames.get()
+            # WebSocket：停止主节点后，等待备用节点发送的第一帧
+            await primary.stop()
+            stopped = time.perf_counter()
+            while (received := await frames.get()) < stopped:
+                continue
+            websocket = received - stopped
+        finally:
+            subscription.cancel()
+            await asyncio.gather(subscription, return_exceptions=True)
+
+        # REST：请求先在已停止的主节点上失败，再切换到备用节点
+        client = _client(session, primary.host, primary.port, standby)
+        start = time.perf_counter()
+        await client.get_devices()
+        rest = time.perf_counter() - start
+    await standby.stop()
+    return rest, websocket, logins
+
+
+async def _check_cancellation() -> None:
+    """Cancel a request in flight and check that the client did not fail over."""
+
+    async def _hang(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # 接受连接但从不应答，直到客户端关闭连接
+        await reader.read()
+        writer.close()
+
+    primary = await asyncio.start_server(_hang, "127.0.0.1", 0)
+    host, port = primary.sockets[0].getsockname()[:2]
+    async with FakeTraccarServer(Fleet(size=1, seed=1)) as standby, ClientSession(
+        cookie_jar=CookieJar(unsafe=True)
+    ) as session:
+        client = _client(session, host, port, standby)
+        active = client.active
+        # get_server 经过 pytraccar 的 _call_api，它会把取消包装成连接错误
+        request = asyncio.create_task(client.get_server())
+        await asyncio.sleep(0.2)
+        request.cancel()
+        await asyncio.gather(request, return_exceptions=True)
+        assert request.cancelled(), request
+        assert client.active is active, client.active
+        assert client.failovers == 0, client.failovers
+    primary.close()
+    await primary.wait_closed()
+
+
+async def _run(args: argparse.Namespace) -> None:
+    """Run every round and print the results."""
+    await _check_cancellation()
+    rest: list[float] = []
+    websocket: list[float] = []
+    logins = 0
+    for _ in range(args.rounds):
+        rest_seconds, websocket_seconds, logins = await _round(args.devices)
+        rest.append(rest_seconds * 1000)
+        websocket.append(websocket_seconds * 1000)
+    print_table(
+        HEADERS,
+        [
+            ["rest", args.rounds, percentile(rest, 50), max(rest), logins],
+            [
+                "websocket",
+                args.rounds,
+                percentile(websocket, 50),
+                max(websocket),
+                logins,
+            ],
+        ],
+    )
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
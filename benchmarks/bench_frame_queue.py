@@ -0,0 +1,120 @@
+"""Websocket frame processing with and without the latest-value queue.
+
+Streams a fleet from the fake server at a high position rate and compares
+handling every frame inline in the socket reader with reading into the
+``FrameQueue`` and processing merged frames. Reports the positions sent
+and processed, the spread of the processed rate per second, the latency
+from the server to processing, the queue's merges and depth, and the
+event-loop blocking.
+
+Run with::
+
+    python -m benchmarks.bench_frame_queue --devices 10000 --rate 1
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from pytraccar import SubscriptionData
+
+from .common import (
+    LoopMonitor,
+    async_client,
+    async_test_home_assistant,
+    create_coordinator,
+    percentile,
+    print_table,
+)
+from .fake_traccar import FakeTraccarServer, Fleet
+
+HEADERS = [
+    "mode",
+    "sent",
+    "processed",
+    "rate_min",
+    "rate_p50",
+    "latency_p50_ms",
+    "latency_p99_ms",
+    "merged",
+    "max_depth",
+    "max_block_ms",
+]
+
+
+async def _bench(mode: str, args: argparse.Namespace) -> list:
+    """Stream the fleet for ``args.duration`` seconds in one mode."""
+    fleet = Fleet(size=args.devices, rate=args.rate, seed=args.seed)
+    async with FakeTraccarServer(fleet) as server, async_client(
+        server
+    ) as client, async_test_home_assistant() as hass:
+        coordinator = create_coordinator(hass, client)
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success, coordinator.last_exception
+
+        handle = coordinator.handle_subscription_data
+        processed: list[tuple[float, int]] = []
+        latencies: list[float] = []
+
+        async def _counting(data: SubscriptionData) -> None:
+            await handle(data)
+            now = time.perf_counter()
+            positions = data.get("positions") or []
+            processed.append((now, len(positions)))
+            for position in positions:
+                if (sent_at := fleet.sent_at.pop(position["id"], None)) is not None:
+                    latencies.append(now - sent_at)
+
+        coordinator.handle_subscription_data = _counting  # type: ignore[method-assign]
+        if mode == "inline":
+            target = client.subscribe(coordinator.handle_subscription_data)
+        else:
+            target = coordinator.subscribe()
+
+        monitor = LoopMonitor()
+        monitor.start()
+        start = time.perf_counter()
+        subscription = asyncio.create_task(target)
+        await asyncio.sleep(args.duration)
+        subscription.cancel()
+        await asyncio.gather(subscription, return_exceptions=True)
+        await monitor.stop()
+
+        # 每秒处理的位置数量，用于观察吞吐量是否稳定
+        per_second = [0] * int(args.duration)
+        for processed_at, count in processed:
+            if (second := int(processed_at - start)) < len(per_second):
+                per_second[second] += count
+        queue = coordinator.frame_queue
+        return [
+            mode,
+            server.positions_sent,
+            sum(count for _, count in processed),
+            min(per_second[1:] or per_second),
+            percentile(per_second, 50),
+            percentile(latencies, 50) * 1000,
+            percentile(latencies, 99) * 1000,
+            queue.merged,
+            queue.max_depth,
+            monitor.max_lag * 1000,
+        ]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    """Run both modes and print the results."""
+    print_table(HEADERS, [await _bench(mode, args) for mode in ("inline", "queue")])
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10_000)
+    parser.add_argument("--rate", type=float, default=1.0, help="positions/s per device")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
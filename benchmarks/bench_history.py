@@ -0,0 +1,77 @@
+"""Memory and CPU cost of the per-device track history.
+
+Fills a ``TrackHistory`` for every device of a fleet several times over, so
+every ring buffer wraps around, and reports the memory it holds, the cost of
+an append and the cost of computing the tracker attributes from it.
+
+Run with::
+
+    python -m benchmarks.bench_history --devices 10000 --points 256
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from custom_components.ha_traccar.history import TrackHistory
+
+from .common import print_table
+
+HEADERS = ["devices", "points", "mib", "bytes_per_device", "append_ns", "attrs_us"]
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10_000)
+    parser.add_argument("--points", type=int, default=256)
+    parser.add_argument("--laps", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    tracemalloc.start()
+    histories = [TrackHistory(args.points) for _ in range(args.devices)]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    appends = args.devices * args.points * args.laps
+    start = time.perf_counter()
+    timestamp = 1_700_000_000.0
+    for _ in range(args.points * args.laps):
+        timestamp += 10
+        for history in histories:
+            history.append(
+                timestamp,
+                30 + rng.random(),
+                120 + rng.random(),
+                rng.random() * 80,
+                rng.random() * 360,
+            )
+    append_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for history in histories:
+        history.smoothed_position()
+        history.average_speed()
+        history.trail()
+    attrs_seconds = time.perf_counter() - start
+
+    print_table(
+        HEADERS,
+        [
+            [
+                args.devices,
+                args.points,
+                memory / 2**20,
+                memory // args.devices,
+                append_seconds / appends * 1e9,
+                attrs_seconds / args.devices * 1e6,
+            ]
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Position volume with and without adaptive reporting intervals.
+
+Simulates a day of a fleet in accelerated time against the fake server:
+devices stay parked for a while, drive a trip and park again. The fleet is
+run once at the fixed default rate and once with the interval controller
+sending ``positionPeriodic`` commands, and the positions the server sent
+are compared.
+
+Run with::
+
+    python -m benchmarks.bench_intervals --devices 1000 --hours 4 --time-scale 120
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from custom_components.ha_traccar.const import (
+    CONF_ADAPTIVE_INTERVAL,
+    CONF_IDLE_INTERVAL,
+    CONF_MOVING_INTERVAL,
+)
+
+from .common import (
+    async_client,
+    async_test_home_assistant,
+    create_coordinator,
+    print_table,
+)
+from .fake_traccar import BASE_LATITUDE, BASE_LONGITUDE, FakeTraccarServer, Fleet
+
+HEADERS = [
+    "mode",
+    "devices",
+    "hours",
+    "positions",
+    "per_device_hour",
+    "reduction",
+    "commands",
+]
+# 模拟时间中每步的长度（秒），与控制器的评估间隔一致
+STEP = 30.0
+
+
+async def _simulate(args: argparse.Namespace, adaptive: bool) -> tuple[int, int]:
+    """Run the fleet and return the positions sent and the commands sent."""
+    rng = random.Random(args.seed)
+    server = FakeTraccarServer(
+        Fleet(size=args.devices, rate=1 / args.moving_interval, seed=args.seed),
+        command_latency=0.05 / args.time_scale,
+        time_scale=args.time_scale,
+    )
+    options = {
+        CONF_ADAPTIVE_INTERVAL: adaptive,
+        CONF_MOVING_INTERVAL: args.moving_interval,
+        CONF_IDLE_INTERVAL: args.idle_interval,
+    }
+    async with server, async_client(
+        server
+    ) as client, async_test_home_assistant() as hass:
+        hass.states.async_set(
+            "zone.home",
+            "0",
+            {"latitude": BASE_LATITUDE, "longitude": BASE_LONGITUDE, "radius": 500},
+        )
+        coordinator = create_coordinator(hass, client, options)
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success, coordinator.last_exception
+        subscription = asyncio.create_task(coordinator.subscribe())
+
+        start = time.monotonic()
+
+        def _now() -> float:
+            """Return the simulated seconds since the start."""
+            return (time.monotonic() - start) * args.time_scale
+
+        coordinator.interval_controller.clock = _now
+        trip_ends: dict[int, float] = {}
+        for device in server.fleet.devices:
+            device.parked = True
+        server.positions_sent = 0
+        while (now := _now()) < args.hours * 3600:
+            # 停放的设备按概率出发，行程结束后重新停放
+            for device in server.fleet.devices:
+                if device.parked and rng.random() < STEP / args.park_time:
+                    device.parked = False
+                    device.speed = rng.uniform(15, 30)
+                    trip_ends[device.device_id] = now + args.trip_time * rng.uniform(
+                        0.5, 1.5
+                    )
+                elif not device.parked and now >= trip_ends[device.device_id]:
+                    device.parked = True
+            await coordinator.interval_controller.async_evaluate()
+            await asyncio.sleep(STEP / args.time_scale)
+
+        subscription.cancel()
+        await asyncio.gather(subscription, return_exceptions=True)
+    return server.positions_sent, coordinator.interval_controller.commands_sent
+
+
+async def _main(args: argparse.Namespace) -> None:
+    """Run the fixed and adaptive simulations and print the results."""
+    rows = []
+    baseline = None
+    for adaptive in (False, True):
+        positions, commands = await _simulate(args, adaptive)
+        if baseline is None:
+            baseline = positions
+        rows.append(
+            [
+                "adaptive" if adaptive else "fixed",
+                args.devices,
+                args.hours,
+                positions,
+                positions / args.devices / args.hours,
+                f"{1 - positions / baseline:.0%}",
+                commands,
+            ]
+        )
+    print_table(HEADERS, rows)
+
+
+def main() -> None:
+    """Parse arguments and run the simulation."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--hours", type=float, default=4.0, help="simulated hours")
+    parser.add_argument("--time-scale", type=float, default=120.0)
+    parser.add_argument("--moving-interval", type=int, default=30, help="seconds")
+    parser.add_argument("--idle-interval", type=int, default=600, help="seconds")
+    parser.add_argument(
+        "--park-time", type=float, default=3 * 3600, help="mean parked seconds"
+    )
+    parser.add_argument(
+        "--trip-time", type=float, default=30 * 60, help="mean trip seconds"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
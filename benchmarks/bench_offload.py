@@ -0,0 +1,79 @@
+"""Event-loop blocking of full-fleet frames, inline versus offloaded.
+
+Simulates the frame Traccar sends after a reconnect (a position for every
+device) and measures how long the event loop is blocked while the
+coordinator processes it, with and without ``offload_processing``.
+
+Run with::
+
+    python -m benchmarks.bench_offload --sizes 1000 10000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from .common import (
+    LoopMonitor,
+    async_client,
+    async_test_home_assistant,
+    create_coordinator,
+    print_table,
+)
+from .fake_traccar import FakeTraccarServer, Fleet
+
+HEADERS = ["devices", "mode", "handle_ms", "max_block_ms", "blocked_ms"]
+
+
+async def _bench(size: int, offload: bool, rounds: int) -> list:
+    """Process ``rounds`` full-fleet frames and report loop blocking."""
+    fleet = Fleet(size=size, rate=0)
+    async with FakeTraccarServer(fleet) as server, async_client(
+        server
+    ) as client, async_test_home_assistant() as hass:
+        coordinator = create_coordinator(
+            hass, client, {"offload_processing": offload}
+        )
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success, coordinator.last_exception
+
+        monitor = LoopMonitor(interval=0.001)
+        handle_time = 0.0
+        monitor.start()
+        for _ in range(rounds):
+            frame = {"positions": [fleet.move(device, 1) for device in fleet.devices]}
+            await asyncio.sleep(0.05)
+            start = time.perf_counter()
+            await coordinator.handle_subscription_data(frame)
+            handle_time += time.perf_counter() - start
+        await monitor.stop()
+
+        return [
+            size,
+            "executor" if offload else "inline",
+            handle_time / rounds * 1000,
+            monitor.max_lag * 1000,
+            monitor.total_lag / rounds * 1000,
+        ]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    """Run the benchmark for every fleet size in both modes."""
+    rows = []
+    for size in args.sizes:
+        for offload in (False, True):
+            rows.append(await _bench(size, offload, args.rounds))
+    print_table(HEADERS, rows)
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Recorder writes caused by the tracker and course sensor attributes.
+
+Moves a fleet through the coordinator and serialises the attributes of
+every tracker and course sensor after each update, the way the recorder
+does: attributes listed in ``_unrecorded_attributes`` are dropped and an
+attribute set is stored only once. Reports the attribute rows and bytes
+written per 1000 position updates for the attributes published before
+the recorder exclusions, with the exclusions, and with only the identity
+attributes selected in the options.
+
+Run with::
+
+    python -m benchmarks.bench_recorder --devices 1000 --updates 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from typing import Any
+
+from custom_components.ha_traccar.const import (
+    ATTR_TRACCAR_ID,
+    ATTR_TRACKER,
+    CONF_TRACKER_ATTRIBUTES,
+)
+from custom_components.ha_traccar.device_tracker import _create_entities
+from custom_components.ha_traccar.sensor import TraccarServerCourseSensor
+
+from .common import (
+    async_client,
+    async_test_home_assistant,
+    create_coordinator,
+    print_table,
+)
+from .fake_traccar import FakeTraccarServer, Fleet
+
+HEADERS = [
+    "mode",
+    "states",
+    "attr_rows_per_1k",
+    "attr_kib_per_1k",
+    "bytes_per_state",
+]
+
+MODES = {
+    "before": {},
+    "after": {},
+    "minimal": {CONF_TRACKER_ATTRIBUTES: [ATTR_TRACCAR_ID, ATTR_TRACKER]},
+}
+
+
+def _recorded(entity: Any, mode: str) -> dict[str, Any]:
+    """Return the attributes of an entity the recorder would store."""
+    if mode == "before":
+        # 排除前：所有属性都写入历史记录
+        return entity.extra_state_attributes
+    return {
+        key: value
+        for key, value in entity.extra_state_attributes.items()
+        if key not in entity._unrecorded_attributes
+    }
+
+
+async def _bench(mode: str, args: argparse.Namespace) -> list:
+    """Move the fleet ``args.updates`` times and count the attribute writes."""
+    fleet = Fleet(size=args.devices, seed=args.seed)
+    async with FakeTraccarServer(fleet) as server, async_client(
+        server
+    ) as client, async_test_home_assistant() as hass:
+        coordinator = create_coordinator(hass, client, MODES[mode])
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success, coordinator.last_exception
+
+        entities: dict[int, list[Any]] = {
+            device_id: [
+                *_create_entities(coordinator, entry),
+                TraccarServerCourseSensor(coordinator, entry["device"]),
+            ]
+            for device_id, entry in coordinator.data.items()
+        }
+        # 记录器按内容去重属性，相同的属性集合只写入一次
+        stored: set[str] = set()
+        rows = size = states = 0
+        for _ in range(args.updates):
+            positions = [fleet.move(device, 10.0) for device in fleet.devices]
+            await coordinator.handle_subscription_data({"positions": positions})
+            for position in positions:
+                for entity in entities[position["deviceId"]]:
+                    states += 1
+                    blob = json.dumps(
+                        _recorded(entity, mode), separators=(",", ":"), default=str
+                    )
+                    if blob not in stored:
+                        stored.add(blob)
+                        rows += 1
+                        size += len(blob.encode())
+
+        updates = args.devices * args.updates
+        return [
+            mode,
+            states,
+            rows * 1000 / updates,
+            size * 1000 / updates / 1024,
+            size / states,
+        ]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    """Run every mode and print the results."""
+    print_table(HEADERS, [await _bench(mode, args) for mode in MODES])
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1_000)
+    parser.add_argument("--updates", type=int, default=20, help="positions per device")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
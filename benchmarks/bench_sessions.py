@@ -0,0 +1,147 @@
+"""Traccar logins and sessions over repeated config entry reloads.
+
+Sets the integration up and unloads it ``--reloads`` times against the
+fake server. Each setup refreshes the coordinator and connects the
+websocket until the first frame arrives. ``fresh`` is the previous
+behaviour: a new HTTP session per setup and pytraccar's subscription,
+which logs in on every connect. ``pooled`` takes the session from the
+session pool, so a reloaded entry keeps its cookie, and ``token`` does
+the same with a token login. Reports the setup time, the logins the
+server saw and the sessions still open on the server afterwards.
+
+Run with::
+
+    python -m benchmarks.bench_sessions --devices 100 --reloads 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from aiohttp import ClientSession, CookieJar
+from pytraccar import ApiClient
+
+from custom_components.ha_traccar.api import TraccarServerApiClient
+from custom_components.ha_traccar.session import SessionPool
+
+from .common import (
+    async_test_home_assistant,
+    create_coordinator,
+    percentile,
+    print_table,
+)
+from .fake_traccar import FakeTraccarServer, Fleet
+
+HEADERS = [
+    "mode",
+    "reloads",
+    "setup_p50_ms",
+    "logins",
+    "session_reuses",
+    "server_sessions_open",
+]
+
+MODES = ("fresh", "pooled", "token")
+
+
+def _client(
+    server: FakeTraccarServer, session: ClientSession, token: str | None = None
+) -> TraccarServerApiClient:
+    """Create a client the same way the integration does."""
+    return TraccarServerApiClient(
+        client_session=session,
+        host=server.host,
+        port=server.port,
+        username="bench",
+        password="bench",
+        ssl=False,
+        verify_ssl=False,
+        token=token,
+    )
+
+
+async def _setup(hass: Any, client: TraccarServerApiClient, fresh: bool) -> None:
+    """Refresh the coordinator and wait for the first websocket frame."""
+    coordinator = create_coordinator(hass, client)
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success, coordinator.last_exception
+    received = asyncio.Event()
+
+    async def _callback(_: Any) -> None:
+        received.set()
+
+    if fresh:
+        # pytraccar 自身的订阅每次连接都会登录
+        subscription = asyncio.ensure_future(ApiClient.subscribe(client, _callback))
+    else:
+        subscription = asyncio.ensure_future(client.subscribe(_callback))
+    await received.wait()
+    subscription.cancel()
+    await asyncio.gather(subscription, return_exceptions=True)
+
+
+async def _bench(mode: str, args: argparse.Namespace) -> list[Any]:
+    """Reload the integration ``args.reloads`` times."""
+    fleet = Fleet(size=args.devices, seed=args.seed)
+    async with FakeTraccarServer(fleet) as server, async_test_home_assistant() as hass:
+        pool = SessionPool(hass)
+        entry = SimpleNamespace(
+            entry_id="bench",
+            data={
+                "host": server.host,
+                "port": server.port,
+                "ssl": False,
+                "verify_ssl": False,
+                "username": "bench",
+                "password": "bench",
+                "access_token": "bench" if mode == "token" else None,
+            },
+        )
+        durations = []
+        reuses = 0
+        for _ in range(args.reloads):
+            start = time.perf_counter()
+            if mode == "fresh":
+                async with ClientSession(cookie_jar=CookieJar(unsafe=True)) as session:
+                    await _setup(hass, _client(server, session), fresh=True)
+                    durations.append(time.perf_counter() - start)
+                continue
+            client = _client(
+                server, pool.async_acquire(entry), entry.data["access_token"]
+            )
+            await _setup(hass, client, fresh=False)
+            durations.append(time.perf_counter() - start)
+            reuses += client.session_reuses
+            pool.async_release(entry.entry_id, client)
+
+        open_sessions = len(server._cookies)
+        await pool.async_close(entry.entry_id)
+        return [
+            mode,
+            args.reloads,
+            percentile(durations, 50) * 1000,
+            server.logins,
+            reuses,
+            open_sessions,
+        ]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    """Run every mode and print the results."""
+    print_table(HEADERS, [await _bench(mode, args) for mode in MODES])
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--reloads", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
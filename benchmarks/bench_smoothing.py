@@ -0,0 +1,139 @@
+"""Throughput of the position smoothers and the zone transitions they remove.
+
+Replays a track through every smoothing mode and counts how often the
+published position enters or leaves a circular zone. Without ``--track`` a
+noisy synthetic track is used: a device parked on the edge of the zone,
+driving away and coming back. A recorded track is a CSV file with
+``time,latitude,longitude,accuracy`` rows, time in POSIX seconds, for
+example exported from Traccar's route report.
+
+Run with::
+
+    python -m benchmarks.bench_smoothing
+    python -m benchmarks.bench_smoothing --track route.csv --zone 31.23,121.47,150
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import math
+import random
+import time
+
+from custom_components.ha_traccar.smoothing import (
+    METERS_PER_DEGREE,
+    SMOOTHING_MODES,
+    create_smoother,
+)
+
+from .common import print_table
+
+HEADERS = ["mode", "fixes", "fixes_per_s", "transitions", "removed"]
+
+Fix = tuple[float, float, float, float]
+
+
+def _synthetic_track(seed: int) -> tuple[list[Fix], tuple[float, float, float]]:
+    """Return a noisy track and a zone whose edge it is parked on."""
+    rng = random.Random(seed)
+    zone = (31.23, 121.47, 150.0)
+    scale = METERS_PER_DEGREE * math.cos(math.radians(zone[0]))
+    track: list[Fix] = []
+    timestamp = 1_700_000_000.0
+    # 停在区域边缘 → 驶离 → 返回并停放
+    legs = [(0.0, 360), (12.0, 120), (-12.0, 120), (0.0, 360)]
+    north = zone[2]
+    for speed, fixes in legs:
+        for _ in range(fixes):
+            timestamp += 10
+            north += speed * 10
+            accuracy = rng.uniform(5, 40)
+            track.append(
+                (
+                    timestamp,
+                    zone[0]
+                    + (north + rng.gauss(0, accuracy / 2)) / METERS_PER_DEGREE,
+                    zone[1] + rng.gauss(0, accuracy / 2) / scale,
+                    accuracy,
+                )
+            )
+    return track, zone
+
+
+def _load_track(path: str) -> list[Fix]:
+    """Read a recorded track."""
+    with open(path, newline="", encoding="utf-8") as file:
+        return [
+            (float(row[0]), float(row[1]), float(row[2]), float(row[3] or 0))
+            for row in csv.reader(file)
+            if row and not row[0].startswith("#") and row[0] != "time"
+        ]
+
+
+def _inside(
+    zone: tuple[float, float, float], latitude: float, longitude: float
+) -> bool:
+    """Return whether a point is inside a circular zone."""
+    scale = METERS_PER_DEGREE * math.cos(math.radians(zone[0]))
+    return (
+        math.hypot(
+            (latitude - zone[0]) * METERS_PER_DEGREE, (longitude - zone[1]) * scale
+        )
+        <= zone[2]
+    )
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--track", help="CSV file with time,latitude,longitude,accuracy"
+    )
+    parser.add_argument("--zone", help="latitude,longitude,radius of the zone")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=100)
+    args = parser.parse_args()
+
+    track, zone = _synthetic_track(args.seed)
+    if args.track:
+        if not args.zone:
+            parser.error("--zone is required with --track")
+        track = _load_track(args.track)
+    if args.zone:
+        latitude, longitude, radius = (float(value) for value in args.zone.split(","))
+        zone = (latitude, longitude, radius)
+
+    rows = []
+    baseline = None
+    for mode in SMOOTHING_MODES:
+        smoother = create_smoother(mode)
+        transitions = 0
+        inside = None
+        for timestamp, latitude, longitude, accuracy in track:
+            if smoother is not None:
+                latitude, longitude = smoother.update(
+                    timestamp, latitude, longitude, accuracy
+                )
+            if inside is not None and _inside(zone, latitude, longitude) != inside:
+                transitions += 1
+            inside = _inside(zone, latitude, longitude)
+        if baseline is None:
+            baseline = transitions
+
+        throughput = math.inf
+        if smoother is not None:
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                smoother = create_smoother(mode)
+                for timestamp, latitude, longitude, accuracy in track:
+                    smoother.update(timestamp, latitude, longitude, accuracy)
+            throughput = len(track) * args.rounds / (time.perf_counter() - start)
+
+        rows.append(
+            [mode, len(track), throughput, transitions, baseline - transitions]
+        )
+    print_table(HEADERS, rows)
+
+
+if __name__ == "__main__":
+    main()
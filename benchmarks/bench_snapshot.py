@@ -0,0 +1,102 @@
+"""Reading a fleet from the state machine versus the fleet snapshot.
+
+Loads a fleet into the coordinator and writes a tracker state per device,
+then compares a dashboard reading every ``device_tracker`` state (as
+``get_states`` does) with reading the columnar snapshot: the first
+encoding of a version, a cached read of the same version, and the delta
+after a share of the fleet moved. Reports the time and the size of the
+JSON each read produces.
+
+Run with::
+
+    python -m benchmarks.bench_snapshot --devices 10000 --moved 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+import time
+from typing import Any
+
+from homeassistant.helpers.json import json_bytes
+
+from .common import (
+    async_client,
+    async_test_home_assistant,
+    create_coordinator,
+    print_table,
+)
+from .fake_traccar import FakeTraccarServer, Fleet
+
+HEADERS = ["read", "devices", "ms", "kib"]
+
+
+def _timed(read: Callable[[], Any]) -> tuple[float, Any]:
+    """Return how long ``read`` took in milliseconds and what it returned."""
+    start = time.perf_counter()
+    body = read()
+    return (time.perf_counter() - start) * 1000, body
+
+
+async def _main(args: argparse.Namespace) -> None:
+    """Compare the reads and print the results."""
+    fleet = Fleet(size=args.devices, seed=args.seed)
+    async with FakeTraccarServer(fleet) as server, async_client(
+        server
+    ) as client, async_test_home_assistant() as hass:
+        coordinator = create_coordinator(hass, client)
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success, coordinator.last_exception
+        for device_id, entry in coordinator.data.items():
+            longitude, latitude = entry["wgs84"]
+            hass.states.async_set(
+                f"device_tracker.tracker_{device_id}",
+                "not_home",
+                {
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "gps_accuracy": entry["position"]["accuracy"],
+                    "speed": entry["derived"]["speed"],
+                    "status": entry["device"]["status"],
+                    "geofence": entry["geofence"]["name"] if entry["geofence"] else None,
+                    "traccar_id": device_id,
+                },
+            )
+
+        snapshot = coordinator.snapshot
+        rows = []
+        elapsed, body = _timed(
+            lambda: json_bytes(
+                [state.as_dict() for state in hass.states.async_all("device_tracker")]
+            )
+        )
+        rows.append(["states", args.devices, elapsed, len(body) / 1024])
+        elapsed, body = _timed(lambda: json_bytes(snapshot.as_dict()))
+        rows.append(["snapshot", len(snapshot), elapsed, len(body) / 1024])
+        # 同一版本直接返回已构建的快照，HTTP 视图也复用编码结果
+        elapsed, _ = _timed(snapshot.as_dict)
+        rows.append(["snapshot_cached", len(snapshot), elapsed, len(body) / 1024])
+
+        version = snapshot.version
+        moved = [
+            fleet.move(device, 10.0)
+            for device in fleet.devices[: int(args.devices * args.moved)]
+        ]
+        await coordinator.handle_subscription_data({"positions": moved})
+        elapsed, body = _timed(lambda: json_bytes(snapshot.as_dict(version)))
+        rows.append(["delta", len(moved), elapsed, len(body) / 1024])
+        print_table(HEADERS, rows)
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10_000)
+    parser.add_argument("--moved", type=float, default=0.01, help="share of devices")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
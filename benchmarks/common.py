@@ -0,0 +1,119 @@
+"""Shared helpers for the ha_traccar benchmarks."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+import statistics
+import tempfile
+import time
+from typing import Any
+
+from aiohttp import ClientSession, CookieJar
+from homeassistant.core import HomeAssistant
+
+from custom_components.ha_traccar.api import TraccarServerApiClient
+from custom_components.ha_traccar.coordinator import TraccarServerCoordinator
+
+from .fake_traccar import FakeTraccarServer
+
+FLEET_SIZES = (10, 100, 1_000, 10_000)
+
+
+@asynccontextmanager
+async def async_test_home_assistant() -> AsyncIterator[HomeAssistant]:
+    """Yield a bare Home Assistant instance running in the current loop."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        try:
+            yield hass
+        finally:
+            await hass.async_stop(force=True)
+
+
+@asynccontextmanager
+async def async_client(
+    server: FakeTraccarServer,
+) -> AsyncIterator[TraccarServerApiClient]:
+    """Yield a pytraccar client connected to the fake server."""
+    async with ClientSession(cookie_jar=CookieJar(unsafe=True)) as session:
+        yield TraccarServerApiClient(
+            client_session=session,
+            host=server.host,
+            port=server.port,
+            username="bench",
+            password="bench",
+            ssl=False,
+            verify_ssl=False,
+        )
+
+
+def create_coordinator(
+    hass: HomeAssistant,
+    client: TraccarServerApiClient,
+    options: Mapping[str, Any] | None = None,
+) -> TraccarServerCoordinator:
+    """Create a coordinator the same way the integration does."""
+    return TraccarServerCoordinator(hass=hass, client=client, options=options or {})
+
+
+class LoopMonitor:
+    """Measure how long the event loop is blocked."""
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """Initialize the monitor."""
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        """Sleep repeatedly and record how late each wake-up is."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self) -> None:
+        """Start monitoring."""
+        self.lags.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    @property
+    def max_lag(self) -> float:
+        """Return the longest single block in seconds."""
+        return max(self.lags, default=0.0)
+
+    @property
+    def total_lag(self) -> float:
+        """Return the total time blocked longer than 10 ms."""
+        return sum(lag for lag in self.lags if lag > 0.01)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the ``pct`` percentile of ``values``."""
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+def print_table(headers: list[str], rows: list[list[Any]]) -> None:
+    """Print rows as a fixed-width table."""
+    formatted = [
+        [f"{value:.3f}" if isinstance(value, float) else str(value) for value in row]
+        for row in rows
+    ]
+    widths = [
+        max(len(header), *(len(row[index]) for row in formatted))
+        for index, header in enumerate(headers)
+    ]
+    print("  ".join(header.rjust(width) for header, width in zip(headers, widths)))
+    for row in formatted:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
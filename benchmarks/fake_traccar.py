@@ -0,0 +1,519 @@
+"""Local stand-in Traccar server used by the ha_traccar benchmarks.
+
+Serves the subset of the Traccar REST API and websocket that the integration
+uses, backed by a simulated fleet of N devices moving at a configurable rate.
+
+Run standalone with::
+
+    python -m benchmarks.fake_traccar --devices 1000 --rate 1 --port 8082
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import heapq
+import json
+import math
+import random
+import time
+from typing import Any
+
+from aiohttp import WSMsgType, web
+
+# 模拟车队的中心点（上海）
+BASE_LATITUDE = 31.2304
+BASE_LONGITUDE = 121.4737
+METERS_PER_DEGREE = 111_320.0
+
+
+def _isoformat(timestamp: float) -> str:
+    """Format a unix timestamp the way Traccar does."""
+    return (
+        datetime.fromtimestamp(timestamp, tz=timezone.utc)
+        .isoformat(timespec="milliseconds")
+    )
+
+
+@dataclass
+class SimulatedDevice:
+    """A single simulated tracker."""
+
+    device_id: int
+    latitude: float
+    longitude: float
+    course: float
+    speed: float
+    battery: float
+    status: str = "online"
+    total_distance: float = 0.0
+    # positionPeriodic 命令设置的上报间隔（秒），None 表示使用车队的默认频率
+    interval: float | None = None
+    parked: bool = False
+
+
+@dataclass
+class Fleet:
+    """Simulated fleet of devices moving around a base point."""
+
+    size: int
+    rate: float = 1.0
+    seed: int = 1
+    geofence_count: int = 10
+    devices: list[SimulatedDevice] = field(default_factory=list)
+    geofences: list[dict[str, Any]] = field(default_factory=list)
+    positions: dict[int, dict[str, Any]] = field(default_factory=dict)
+    events: list[dict[str, Any]] = field(default_factory=list)
+    sent_at: dict[int, float] = field(default_factory=dict)
+    next_position_id: int = 1
+    next_event_id: int = 1
+
+    def __post_init__(self) -> None:
+        """Create the devices, geofences and an initial position per device."""
+        self._random = random.Random(self.seed)
+        for index in range(self.geofence_count):
+            self.geofences.append(
+                {
+                    "id": index + 1,
+                    "name": f"Geofence {index + 1}",
+                    "description": None,
+                    "area": "CIRCLE ({} {}, 500)".format(
+                        BASE_LATITUDE + self._random.uniform(-0.05, 0.05),
+                        BASE_LONGITUDE + self._random.uniform(-0.05, 0.05),
+                    ),
+                    "calendarId": 0,
+                    "attributes": {},
+                }
+            )
+        self._circles = [
+            (geofence["id"], *_parse_circle(geofence["area"]))
+            for geofence in self.geofences
+        ]
+        for device_id in range(1, self.size + 1):
+            self.devices.append(
+                SimulatedDevice(
+                    device_id=device_id,
+                    latitude=BASE_LATITUDE + self._random.uniform(-0.1, 0.1),
+                    longitude=BASE_LONGITUDE + self._random.uniform(-0.1, 0.1),
+                    course=self._random.uniform(0, 360),
+                    speed=self._random.uniform(0, 30),
+                    battery=self._random.uniform(20, 100),
+                )
+            )
+        now = time.time()
+        for device in self.devices:
+            self.positions[device.device_id] = self._position(device, now)
+
+    def device_model(self, device: SimulatedDevice) -> dict[str, Any]:
+        """Return the Traccar device model of a simulated device."""
+        position = self.positions.get(device.device_id)
+        return {
+            "id": device.device_id,
+            "name": f"Tracker {device.device_id}",
+            "uniqueId": f"bench{device.device_id:06d}",
+            "status": device.status,
+            "disabled": False,
+            "lastUpdate": position["serverTime"] if position else None,
+            "positionId": position["id"] if position else 0,
+            "groupId": device.device_id % 4,
+            "phone": None,
+            "model": "bench",
+            "contact": None,
+            "category": "car",
+            "calendarId": 0,
+            "expirationTime": None,
+            "attributes": {},
+        }
+
+    def _geofence_ids(self, latitude: float, longitude: float) -> list[int] | None:
+        """Return the geofences containing a point."""
+        geofence_ids = [
+            geofence_id
+            for geofence_id, center_lat, center_lng, radius in self._circles
+            if _distance(center_lat, center_lng, latitude, longitude) <= radius
+        ]
+        return geofence_ids or None
+
+    def _position(self, device: SimulatedDevice, timestamp: float) -> dict[str, Any]:
+        """Build a Traccar position model for the device's current state."""
+        position_id = self.next_position_id
+        self.next_position_id += 1
+        formatted = _isoformat(timestamp)
+        return {
+            "id": position_id,
+            "deviceId": device.device_id,
+            "protocol": "osmand",
+            "serverTime": formatted,
+            "deviceTime": formatted,
+            "fixTime": formatted,
+            "outdated": False,
+            "valid": True,
+            "latitude": device.latitude,
+            "longitude": device.longitude,
+            "altitude": 10.0 + self._random.uniform(-2, 2),
+            "speed": device.speed,
+            "course": device.course,
+            "address": None,
+            "accuracy": self._random.uniform(3, 25),
+            "network": None,
+            "geofenceIds": self._geofence_ids(device.latitude, device.longitude),
+            "attributes": {
+                "batteryLevel": round(device.battery),
+                "charge": device.battery < 30,
+                "motion": device.speed > 1,
+                "distance": 0.0,
+                "totalDistance": device.total_distance,
+            },
+        }
+
+    def move(self, device: SimulatedDevice, elapsed: float) -> dict[str, Any]:
+        """Advance a device by ``elapsed`` seconds and return its new position."""
+        device.course = (device.course + self._random.uniform(-15, 15)) % 360
+        if device.parked:
+            device.speed = 0.0
+        else:
+            device.speed = max(0.0, device.speed + self._random.uniform(-2, 2))
+        # Traccar 的速度单位是节
+        distance = device.speed * 0.514444 * elapsed
+        radians = math.radians(device.course)
+        device.latitude += distance * math.cos(radians) / METERS_PER_DEGREE
+        device.longitude += (
+            distance
+            * math.sin(radians)
+            / (METERS_PER_DEGREE * math.cos(math.radians(device.latitude)))
+        )
+        device.total_distance += distance
+        device.battery = max(0.0, device.battery - 0.01)
+        position = self._position(device, time.time())
+        self.positions[device.device_id] = position
+        return position
+
+    def add_event(self, device_id: int, event_type: str) -> dict[str, Any]:
+        """Record an event for the reports endpoint and return it."""
+        position = self.positions[device_id]
+        event = {
+            "id": self.next_event_id,
+            "deviceId": device_id,
+            "type": event_type,
+            "eventTime": position["serverTime"],
+            "positionId": position["id"],
+            "geofenceId": 0,
+            "maintenanceId": 0,
+            "attributes": {},
+        }
+        self.next_event_id += 1
+        self.events.append(event)
+        return event
+
+
+def _parse_circle(area: str) -> tuple[float, float, float]:
+    """Parse a ``CIRCLE (lat lng, radius)`` area."""
+    center, radius = area[len("CIRCLE (") : -1].split(",")
+    center_lat, center_lng = (float(value) for value in center.split())
+    return center_lat, center_lng, float(radius)
+
+
+def _distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Return the approximate distance in meters between two close points."""
+    dlat = (lat2 - lat1) * METERS_PER_DEGREE
+    dlng = (lng2 - lng1) * METERS_PER_DEGREE * math.cos(math.radians(lat1))
+    return math.hypot(dlat, dlng)
+
+
+class FakeTraccarServer:
+    """aiohttp application serving a simulated fleet."""
+
+    def __init__(
+        self,
+        fleet: Fleet,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        tick: float = 0.1,
+        command_latency: float = 0.05,
+        command_result_delay: float = 0.5,
+        time_scale: float = 1.0,
+    ) -> None:
+        """Initialize the server."""
+        self.fleet = fleet
+        self.host = host
+        self.port = port
+        self.tick = tick
+        self.command_latency = command_latency
+        self.command_result_delay = command_result_delay
+        self.time_scale = time_scale
+        self.commands_received = 0
+        self._reports: list[tuple[float, int]] = []
+        self._due: dict[int, float] = {}
+        self.logins = 0
+        self.logouts = 0
+        self._cookies: set[str] = set()
+        self.frames_sent = 0
+        self.positions_sent = 0
+        self.geocode_requests = 0
+        self._sockets: set[web.WebSocketResponse] = set()
+        self._runner: web.AppRunner | None = None
+        self._mover: asyncio.Task | None = None
+        self._answers: set[asyncio.Task] = set()
+        self.app = web.Application()
+        self.app.add_routes(
+            [
+                web.get("/api/server", self._server),
+                web.post("/api/session", self._session),
+                web.get("/api/session", self._session),
+                web.delete("/api/session", self._logout),
+                web.get("/api/devices", self._devices),
+                web.get("/api/positions", self._positions),
+                web.get("/api/geofences", self._geofences),
+                web.get("/api/reports/events", self._events),
+                web.post("/api/commands/send", self._command),
+                web.get("/api/socket", self._socket),
+                web.get("/reverse", self._reverse),
+            ]
+        )
+
+    async def start(self) -> None:
+        """Start serving and moving the fleet."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.port = self._runner.addresses[0][1]
+        self._mover = asyncio.create_task(self._move_fleet())
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        if self._mover is not None:
+            self._mover.cancel()
+        for task in list(self._answers):
+            task.cancel()
+        for websocket in list(self._sockets):
+            await websocket.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def __aenter__(self) -> FakeTraccarServer:
+        """Start the server in an ``async with`` block."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        """Stop the server at the end of an ``async with`` block."""
+        await self.stop()
+
+    async def broadcast(self, payload: dict[str, Any]) -> None:
+        """Send a frame to every connected websocket."""
+        if not self._sockets:
+            return
+        message = json.dumps(payload)
+        sent_at = time.perf_counter()
+        for position in payload.get("positions") or []:
+            self.fleet.sent_at[position["id"]] = sent_at
+        await asyncio.gather(
+            *(websocket.send_str(message) for websocket in self._sockets),
+            return_exceptions=True,
+        )
+        self.frames_sent += 1
+        self.positions_sent += len(payload.get("positions") or [])
+
+    def _interval(self, device: SimulatedDevice) -> float | None:
+        """Return the seconds between two positions of a device."""
+        if device.interval is not None:
+            return device.interval
+        if self.fleet.rate <= 0:
+            return None
+        return 1 / self.fleet.rate
+
+    def _schedule(self, device: SimulatedDevice, due: float) -> None:
+        """Schedule the next position of a device."""
+        # 重新安排时旧的条目留在堆中，取出时按 _due 跳过
+        self._due[device.device_id] = due
+        heapq.heappush(self._reports, (due, device.device_id))
+
+    async def _move_fleet(self) -> None:
+        """Move every device at its own reporting interval."""
+        now = time.monotonic()
+        if self.fleet.rate > 0:
+            # 错开首次上报的时间，使发送速率平稳
+            spread = (
+                1 / self.fleet.rate / self.time_scale / max(len(self.fleet.devices), 1)
+            )
+            for index, device in enumerate(self.fleet.devices):
+                self._schedule(device, now + index * spread)
+        devices = {device.device_id: device for device in self.fleet.devices}
+        while True:
+            await asyncio.sleep(self.tick)
+            now = time.monotonic()
+            positions = []
+            while self._reports and self._reports[0][0] <= now:
+                due, device_id = heapq.heappop(self._reports)
+                if self._due.get(device_id) != due:
+                    continue
+                del self._due[device_id]
+                device = devices[device_id]
+                if (interval := self._interval(device)) is None:
+                    continue
+                positions.append(self.fleet.move(device, interval))
+                self._schedule(device, due + interval / self.time_scale)
+            if positions:
+                await self.broadcast({"positions": positions})
+
+    async def _server(self, _: web.Request) -> web.Response:
+        """Return server information."""
+        return web.json_response({"id": 1, "version": "5.8", "attributes": {}})
+
+    async def _session(self, request: web.Request) -> web.Response:
+        """Return the session of a cookie, or create one like Traccar does."""
+        user = {"id": 1, "name": "bench", "email": "bench"}
+        if request.method == "GET" and "token" not in request.query:
+            # 未携带令牌的 GET 只查询当前会话
+            if request.cookies.get("JSESSIONID") in self._cookies:
+                return web.json_response(user)
+            raise web.HTTPNotFound
+        self.logins += 1
+        cookie = f"bench{self.logins}"
+        self._cookies.add(cookie)
+        response = web.json_response(user)
+        response.set_cookie("JSESSIONID", cookie)
+        return response
+
+    async def _logout(self, request: web.Request) -> web.Response:
+        """Close a session."""
+        if (cookie := request.cookies.get("JSESSIONID")) in self._cookies:
+            self._cookies.discard(cookie)
+            self.logouts += 1
+        response = web.Response(status=204)
+        response.del_cookie("JSESSIONID")
+        return response
+
+    async def _devices(self, request: web.Request) -> web.Response:
+        """Return all devices, optionally filtered by id."""
+        wanted = {int(value) for value in request.query.getall("id", [])}
+        return web.json_response(
+            [
+                self.fleet.device_model(device)
+                for device in self.fleet.devices
+                if not wanted or device.device_id in wanted
+            ]
+        )
+
+    async def _positions(self, request: web.Request) -> web.Response:
+        """Return the latest positions, optionally filtered by device or ID."""
+        devices = {int(value) for value in request.query.getall("deviceId", [])}
+        ids = {int(value) for value in request.query.getall("id", [])}
+        return web.json_response(
+            [
+                position
+                for device_id, position in self.fleet.positions.items()
+                if (not devices or device_id in devices)
+                and (not ids or position["id"] in ids)
+            ]
+        )
+
+    async def _geofences(self, _: web.Request) -> web.Response:
+        """Return all geofences."""
+        return web.json_response(self.fleet.geofences)
+
+    async def _events(self, request: web.Request) -> web.Response:
+        """Return recorded events, optionally filtered by device and type."""
+        devices = {int(value) for value in request.query.getall("deviceId", [])}
+        types = set(request.query.getall("type", []))
+        return web.json_response(
+            [
+                event
+                for event in self.fleet.events
+                if (not devices or event["deviceId"] in devices)
+                and (not types or "allEvents" in types or event["type"] in types)
+            ]
+        )
+
+    async def _command(self, request: web.Request) -> web.Response:
+        """Accept a command and answer it with a commandResult event later."""
+        command = await request.json()
+        self.commands_received += 1
+        await asyncio.sleep(self.command_latency)
+        if command["deviceId"] not in self.fleet.positions:
+            return web.json_response({"message": "Device not found"}, status=400)
+        if command["type"] == "positionPeriodic":
+            device = self.fleet.devices[command["deviceId"] - 1]
+            device.interval = float(command["attributes"]["frequency"])
+            self._schedule(
+                device, time.monotonic() + device.interval / self.time_scale
+            )
+        task = asyncio.create_task(self._answer(command))
+        self._answers.add(task)
+        task.add_done_callback(self._answers.discard)
+        return web.json_response({"id": 0, **command})
+
+    async def _answer(self, command: dict[str, Any]) -> None:
+        """Broadcast the device's answer to a command."""
+        await asyncio.sleep(self.command_result_delay)
+        event = self.fleet.add_event(command["deviceId"], "commandResult")
+        event["attributes"] = {"result": f"{command['type']} OK"}
+        await self.broadcast({"events": [event]})
+
+    async def _reverse(self, request: web.Request) -> web.Response:
+        """Stand in for a Nominatim style reverse geocoder."""
+        self.geocode_requests += 1
+        latitude = float(request.query["lat"])
+        longitude = float(request.query["lon"])
+        return web.json_response(
+            {"display_name": f"{latitude:.4f}, {longitude:.4f}, Bench City"}
+        )
+
+    async def _socket(self, request: web.Request) -> web.WebSocketResponse:
+        """Stream device and position updates."""
+        websocket = web.WebSocketResponse(heartbeat=30)
+        await websocket.prepare(request)
+        self._sockets.add(websocket)
+        try:
+            # Traccar 连接后会先推送完整的设备和位置列表
+            await websocket.send_str(
+                json.dumps(
+                    {
+                        "devices": [
+                            self.fleet.device_model(device)
+                            for device in self.fleet.devices
+                        ]
+                    }
+                )
+            )
+            await websocket.send_str(
+                json.dumps({"positions": list(self.fleet.positions.values())})
+            )
+            async for message in websocket:
+                if message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self._sockets.discard(websocket)
+        return websocket
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    """Serve a fleet until interrupted."""
+    fleet = Fleet(size=args.devices, rate=args.rate, seed=args.seed)
+    server = FakeTraccarServer(fleet, host=args.host, port=args.port)
+    await server.start()
+    print(f"Serving {args.devices} devices on http://{args.host}:{server.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    """Run the fake server from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=1.0, help="positions/s per device")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--seed", type=int, default=1)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,14 @@
 """The ha_traccar integration."""
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+from functools import partial
 import re
-
-from aiohttp import CookieJar
-from pytraccar import ApiClient
+import time
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    CONF_ACCESS_TOKEN,
     CONF_HOST,
     CONF_PASSWORD,
     CONF_PORT,
@@ -17,19 +17,21 @@ from homeassistant.const import (
     CONF_VERIFY_SSL,
     Platform,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, device_registry as dr
 from homeassistant.helpers.entity import async_generate_entity_id
 from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.typing import ConfigType
 
-from .const import (
-    CONF_CUSTOM_ATTRIBUTES,
-    CONF_EVENTS,
-    CONF_MAX_ACCURACY,
-    CONF_SKIP_ACCURACY_FILTER_FOR,
-    DOMAIN,
-)
-from .coordinator import TraccarServerCoordinator
+from .api import PROBE_INTERVAL, TraccarServerApiClient
+from .const import DOMAIN, LOGGER
+from .coordinator import GEOFENCE_SYNC_INTERVAL, TraccarServerCoordinator
+from .fleet import async_setup_fleet_api
+from .interval import EVALUATION_INTERVAL
+from .services import async_setup_services
+from .session import DATA_SESSIONS, SessionPool
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
 PLATFORMS: list[Platform] = [
     Platform.DEVICE_TRACKER,
@@ -37,6 +39,10 @@ PLATFORMS: list[Platform] = [
     Platform.SENSOR,
 ]
 
+# 每批创建的设备注册表条目数量
+DEVICE_CHUNK_SIZE = 250
+
+
 # 自定义实体ID格式化器
 def format_entity_id(entity_id_format: str, name: str) -> str:
     """Format the entity ID."""
@@ -45,49 +51,97 @@ def format_entity_id(entity_id_format: str, name: str) -> str:
     return entity_id_format.format(name)
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the ha_traccar services and fleet snapshot API."""
+    hass.data[DATA_SESSIONS] = SessionPool(hass)
+    async_setup_services(hass)
+    async_setup_fleet_api(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up ha_traccar from a config entry."""
-    client_session = async_create_clientsession(
-        hass,
-        cookie_jar=CookieJar(
-            unsafe=not entry.data[CONF_SSL] or not entry.data[CONF_VERIFY_SSL]
-        ),
-    )
-    coordinator = TraccarServerCoordinator(
-        hass=hass,
-        client=ApiClient(
-            client_session=client_session,
-            host=entry.data[CONF_HOST],
-            port=entry.data[CONF_PORT],
-            username=entry.data[CONF_USERNAME],
-            password=entry.data[CONF_PASSWORD],
-            ssl=entry.data[CONF_SSL],
-            verify_ssl=entry.data[CONF_VERIFY_SSL],
-        ),
-        events=entry.options.get(CONF_EVENTS, []),
-        max_accuracy=entry.options.get(CONF_MAX_ACCURACY, 0.0),
-        skip_accuracy_filter_for=entry.options.get(CONF_SKIP_ACCURACY_FILTER_FOR, []),
-        custom_attributes=entry.options.get(CONF_CUSTOM_ATTRIBUTES, []),
+    # 重新加载时沿用上次的会话和 Cookie，避免再次登录
+    sessions: SessionPool = hass.data[DATA_SESSIONS]
+    client = TraccarServerApiClient(
+        client_session=sessions.async_acquire(entry),
+        host=entry.data[CONF_HOST],
+        port=entry.data[CONF_PORT],
+        username=entry.data.get(CONF_USERNAME, ""),
+        password=entry.data.get(CONF_PASSWORD, ""),
+        ssl=entry.data[CONF_SSL],
+        verify_ssl=entry.data[CONF_VERIFY_SSL],
+        token=entry.data.get(CONF_ACCESS_TOKEN),
     )
+    entry.async_on_unload(partial(sessions.async_release, entry.entry_id, client))
+    coordinator = TraccarServerCoordinator(hass=hass, client=client, options=entry.options)
 
+    if coordinator.geocoder is not None:
+        await coordinator.geocoder.async_load()
     await coordinator.async_config_entry_first_refresh()
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
+    await _async_register_devices(hass, entry, coordinator)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
-    if entry.options.get(CONF_EVENTS):
-        entry.async_on_unload(
-            async_track_time_interval(
-                hass,
-                coordinator.import_events,
-                timedelta(seconds=30),
-                cancel_on_shutdown=True,
-                name="ha_traccar_import_events",
-            )
+
+    @callback
+    def _async_remove_stale_devices() -> None:
+        """Remove devices that were deleted on the Traccar server.
+
+        Devices excluded by the filters or missing a position stay registered,
+        so their entities keep their customisations and are only unavailable.
+        """
+        if not coordinator.last_update_success:
+            return
+        device_registry = dr.async_get(hass)
+        current = {
+            (DOMAIN, unique_id) for unique_id in coordinator.server_devices.values()
+        }
+        for device in dr.async_entries_for_config_entry(
+            device_registry, entry.entry_id
+        ):
+            if not device.identifiers & current:
+                LOGGER.debug("Removing device %s", device.name)
+                device_registry.async_update_device(
+                    device.id, remove_config_entry_id=entry.entry_id
+                )
+
+    _async_remove_stale_devices()
+    entry.async_on_unload(coordinator.async_add_listener(_async_remove_stale_devices))
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+    coordinator.async_update_event_import()
+    entry.async_on_unload(coordinator.async_shutdown)
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            coordinator.async_sync_geofences,
+            GEOFENCE_SYNC_INTERVAL,
+            cancel_on_shutdown=True,
+            name="ha_traccar_sync_geofences",
         )
+    )
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            coordinator.client.async_probe,
+            PROBE_INTERVAL,
+            cancel_on_shutdown=True,
+            name="ha_traccar_probe_endpoints",
+        )
+    )
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            coordinator.interval_controller.async_evaluate,
+            EVALUATION_INTERVAL,
+            cancel_on_shutdown=True,
+            name="ha_traccar_adaptive_interval",
+        )
+    )
 
+    await coordinator.client.async_probe()
     entry.async_create_background_task(
         hass=hass,
         target=coordinator.subscribe(),
@@ -97,6 +151,31 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def _async_register_devices(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: TraccarServerCoordinator,
+) -> None:
+    """Create the device registry entries before the entities are added."""
+    start = time.monotonic()
+    device_registry = dr.async_get(hass)
+    for index, device_entry in enumerate(coordinator.data.values(), start=1):
+        device = device_entry["device"]
+        device_registry.async_get_or_create(
+            config_entry_id=entry.entry_id,
+            identifiers={(DOMAIN, device["uniqueId"])},
+            model=device["model"],
+            name=device["name"],
+        )
+        if index % DEVICE_CHUNK_SIZE == 0:
+            await asyncio.sleep(0)
+    LOGGER.debug(
+        "Registered %s devices in %.2f seconds",
+        len(coordinator.data),
+        time.monotonic() - start,
+    )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
@@ -104,6 +183,12 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Log out and close the session of a removed entry."""
+    await hass.data[DATA_SESSIONS].async_close(entry.entry_id)
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle an options update."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    coordinator: TraccarServerCoordinator = hass.data[DOMAIN][entry.entry_id]
+    await coordinator.async_apply_options(entry.options)
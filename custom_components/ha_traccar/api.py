@@ -0,0 +1,595 @@
+"""Traccar API client for ha_traccar."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import math
+import time
+from typing import Any
+
+from aiohttp import (
+    BasicAuth,
+    ClientError,
+    ClientResponseError,
+    ClientSession,
+    ClientTimeout,
+    WSMsgType,
+)
+from pytraccar import (
+    ApiClient,
+    DeviceModel,
+    GeofenceModel,
+    PositionModel,
+    SubscriptionData,
+    SubscriptionStatus,
+    TraccarAuthenticationException,
+    TraccarConnectionException,
+    TraccarException,
+    TraccarResponseException,
+)
+
+from homeassistant.util.json import json_loads
+
+from .const import LOGGER
+
+REQUEST_TIMEOUT = ClientTimeout(total=60)
+# 每个请求携带的位置 ID 数量，避免 URL 过长
+POSITION_IDS_PER_REQUEST = 200
+PROBE_INTERVAL = timedelta(seconds=30)
+PROBE_TIMEOUT = ClientTimeout(total=5)
+# 只有当前节点比最快节点慢这么多倍（再加上余量）时才切换，避免来回切换
+LATENCY_SWITCH_FACTOR = 3
+LATENCY_SWITCH_MARGIN = 0.2
+# WebSocket 连接不足该时间（秒）即被关闭时，等待该时间后再重新连接
+RECONNECT_DELAY = 1
+
+
+# pytraccar 2.1.1 的方法读取的私有属性（去掉下划线前缀）
+PYTRACCAR_STATE = frozenset({"authentication", "base_url", "subscription_status"})
+
+
+class WebSocketClosed(TraccarConnectionException):
+    """The websocket closed after it was connected."""
+
+
+@dataclass(slots=True, eq=False)
+class Endpoint:
+    """A Traccar node the client can talk to."""
+
+    host: str
+    port: str | int
+    latency: float | None = None
+    healthy: bool = True
+    failures: int = 0
+
+    def __str__(self) -> str:
+        """Return the endpoint as host:port."""
+        return f"{self.host}:{self.port}"
+
+
+def parse_endpoint(value: str, default_port: str | int) -> Endpoint:
+    """Parse ``host``, ``host:port`` or ``[ipv6]:port``."""
+    value = value.strip()
+    host, separator, port = value.rpartition(":")
+    if not separator or not port.isdigit() or (":" in host and "]" not in host):
+        return Endpoint(value.strip("[]"), default_port)
+    return Endpoint(host.strip("[]"), port)
+
+
+class TraccarServerApiClient(ApiClient):
+    """pytraccar client that decodes the large REST responses with orjson.
+
+    pytraccar decodes every response with the standard ``json`` module. The
+    device, position and geofence lists are fetched here instead and decoded
+    with Home Assistant's orjson based ``json_loads``, which is several times
+    faster on full-fleet payloads.
+
+    The client can also fail over between several Traccar nodes that share
+    a database. A connection error on the active node marks it as down and
+    moves both REST requests and the websocket to the healthy node with the
+    lowest probed latency. A session is kept logged in on the best standby
+    node, so the switch does not wait for a cold login.
+
+    The websocket only logs in when the session cookie is no longer valid,
+    and does not log out when it disconnects, so a client built on the
+    session of a reloaded entry starts without a login. With a ``token``
+    the client logs in with the token and authenticates every request with
+    the session cookie instead of sending the password.
+    """
+
+    def __init__(
+        self,
+        *,
+        client_session: ClientSession,
+        host: str,
+        port: str | int,
+        username: str,
+        password: str,
+        ssl: bool,
+        verify_ssl: bool,
+        token: str | None = None,
+    ) -> None:
+        """Initialize the client."""
+        super().__init__(
+            client_session=client_session,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            ssl=ssl,
+            verify_ssl=verify_ssl,
+        )
+        self._rest_session = client_session
+        self._credentials = BasicAuth(username, password)
+        self._token = token or None
+        # 使用令牌时由会话 Cookie 认证请求
+        self._rest_auth = None if self._token else self._credentials
+        self._rest_ssl = verify_ssl if ssl else False
+        self.logins = 0
+        self.session_reuses = 0
+        self.websocket_connects = 0
+        self.websockets_open = 0
+        self._logged_in: set[str] = set()
+        self._scheme = "https" if ssl else "http"
+        self._subscription: asyncio.Future[None] | None = None
+        self.failovers = 0
+        self.endpoints = [Endpoint(host, port)]
+        self._use(self.endpoints[0])
+
+    def _url(self, endpoint: Endpoint) -> str:
+        """Return the API URL of an endpoint."""
+        host = f"[{endpoint.host}]" if ":" in endpoint.host else endpoint.host
+        return f"{self._scheme}://{host}:{endpoint.port}/api"
+
+    def _use(self, endpoint: Endpoint) -> None:
+        """Send requests to an endpoint and move the websocket to it."""
+        self.active = endpoint
+        self._rest_url = self._url(endpoint)
+        # pytraccar 自身的请求也发往当前节点
+        self._set_pytraccar_state(
+            base_url=self._rest_url, authentication=self._rest_auth
+        )
+        if (
+            self._subscription is not None
+            and not self._subscription.done()
+            and self._subscription is not asyncio.current_task()
+        ):
+            # WebSocket 仍连接在旧节点上，取消后 subscribe 会重新连接
+            self._subscription.cancel()
+
+    def _set_pytraccar_state(self, **state: Any) -> None:
+        """Write the private attributes that pytraccar's own methods read.
+
+        This is the only place the client touches pytraccar internals, so an
+        upgrade of the pinned pytraccar version only has to be checked here.
+        """
+        for name, value in state.items():
+            if name not in PYTRACCAR_STATE:
+                raise AttributeError(f"pytraccar has no {name} state")
+            setattr(self, f"_{name}", value)
+
+    def set_standby(self, standby: list[str]) -> None:
+        """Replace the standby endpoints."""
+        primary = self.endpoints[0]
+        known = {str(endpoint): endpoint for endpoint in self.endpoints}
+        self.endpoints = [primary]
+        for value in standby:
+            endpoint = parse_endpoint(value, primary.port)
+            self.endpoints.append(known.get(str(endpoint), endpoint))
+        if self.active not in self.endpoints:
+            self._use(primary)
+
+    def _best(self, exclude: Endpoint | None = None) -> Endpoint | None:
+        """Return the healthy endpoint with the lowest latency."""
+        return min(
+            (
+                endpoint
+                for endpoint in self.endpoints
+                if endpoint.healthy and endpoint is not exclude
+            ),
+            key=lambda endpoint: (
+                math.inf if endpoint.latency is None else endpoint.latency
+            ),
+            default=None,
+        )
+
+    def _fail_over(self, failed: Endpoint) -> bool:
+        """Mark an endpoint as down and switch away from it if possible."""
+        failed.healthy = False
+        failed.failures += 1
+        if failed is not self.active:
+            # 其他请求已经切换了节点
+            return True
+        if (best := self._best(exclude=failed)) is None:
+            return False
+        LOGGER.warning("Traccar at %s is unreachable, switching to %s", failed, best)
+        self.failovers += 1
+        self._use(best)
+        return True
+
+    async def _with_failover(
+        self,
+        call: Callable[..., Awaitable[Any]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """Run a request, retrying it on the next endpoint on connection errors."""
+        for attempt in range(len(self.endpoints)):
+            endpoint = self.active
+            try:
+                result = await self._with_session(endpoint, call, *args, **kwargs)
+            except TraccarConnectionException as ex:
+                if isinstance(ex.__cause__, asyncio.CancelledError):
+                    # pytraccar 把取消包装成连接错误，取消不应触发故障切换
+                    raise asyncio.CancelledError from ex
+                if attempt == len(self.endpoints) - 1 or not self._fail_over(
+                    endpoint
+                ):
+                    raise
+            else:
+                endpoint.healthy = True
+                return result
+        raise TraccarConnectionException("No Traccar endpoint is reachable")
+
+    async def _with_session(
+        self,
+        endpoint: Endpoint,
+        call: Callable[..., Awaitable[Any]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """Run a request, logging in again once if the session expired."""
+        try:
+            return await call(*args, **kwargs)
+        except TraccarAuthenticationException:
+            if self._rest_auth is not None:
+                raise
+            self._logged_in.discard(str(endpoint))
+            await self._login(endpoint)
+            return await call(*args, **kwargs)
+
+    async def _call_api(self, endpoint: str, method: str = "GET", **kwargs: Any) -> Any:
+        """Call a pytraccar endpoint with failover."""
+        return await self._with_failover(
+            super()._call_api, endpoint, method, **kwargs
+        )
+
+    async def _request(
+        self,
+        endpoint: str,
+        params: list[tuple[str, Any]] | None = None,
+    ) -> Any:
+        """Request an endpoint with failover and decode the JSON response."""
+        return await self._with_failover(self._request_once, endpoint, params)
+
+    async def _request_once(
+        self,
+        endpoint: str,
+        params: list[tuple[str, Any]] | None = None,
+    ) -> Any:
+        """Request an endpoint of the active node and decode the JSON response."""
+        try:
+            async with self._rest_session.get(
+                f"{self._rest_url}/{endpoint}",
+                params=params,
+                auth=self._rest_auth,
+                headers={"Accept": "application/json"},
+                ssl=self._rest_ssl,
+                timeout=REQUEST_TIMEOUT,
+            ) as response:
+                if response.status == 401:
+                    raise TraccarAuthenticationException("Authentication failed")
+                response.raise_for_status()
+                body = await response.read()
+        except ClientResponseError as exception:
+            raise TraccarResponseException(str(exception)) from exception
+        except (ClientError, asyncio.TimeoutError) as exception:
+            raise TraccarConnectionException(str(exception)) from exception
+        return json_loads(body)
+
+    async def send_command(
+        self,
+        device_id: int,
+        command_type: str,
+        attributes: dict[str, Any] | None = None,
+    ) -> bool:
+        """Send a command to a device.
+
+        Returns True if the server sent the command to the device and False
+        if it queued the command until the device connects.
+        """
+        return await self._with_failover(
+            self._send_command_once, device_id, command_type, attributes or {}
+        )
+
+    async def _send_command_once(
+        self,
+        device_id: int,
+        command_type: str,
+        attributes: dict[str, Any],
+    ) -> bool:
+        """Send a command through the active node."""
+        try:
+            async with self._rest_session.post(
+                f"{self._rest_url}/commands/send",
+                json={
+                    "deviceId": device_id,
+                    "type": command_type,
+                    "attributes": attributes,
+                },
+                auth=self._rest_auth,
+                headers={"Accept": "application/json"},
+                ssl=self._rest_ssl,
+                timeout=REQUEST_TIMEOUT,
+            ) as response:
+                if response.status == 401:
+                    raise TraccarAuthenticationException("Authentication failed")
+                response.raise_for_status()
+                # Traccar 在设备离线时返回 202，命令会在设备上线后发送
+                return response.status != 202
+        except ClientResponseError as exception:
+            raise TraccarResponseException(str(exception)) from exception
+        except (ClientError, asyncio.TimeoutError) as exception:
+            raise TraccarConnectionException(str(exception)) from exception
+
+    async def get_devices(self) -> list[DeviceModel]:
+        """Return all devices."""
+        return await self._request("devices")
+
+    async def get_positions(
+        self,
+        position_ids: list[int] | None = None,
+    ) -> list[PositionModel]:
+        """Return the latest position of every device, or the given positions."""
+        if position_ids is None:
+            return await self._request("positions")
+        chunks = await asyncio.gather(
+            *(
+                self._request(
+                    "positions",
+                    [
+                        ("id", position_id)
+                        for position_id in position_ids[
+                            start : start + POSITION_IDS_PER_REQUEST
+                        ]
+                    ],
+                )
+                for start in range(0, len(position_ids), POSITION_IDS_PER_REQUEST)
+            )
+        )
+        return [position for chunk in chunks for position in chunk]
+
+    async def get_geofences(self) -> list[GeofenceModel]:
+        """Return all geofences."""
+        return await self._request("geofences")
+
+    async def subscribe(
+        self, callback: Callable[[SubscriptionData], Awaitable[None]]
+    ) -> None:
+        """Subscribe to events, reconnecting to the new node on failover.
+
+        A connection the server closes, for example when it restarts, is
+        reconnected to the same node. Only a failure to connect fails over.
+        """
+        while True:
+            endpoint = self.active
+            self._subscription = asyncio.ensure_future(self._subscribe_once(callback))
+            started = time.monotonic()
+            try:
+                await self._subscription
+            except WebSocketClosed:
+                LOGGER.debug(
+                    "Traccar at %s closed the websocket, reconnecting", endpoint
+                )
+                if time.monotonic() - started < RECONNECT_DELAY:
+                    await asyncio.sleep(RECONNECT_DELAY)
+                continue
+            except TraccarConnectionException:
+                if not self._fail_over(endpoint):
+                    raise
+                continue
+            finally:
+                self._subscription = None
+            if self.active is endpoint:
+                return
+
+    async def _subscribe_once(
+        self, callback: Callable[[SubscriptionData], Awaitable[None]]
+    ) -> None:
+        """Read the websocket of the active node until it closes.
+
+        Like pytraccar's ``subscribe``, but the existing session is reused
+        and kept open afterwards.
+        """
+        endpoint = self.active
+        self._set_pytraccar_state(subscription_status=SubscriptionStatus.CONNECTING)
+        try:
+            await self._login(endpoint)
+            connection = await self._rest_session.ws_connect(
+                f"{self._url(endpoint)}/socket",
+                ssl=self._rest_ssl,
+                headers={"Accept": "application/json"},
+            )
+        except asyncio.CancelledError:
+            self._set_pytraccar_state(
+                subscription_status=SubscriptionStatus.DISCONNECTED
+            )
+            return
+        except TraccarException:
+            self._set_pytraccar_state(subscription_status=SubscriptionStatus.ERROR)
+            raise
+        except (ClientError, asyncio.TimeoutError) as exception:
+            self._set_pytraccar_state(subscription_status=SubscriptionStatus.ERROR)
+            raise TraccarConnectionException(str(exception)) from exception
+
+        endpoint.healthy = True
+        self.websocket_connects += 1
+        self.websockets_open += 1
+        self._set_pytraccar_state(subscription_status=SubscriptionStatus.CONNECTED)
+        try:
+            while not connection.closed:
+                message = await connection.receive()
+                if message.type == WSMsgType.TEXT:
+                    if not (data := json_loads(message.data)):
+                        continue
+                    try:
+                        await callback(
+                            {
+                                "devices": None,
+                                "events": None,
+                                "positions": None,
+                                **data,
+                            }
+                        )
+                    except Exception:  # pylint: disable=broad-except
+                        LOGGER.exception("Error while handling a websocket message")
+                elif message.type in (
+                    WSMsgType.CLOSE,
+                    WSMsgType.CLOSED,
+                    WSMsgType.CLOSING,
+                    WSMsgType.ERROR,
+                ):
+                    break
+            self._set_pytraccar_state(subscription_status=SubscriptionStatus.ERROR)
+            raise WebSocketClosed("WebSocket connection closed")
+        except asyncio.CancelledError:
+            self._set_pytraccar_state(
+                subscription_status=SubscriptionStatus.DISCONNECTED
+            )
+        finally:
+            self.websockets_open -= 1
+            await connection.close()
+
+    async def _login(self, endpoint: Endpoint) -> None:
+        """Log in to an endpoint unless its session cookie is still valid."""
+        url = f"{self._url(endpoint)}/session"
+        try:
+            async with self._rest_session.get(
+                url, ssl=self._rest_ssl, timeout=PROBE_TIMEOUT
+            ) as response:
+                if response.status == 200:
+                    self.session_reuses += 1
+                    self._logged_in.add(str(endpoint))
+                    return
+            if self._token:
+                request = self._rest_session.get(
+                    url,
+                    params={"token": self._token},
+                    ssl=self._rest_ssl,
+                    timeout=REQUEST_TIMEOUT,
+                )
+            else:
+                request = self._rest_session.post(
+                    url,
+                    data={
+                        "email": self._credentials.login,
+                        "password": self._credentials.password,
+                    },
+                    ssl=self._rest_ssl,
+                    timeout=REQUEST_TIMEOUT,
+                )
+            async with request as response:
+                if response.status in (400, 401):
+                    raise TraccarAuthenticationException("Authentication failed")
+                response.raise_for_status()
+        except ClientResponseError as exception:
+            raise TraccarResponseException(str(exception)) from exception
+        except (ClientError, asyncio.TimeoutError) as exception:
+            raise TraccarConnectionException(str(exception)) from exception
+        self.logins += 1
+        self._logged_in.add(str(endpoint))
+
+    async def async_logout(self) -> None:
+        """Close the sessions of every endpoint the client logged in to."""
+        for endpoint in self.endpoints:
+            if str(endpoint) not in self._logged_in:
+                continue
+            self._logged_in.discard(str(endpoint))
+            try:
+                async with self._rest_session.delete(
+                    f"{self._url(endpoint)}/session",
+                    ssl=self._rest_ssl,
+                    timeout=PROBE_TIMEOUT,
+                ):
+                    pass
+            except (ClientError, asyncio.TimeoutError) as exception:
+                LOGGER.debug(
+                    "Could not log out of Traccar at %s: %s", endpoint, exception
+                )
+
+    async def async_probe(self, _: datetime | None = None) -> None:
+        """Probe every endpoint and keep a session on the best standby node."""
+        if len(self.endpoints) < 2:
+            return
+        await asyncio.gather(*(self._probe(endpoint) for endpoint in self.endpoints))
+
+        if (best := self._best()) is None:
+            return
+        active = self.active
+        if best is not active and (
+            not active.healthy
+            or active.latency is None
+            or best.latency is not None
+            and active.latency
+            > best.latency * LATENCY_SWITCH_FACTOR + LATENCY_SWITCH_MARGIN
+        ):
+            LOGGER.info("Switching Traccar from %s to %s", active, best)
+            self.failovers += 1
+            self._use(best)
+
+        if (standby := self._best(exclude=self.active)) is not None:
+            await self._warm_up(standby)
+
+    async def _probe(self, endpoint: Endpoint) -> None:
+        """Measure the latency of an endpoint through the server endpoint."""
+        start = time.monotonic()
+        try:
+            async with self._rest_session.get(
+                f"{self._url(endpoint)}/server",
+                ssl=self._rest_ssl,
+                timeout=PROBE_TIMEOUT,
+            ) as response:
+                response.raise_for_status()
+                await response.read()
+        except (ClientError, asyncio.TimeoutError) as exception:
+            LOGGER.debug("Probe of Traccar at %s failed: %s", endpoint, exception)
+            endpoint.healthy = False
+            endpoint.failures += 1
+            return
+        sample = time.monotonic() - start
+        if endpoint.latency is not None:
+            sample = endpoint.latency * 0.7 + sample * 0.3
+        endpoint.latency = sample
+        endpoint.healthy = True
+
+    async def _warm_up(self, endpoint: Endpoint) -> None:
+        """Log in to a standby endpoint unless it already has a session."""
+        try:
+            await self._login(endpoint)
+        except TraccarException as exception:
+            LOGGER.debug("Could not log in to Traccar at %s: %s", endpoint, exception)
+
+    @property
+    def endpoint_statistics(self) -> dict[str, Any]:
+        """Return the state of the endpoints for diagnostics."""
+        return {
+            "failovers": self.failovers,
+            "logins": self.logins,
+            "session_reuses": self.session_reuses,
+            "websocket_connects": self.websocket_connects,
+            "websockets_open": self.websockets_open,
+            "endpoints": [
+                {
+                    "endpoint": str(endpoint),
+                    "active": endpoint is self.active,
+                    "healthy": endpoint.healthy,
+                    "latency_ms": None
+                    if endpoint.latency is None
+                    else round(endpoint.latency * 1000, 1),
+                    "failures": endpoint.failures,
+                }
+                for endpoint in self.endpoints
+            ],
+        }
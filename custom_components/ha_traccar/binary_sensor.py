@@ -10,11 +10,19 @@ from homeassistant.components.binary_sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN
-from .coordinator import TraccarServerCoordinator
-from .entity import TraccarServerEntity, generate_entity_id
+from .const import DOMAIN, FIELD_BATTERY, FIELD_MOTION, FIELD_STATUS
+from .coordinator import (
+    TraccarServerCoordinator,
+    TraccarServerCoordinatorDataDevice,
+)
+from .entity import (
+    TraccarServerEntity,
+    async_setup_device_entities,
+    generate_entity_id,
+)
 
 
 async def async_setup_entry(
@@ -24,35 +32,42 @@ async def async_setup_entry(
 ) -> None:
     """Set up binary sensor entities."""
     coordinator: TraccarServerCoordinator = hass.data[DOMAIN][entry.entry_id]
+    async_setup_device_entities(entry, coordinator, _create_entities)
+
+
+def _create_entities(
+    coordinator: TraccarServerCoordinator,
+    device_entry: TraccarServerCoordinatorDataDevice,
+) -> list[Entity]:
+    """Create the binary sensor entities of a device."""
+    entities: list[Entity] = []
+    device = device_entry["device"]
+    device_name = device["name"]
+    # 处理设备名称，转换为有效的实体ID格式
+    device_id = re.sub(r'[^\w\s]', '', device_name.lower()).replace(" ", "_")
     
-    entities = []
-    for device_entry in coordinator.data.values():
-        device = device_entry["device"]
-        device_name = device["name"]
-        # 处理设备名称，转换为有效的实体ID格式
-        device_id = re.sub(r'[^\w\s]', '', device_name.lower()).replace(" ", "_")
-        
-        # 创建运动传感器
-        motion_sensor = TraccarServerMotionBinarySensor(coordinator, device)
-        motion_sensor.entity_id = f"binary_sensor.{device_id}_motion"
-        entities.append(motion_sensor)
-        
-        # 创建状态传感器
-        status_sensor = TraccarServerStatusBinarySensor(coordinator, device)
-        status_sensor.entity_id = f"binary_sensor.{device_id}_status"
-        entities.append(status_sensor)
-        
-        # 创建充电传感器
-        charging_sensor = TraccarServerChargingBinarySensor(coordinator, device)
-        charging_sensor.entity_id = f"binary_sensor.{device_id}_charging"
-        entities.append(charging_sensor)
+    # 创建运动传感器
+    motion_sensor = TraccarServerMotionBinarySensor(coordinator, device)
+    motion_sensor.entity_id = f"binary_sensor.{device_id}_motion"
+    entities.append(motion_sensor)
+    
+    # 创建状态传感器
+    status_sensor = TraccarServerStatusBinarySensor(coordinator, device)
+    status_sensor.entity_id = f"binary_sensor.{device_id}_status"
+    entities.append(status_sensor)
     
-    async_add_entities(entities)
+    # 创建充电传感器
+    charging_sensor = TraccarServerChargingBinarySensor(coordinator, device)
+    charging_sensor.entity_id = f"binary_sensor.{device_id}_charging"
+    entities.append(charging_sensor)
+
+    return entities
 
 
 class TraccarServerMotionBinarySensor(TraccarServerEntity, BinarySensorEntity):
     """Represent a motion binary sensor."""
 
+    _traccar_fields = frozenset({FIELD_MOTION})
     _attr_device_class = BinarySensorDeviceClass.MOTION
 
     def __init__(self, coordinator: TraccarServerCoordinator, device: dict) -> None:
@@ -81,6 +96,7 @@ class TraccarServerMotionBinarySensor(TraccarServerEntity, BinarySensorEntity):
 class TraccarServerStatusBinarySensor(TraccarServerEntity, BinarySensorEntity):
     """Represent a status binary sensor."""
 
+    _traccar_fields = frozenset({FIELD_STATUS})
     _attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
     _attr_icon = "mdi:access-point"
 
@@ -110,6 +126,7 @@ class TraccarServerStatusBinarySensor(TraccarServerEntity, BinarySensorEntity):
 class TraccarServerChargingBinarySensor(TraccarServerEntity, BinarySensorEntity):
     """Represent a charging binary sensor."""
 
+    _traccar_fields = frozenset({FIELD_BATTERY})
     _attr_device_class = BinarySensorDeviceClass.BATTERY_CHARGING
     _attr_icon = "mdi:battery-charging"
 
@@ -133,15 +150,4 @@ class TraccarServerChargingBinarySensor(TraccarServerEntity, BinarySensorEntity)
     @property
     def is_on(self) -> bool:
         """Return true if the device is charging."""
-        # 首先尝试获取 charge 属性
-        charge = self.traccar_position["attributes"].get("charge")
-        if charge is not None:
-            return charge
-        
-        # 如果没有 charge 属性，尝试其他可能的属性
-        charging = self.traccar_position["attributes"].get("charging")
-        if charging is not None:
-            return charging
-            
-        # 如果都没有，尝试使用 ignition 属性（有些设备可能使用这个）
-        return self.traccar_position["attributes"].get("ignition", False) 
\ No newline at end of file
+        return self.traccar_derived["charging"] 
\ No newline at end of file
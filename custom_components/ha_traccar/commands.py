@@ -0,0 +1,201 @@
+"""Sending commands to Traccar devices and matching their results."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any
+
+from pytraccar import ReportsEventeModel, TraccarException
+
+from homeassistant.core import callback
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from .api import TraccarServerApiClient
+
+# 同时发送的命令数量上限
+COMMAND_CONCURRENCY = 20
+# 默认等待 commandResult 事件的时间（秒）
+COMMAND_RESULT_TIMEOUT = 30.0
+
+COMMAND_DELIVERED = "delivered"
+COMMAND_SENT = "sent"
+COMMAND_QUEUED = "queued"
+COMMAND_FAILED = "failed"
+
+
+class CommandTracker:
+    """Send commands to many devices and wait for their results.
+
+    The requests are sent concurrently, at most ``COMMAND_CONCURRENCY`` at
+    a time. A device answers a command with a ``commandResult`` event that
+    does not say which command it answers, and the coordinator passes every
+    event it receives to ``async_process_events``. A result is therefore
+    only waited for while no other command of this tracker to the device is
+    outstanding: being sent, waited for, or sent without waiting and not
+    answered within ``COMMAND_RESULT_TIMEOUT`` seconds. Otherwise the
+    command is reported as sent without a result. Results of commands sent
+    from elsewhere, such as the Traccar web UI, cannot be told apart.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the tracker."""
+        self.sent = 0
+        self.failed = 0
+        self.results = 0
+        self.timeouts = 0
+        self._waiting: dict[int, asyncio.Future[str | None]] = {}
+        self._sending: dict[int, int] = {}
+        # 已发送但不等待结果的命令：设备 -> (数量, 过期时间)
+        self._unanswered: dict[int, tuple[int, float]] = {}
+
+    @property
+    def statistics(self) -> dict[str, int]:
+        """Return the command counters."""
+        now = time.monotonic()
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "results": self.results,
+            "timeouts": self.timeouts,
+            "waiting": len(self._waiting),
+            "unanswered": sum(
+                count
+                for count, expires in self._unanswered.values()
+                if expires > now
+            ),
+        }
+
+    @callback
+    def async_process_events(self, events: list[ReportsEventeModel]) -> None:
+        """Resolve the commands answered by ``commandResult`` events."""
+        now = time.monotonic()
+        for event in events:
+            if event["type"] != "commandResult":
+                continue
+            device_id = event["deviceId"]
+            if self._take_unanswered(device_id, now):
+                continue
+            if (future := self._waiting.pop(device_id, None)) is not None:
+                future.set_result((event["attributes"] or {}).get("result"))
+                self.results += 1
+
+    async def async_send(
+        self,
+        client: TraccarServerApiClient,
+        device_ids: list[int],
+        command_type: str,
+        attributes: dict[str, Any],
+        timeout: float = COMMAND_RESULT_TIMEOUT,
+    ) -> dict[int, dict[str, Any]]:
+        """Send a command to every device and return the outcome per device.
+
+        With a ``timeout`` of 0 the outcomes are returned as soon as the
+        server accepted the commands, without waiting for the results.
+        """
+        semaphore = asyncio.Semaphore(COMMAND_CONCURRENCY)
+        outcomes = await asyncio.gather(
+            *(
+                self._async_send_one(
+                    client, semaphore, device_id, command_type, attributes, timeout
+                )
+                for device_id in device_ids
+            )
+        )
+        return dict(zip(device_ids, outcomes))
+
+    async def _async_send_one(
+        self,
+        client: TraccarServerApiClient,
+        semaphore: asyncio.Semaphore,
+        device_id: int,
+        command_type: str,
+        attributes: dict[str, Any],
+        timeout: float,
+    ) -> dict[str, Any]:
+        """Send a command to a device and wait for its result."""
+        alone = not self._is_busy(device_id)
+        self._supersede(device_id)
+        self._sending[device_id] = self._sending.get(device_id, 0) + 1
+        try:
+            async with semaphore:
+                delivered = await client.send_command(
+                    device_id, command_type, attributes
+                )
+        except TraccarException as exception:
+            LOGGER.debug(
+                "Could not send %s to device %s: %s", command_type, device_id, exception
+            )
+            self.failed += 1
+            return {"status": COMMAND_FAILED, "error": str(exception)}
+        finally:
+            if sending := self._sending.pop(device_id) - 1:
+                self._sending[device_id] = sending
+
+        self.sent += 1
+        status = COMMAND_SENT if delivered else COMMAND_QUEUED
+        if not delivered:
+            # 排队的命令要等设备上线才会执行，不等待结果
+            return {"status": status}
+        if not timeout or not alone or self._is_busy(device_id):
+            # 设备还有其他未完成的命令时，无法确定结果属于哪条命令
+            self._supersede(device_id)
+            self._add_unanswered(device_id, timeout or COMMAND_RESULT_TIMEOUT)
+            return {"status": status}
+
+        # 在服务器接受命令后才登记，之前到达的结果属于其他命令
+        future: asyncio.Future[str | None] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._waiting[device_id] = future
+        try:
+            await asyncio.wait((future,), timeout=timeout)
+        finally:
+            if self._waiting.get(device_id) is future:
+                del self._waiting[device_id]
+        if not future.done():
+            self.timeouts += 1
+            future.cancel()
+            return {"status": status}
+        if future.cancelled():
+            # 等待期间又向设备发送了命令
+            return {"status": status}
+        return {"status": COMMAND_DELIVERED, "result": future.result()}
+
+    def _is_busy(self, device_id: int) -> bool:
+        """Return whether another command to a device is outstanding."""
+        if (unanswered := self._unanswered.get(device_id)) is not None and (
+            time.monotonic() >= unanswered[1]
+        ):
+            del self._unanswered[device_id]
+        return (
+            device_id in self._unanswered
+            or device_id in self._waiting
+            or device_id in self._sending
+        )
+
+    def _supersede(self, device_id: int) -> None:
+        """Stop waiting for a result that another command's result may resolve."""
+        if (future := self._waiting.pop(device_id, None)) is not None:
+            future.cancel()
+            self._add_unanswered(device_id, COMMAND_RESULT_TIMEOUT)
+
+    def _add_unanswered(self, device_id: int, timeout: float) -> None:
+        """Expect a result to a command that nobody waits for."""
+        count, expires = self._unanswered.get(device_id, (0, 0.0))
+        self._unanswered[device_id] = (
+            count + 1,
+            max(expires, time.monotonic() + timeout),
+        )
+
+    def _take_unanswered(self, device_id: int, now: float) -> bool:
+        """Attribute a result to a command nobody waits for, if there is one."""
+        if (unanswered := self._unanswered.pop(device_id, None)) is None:
+            return False
+        count, expires = unanswered
+        if now >= expires:
+            return False
+        if count > 1:
+            self._unanswered[device_id] = (count - 1, expires)
+        return True
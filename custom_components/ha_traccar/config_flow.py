@@ -4,11 +4,13 @@ from __future__ import annotations
 from collections.abc import Mapping
 from typing import Any
 
-from pytraccar import ApiClient, ServerModel, TraccarException
+from aiohttp import CookieJar
+from pytraccar import ServerModel, TraccarAuthenticationException, TraccarException
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import (
+    CONF_ACCESS_TOKEN,
     CONF_HOST,
     CONF_PASSWORD,
     CONF_PORT,
@@ -17,7 +19,7 @@ from homeassistant.const import (
     CONF_VERIFY_SSL,
 )
 from homeassistant.core import callback
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
 from homeassistant.helpers.schema_config_entry_flow import (
     SchemaFlowFormStep,
     SchemaOptionsFlowHandler,
@@ -36,15 +38,40 @@ from homeassistant.helpers.selector import (
     TextSelectorType,
 )
 
+from .api import TraccarServerApiClient
 from .const import (
+    CONF_ADAPTIVE_INTERVAL,
+    CONF_BACKFILL_EVENTS,
     CONF_CUSTOM_ATTRIBUTES,
+    CONF_DATUM,
+    CONF_DUAL_TRACKER,
     CONF_EVENTS,
+    CONF_FILTER_CATEGORIES,
+    CONF_FILTER_GEOFENCES,
+    CONF_FILTER_GROUPS,
+    CONF_GEOCODER_CELL_SIZE,
+    CONF_GEOCODER_FIELD,
+    CONF_GEOCODER_URL,
+    CONF_GROUP_DATUMS,
+    CONF_HISTORY_SIZE,
+    CONF_IDLE_INTERVAL,
     CONF_MAX_ACCURACY,
+    CONF_MOVING_INTERVAL,
+    CONF_OFFLOAD_PROCESSING,
     CONF_SKIP_ACCURACY_FILTER_FOR,
+    CONF_SMOOTHING,
+    CONF_STANDBY_ENDPOINTS,
+    CONF_TRACKER_ATTRIBUTES,
+    DEFAULT_GEOCODER_CELL_SIZE,
+    DEFAULT_GEOCODER_FIELD,
     DOMAIN,
     EVENTS,
     LOGGER,
+    TRACKER_ATTRIBUTES,
 )
+from .coord_transform import DATUM_GCJ02, DATUMS
+from .interval import DEFAULT_IDLE_INTERVAL, DEFAULT_MOVING_INTERVAL
+from .smoothing import SMOOTHING_MODES, SMOOTHING_NONE
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
@@ -54,10 +81,13 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
         vol.Optional(CONF_PORT, default="8082"): TextSelector(
             TextSelectorConfig(type=TextSelectorType.TEXT)
         ),
-        vol.Required(CONF_USERNAME): TextSelector(
+        vol.Optional(CONF_USERNAME, default=""): TextSelector(
             TextSelectorConfig(type=TextSelectorType.EMAIL)
         ),
-        vol.Required(CONF_PASSWORD): TextSelector(
+        vol.Optional(CONF_PASSWORD, default=""): TextSelector(
+            TextSelectorConfig(type=TextSelectorType.PASSWORD)
+        ),
+        vol.Optional(CONF_ACCESS_TOKEN, default=""): TextSelector(
             TextSelectorConfig(type=TextSelectorType.PASSWORD)
         ),
         vol.Optional(CONF_SSL, default=False): BooleanSelector(BooleanSelectorConfig()),
@@ -104,6 +134,128 @@ OPTIONS_FLOW = {
                         options=list(EVENTS),
                     )
                 ),
+                vol.Optional(CONF_FILTER_GROUPS, default=[]): SelectSelector(
+                    SelectSelectorConfig(
+                        mode=SelectSelectorMode.DROPDOWN,
+                        multiple=True,
+                        sort=True,
+                        custom_value=True,
+                        options=[],
+                    )
+                ),
+                vol.Optional(CONF_FILTER_CATEGORIES, default=[]): SelectSelector(
+                    SelectSelectorConfig(
+                        mode=SelectSelectorMode.DROPDOWN,
+                        multiple=True,
+                        sort=True,
+                        custom_value=True,
+                        options=[],
+                    )
+                ),
+                vol.Optional(CONF_FILTER_GEOFENCES, default=[]): SelectSelector(
+                    SelectSelectorConfig(
+                        mode=SelectSelectorMode.DROPDOWN,
+                        multiple=True,
+                        sort=True,
+                        custom_value=True,
+                        options=[],
+                    )
+                ),
+                vol.Optional(CONF_GEOCODER_URL): TextSelector(
+                    TextSelectorConfig(type=TextSelectorType.URL)
+                ),
+                vol.Optional(
+                    CONF_GEOCODER_FIELD, default=DEFAULT_GEOCODER_FIELD
+                ): TextSelector(TextSelectorConfig(type=TextSelectorType.TEXT)),
+                vol.Optional(
+                    CONF_GEOCODER_CELL_SIZE, default=DEFAULT_GEOCODER_CELL_SIZE
+                ): NumberSelector(
+                    NumberSelectorConfig(
+                        mode=NumberSelectorMode.BOX,
+                        min=1.0,
+                        unit_of_measurement="m",
+                    )
+                ),
+                vol.Optional(CONF_BACKFILL_EVENTS, default=False): BooleanSelector(
+                    BooleanSelectorConfig()
+                ),
+                vol.Optional(CONF_OFFLOAD_PROCESSING, default=False): BooleanSelector(
+                    BooleanSelectorConfig()
+                ),
+                vol.Optional(CONF_STANDBY_ENDPOINTS, default=[]): SelectSelector(
+                    SelectSelectorConfig(
+                        mode=SelectSelectorMode.DROPDOWN,
+                        multiple=True,
+                        custom_value=True,
+                        options=[],
+                    )
+                ),
+                vol.Optional(CONF_DATUM, default=DATUM_GCJ02): SelectSelector(
+                    SelectSelectorConfig(
+                        mode=SelectSelectorMode.DROPDOWN,
+                        options=DATUMS,
+                        translation_key=CONF_DATUM,
+                    )
+                ),
+                vol.Optional(CONF_GROUP_DATUMS, default=[]): SelectSelector(
+                    SelectSelectorConfig(
+                        mode=SelectSelectorMode.DROPDOWN,
+                        multiple=True,
+                        custom_value=True,
+                        options=[],
+                    )
+                ),
+                vol.Optional(CONF_DUAL_TRACKER, default=True): BooleanSelector(
+                    BooleanSelectorConfig()
+                ),
+                vol.Optional(
+                    CONF_TRACKER_ATTRIBUTES, default=TRACKER_ATTRIBUTES
+                ): SelectSelector(
+                    SelectSelectorConfig(
+                        mode=SelectSelectorMode.DROPDOWN,
+                        multiple=True,
+                        options=TRACKER_ATTRIBUTES,
+                        translation_key=CONF_TRACKER_ATTRIBUTES,
+                    )
+                ),
+                vol.Optional(CONF_SMOOTHING, default=SMOOTHING_NONE): SelectSelector(
+                    SelectSelectorConfig(
+                        mode=SelectSelectorMode.DROPDOWN,
+                        options=SMOOTHING_MODES,
+                        translation_key=CONF_SMOOTHING,
+                    )
+                ),
+                vol.Optional(CONF_HISTORY_SIZE, default=0): NumberSelector(
+                    NumberSelectorConfig(
+                        mode=NumberSelectorMode.BOX,
+                        min=0,
+                        max=4096,
+                        step=1,
+                    )
+                ),
+                vol.Optional(CONF_ADAPTIVE_INTERVAL, default=False): BooleanSelector(
+                    BooleanSelectorConfig()
+                ),
+                vol.Optional(
+                    CONF_MOVING_INTERVAL, default=DEFAULT_MOVING_INTERVAL
+                ): NumberSelector(
+                    NumberSelectorConfig(
+                        mode=NumberSelectorMode.BOX,
+                        min=5,
+                        step=1,
+                        unit_of_measurement="s",
+                    )
+                ),
+                vol.Optional(
+                    CONF_IDLE_INTERVAL, default=DEFAULT_IDLE_INTERVAL
+                ): NumberSelector(
+                    NumberSelectorConfig(
+                        mode=NumberSelectorMode.BOX,
+                        min=30,
+                        step=1,
+                        unit_of_measurement="s",
+                    )
+                ),
             }
         )
     ),
@@ -115,16 +267,31 @@ class TraccarServerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def _get_server_info(self, user_input: dict[str, Any]) -> ServerModel:
         """Get server info."""
-        client = ApiClient(
-            client_session=async_get_clientsession(self.hass),
+        # 独立的会话，Traccar 常用 IP 地址访问，需要接受其 Cookie
+        session = async_create_clientsession(
+            self.hass, auto_cleanup=False, cookie_jar=CookieJar(unsafe=True)
+        )
+        client = TraccarServerApiClient(
+            client_session=session,
             host=user_input[CONF_HOST],
             port=user_input[CONF_PORT],
-            username=user_input[CONF_USERNAME],
-            password=user_input[CONF_PASSWORD],
+            username=user_input.get(CONF_USERNAME, ""),
+            password=user_input.get(CONF_PASSWORD, ""),
             ssl=user_input[CONF_SSL],
             verify_ssl=user_input[CONF_VERIFY_SSL],
+            token=user_input.get(CONF_ACCESS_TOKEN),
         )
-        return await client.get_server()
+        try:
+            server = await client.get_server()
+            if user_input.get(CONF_ACCESS_TOKEN):
+                # 服务器信息无需认证，令牌需通过一次登录校验
+                try:
+                    await client.get_devices()
+                finally:
+                    await client.async_logout()
+        finally:
+            await session.close()
+        return server
 
     async def async_step_user(
         self,
@@ -139,8 +306,15 @@ class TraccarServerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_PORT: user_input[CONF_PORT],
                 }
             )
+            if not user_input.get(CONF_ACCESS_TOKEN) and not (
+                user_input.get(CONF_USERNAME) and user_input.get(CONF_PASSWORD)
+            ):
+                errors["base"] = "missing_credentials"
+        if user_input is not None and not errors:
             try:
                 await self._get_server_info(user_input)
+            except TraccarAuthenticationException:
+                errors["base"] = "invalid_auth"
             except TraccarException as exception:
                 LOGGER.error("Unable to connect to ha_traccar: %s", exception)
                 errors["base"] = "cannot_connect"
@@ -14,10 +14,74 @@ ATTR_STATUS = "status"
 ATTR_TRACKER = "tracker"
 ATTR_TRACCAR_ID = "traccar_id"
 
+# 设备跟踪器可发布的内置属性，可在选项中选择
+TRACKER_ATTRIBUTES = [
+    ATTR_ADDRESS,
+    ATTR_ALTITUDE,
+    ATTR_CATEGORY,
+    ATTR_GEOFENCE,
+    ATTR_MOTION,
+    ATTR_SPEED,
+    ATTR_STATUS,
+    ATTR_TRACCAR_ID,
+    ATTR_TRACKER,
+]
+
+# 可单独通知实体的设备数据字段
+FIELD_ADDRESS = "address"
+FIELD_ALTITUDE = "altitude"
+FIELD_ATTRIBUTES = "attributes"
+FIELD_BATTERY = "battery"
+FIELD_COURSE = "course"
+FIELD_DISTANCE = "distance"
+FIELD_GEOFENCE = "geofence"
+FIELD_MOTION = "motion"
+FIELD_POSITION = "position"
+FIELD_SPEED = "speed"
+FIELD_STATUS = "status"
+FIELD_TEMPERATURE = "temperature"
+FIELDS = frozenset(
+    {
+        FIELD_ADDRESS,
+        FIELD_ALTITUDE,
+        FIELD_ATTRIBUTES,
+        FIELD_BATTERY,
+        FIELD_COURSE,
+        FIELD_DISTANCE,
+        FIELD_GEOFENCE,
+        FIELD_MOTION,
+        FIELD_POSITION,
+        FIELD_SPEED,
+        FIELD_STATUS,
+        FIELD_TEMPERATURE,
+    }
+)
+
 CONF_MAX_ACCURACY = "max_accuracy"
 CONF_CUSTOM_ATTRIBUTES = "custom_attributes"
 CONF_EVENTS = "events"
 CONF_SKIP_ACCURACY_FILTER_FOR = "skip_accuracy_filter_for"
+CONF_OFFLOAD_PROCESSING = "offload_processing"
+CONF_FILTER_GROUPS = "filter_groups"
+CONF_FILTER_CATEGORIES = "filter_categories"
+CONF_FILTER_GEOFENCES = "filter_geofences"
+CONF_GEOCODER_URL = "geocoder_url"
+CONF_GEOCODER_FIELD = "geocoder_field"
+CONF_GEOCODER_CELL_SIZE = "geocoder_cell_size"
+CONF_BACKFILL_EVENTS = "backfill_events"
+CONF_HISTORY_SIZE = "history_size"
+CONF_SMOOTHING = "smoothing"
+CONF_STANDBY_ENDPOINTS = "standby_endpoints"
+CONF_DATUM = "datum"
+CONF_GROUP_DATUMS = "group_datums"
+CONF_DUAL_TRACKER = "dual_tracker"
+CONF_ADAPTIVE_INTERVAL = "adaptive_interval"
+CONF_MOVING_INTERVAL = "moving_interval"
+CONF_IDLE_INTERVAL = "idle_interval"
+CONF_TRACKER_ATTRIBUTES = "tracker_attributes"
+
+DEFAULT_GEOCODER_FIELD = "display_name"
+DEFAULT_GEOCODER_CELL_SIZE = 50.0
 
 # 中文名称到英文ID的映射
 ENTITY_ID_MAP = {
@@ -36,6 +100,8 @@ ENTITY_ID_MAP = {
     "距离": "distance",
 }
 
+EVENT_POSITION_BACKFILL = f"{DOMAIN}_position_backfill"
+
 EVENTS = {
     "deviceMoving": "device_moving",
     "commandResult": "command_result",
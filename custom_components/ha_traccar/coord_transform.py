@@ -1,65 +1,228 @@
-"""Coordinate transformation utilities for ha_traccar."""
-import math
-
-# 地球半径
-EARTH_RADIUS = 6378245.0
-# 偏心率
-EE = 0.00669342162296594323
-
-
-def gcj02_to_wgs84(lng: float, lat: float) -> tuple[float, float]:
-    """
-    GCJ-02 坐标系 (火星坐标系) 转换为 WGS84 坐标系
-    
-    Args:
-        lng: GCJ-02 坐标系的经度
-        lat: GCJ-02 坐标系的纬度
-        
-    Returns:
-        tuple: WGS84 坐标系的经度和纬度
-    """
-    if out_of_china(lng, lat):
-        return lng, lat
-    
-    dlat = transform_lat(lng - 105.0, lat - 35.0)
-    dlng = transform_lng(lng - 105.0, lat - 35.0)
-    
-    radlat = lat / 180.0 * math.pi
-    magic = math.sin(radlat)
-    magic = 1 - EE * magic * magic
-    sqrtmagic = math.sqrt(magic)
-    
-    dlat = (dlat * 180.0) / ((EARTH_RADIUS * (1 - EE)) / (magic * sqrtmagic) * math.pi)
-    dlng = (dlng * 180.0) / (EARTH_RADIUS / sqrtmagic * math.cos(radlat) * math.pi)
-    
-    mglat = lat + dlat
-    mglng = lng + dlng
-    
-    return lng * 2 - mglng, lat * 2 - mglat
-
-
-def transform_lat(lng: float, lat: float) -> float:
-    """经纬度转换辅助函数"""
-    ret = -100.0 + 2.0 * lng + 3.0 * lat + 0.2 * lat * lat + 0.1 * lng * lat + 0.2 * math.sqrt(abs(lng))
-    ret += (20.0 * math.sin(6.0 * lng * math.pi) + 20.0 * math.sin(2.0 * lng * math.pi)) * 2.0 / 3.0
-    ret += (20.0 * math.sin(lat * math.pi) + 40.0 * math.sin(lat / 3.0 * math.pi)) * 2.0 / 3.0
-    ret += (160.0 * math.sin(lat / 12.0 * math.pi) + 320 * math.sin(lat * math.pi / 30.0)) * 2.0 / 3.0
-    return ret
-
-
-def transform_lng(lng: float, lat: float) -> float:
-    """经纬度转换辅助函数"""
-    ret = 300.0 + lng + 2.0 * lat + 0.1 * lng * lng + 0.1 * lng * lat + 0.1 * math.sqrt(abs(lng))
-    ret += (20.0 * math.sin(6.0 * lng * math.pi) + 20.0 * math.sin(2.0 * lng * math.pi)) * 2.0 / 3.0
-    ret += (20.0 * math.sin(lng * math.pi) + 40.0 * math.sin(lng / 3.0 * math.pi)) * 2.0 / 3.0
-    ret += (150.0 * math.sin(lng / 12.0 * math.pi) + 300.0 * math.sin(lng / 30.0 * math.pi)) * 2.0 / 3.0
-    return ret
-
-
-def out_of_china(lng: float, lat: float) -> bool:
-    """判断是否在中国境外"""
-    if lng < 72.004 or lng > 137.8347:
-        return True
-    if lat < 0.8293 or lat > 55.8271:
-        return True
-    return False 
\ No newline at end of file
+"""Coordinate transformation utilities for ha_traccar."""
+import math
+
+# 地球半径
+EARTH_RADIUS = 6378245.0
+# 偏心率
+EE = 0.00669342162296594323
+X_PI = math.pi * 3000.0 / 180.0
+
+DATUM_WGS84 = "wgs84"
+DATUM_GCJ02 = "gcj02"
+DATUM_BD09 = "bd09"
+DATUMS = [DATUM_WGS84, DATUM_GCJ02, DATUM_BD09]
+
+
+def to_wgs84(lng: float, lat: float, datum: str) -> tuple[float, float]:
+    """
+    将任意支持的坐标系转换为 WGS84 坐标系
+
+    WGS84 坐标和中国境外的坐标不做任何计算，直接返回。
+
+    Args:
+        lng: 经度
+        lat: 纬度
+        datum: 坐标所在的坐标系（wgs84、gcj02 或 bd09）
+
+    Returns:
+        tuple: WGS84 坐标系的经度和纬度
+    """
+    if datum == DATUM_WGS84 or out_of_china(lng, lat):
+        return lng, lat
+    if datum == DATUM_BD09:
+        lng, lat = bd09_to_gcj02(lng, lat)
+    return gcj02_to_wgs84(lng, lat)
+
+
+def bd09_to_gcj02(lng: float, lat: float) -> tuple[float, float]:
+    """
+    BD-09 坐标系 (百度坐标系) 转换为 GCJ-02 坐标系
+
+    Args:
+        lng: BD-09 坐标系的经度
+        lat: BD-09 坐标系的纬度
+
+    Returns:
+        tuple: GCJ-02 坐标系的经度和纬度
+    """
+    x = lng - 0.0065
+    y = lat - 0.006
+    z = math.sqrt(x * x + y * y) - 0.00002 * math.sin(y * X_PI)
+    theta = math.atan2(y, x) - 0.000003 * math.cos(x * X_PI)
+    return z * math.cos(theta), z * math.sin(theta)
+
+
+def gcj02_to_wgs84(lng: float, lat: float) -> tuple[float, float]:
+    """
+    GCJ-02 坐标系 (火星坐标系) 转换为 WGS84 坐标系
+    
+    Args:
+        lng: GCJ-02 坐标系的经度
+        lat: GCJ-02 坐标系的纬度
+        
+    Returns:
+        tuple: WGS84 坐标系的经度和纬度
+    """
+    if out_of_china(lng, lat):
+        return lng, lat
+    
+    dlat = transform_lat(lng - 105.0, lat - 35.0)
+    dlng = transform_lng(lng - 105.0, lat - 35.0)
+    
+    radlat = lat / 180.0 * math.pi
+    magic = math.sin(radlat)
+    magic = 1 - EE * magic * magic
+    sqrtmagic = math.sqrt(magic)
+    
+    dlat = (dlat * 180.0) / ((EARTH_RADIUS * (1 - EE)) / (magic * sqrtmagic) * math.pi)
+    dlng = (dlng * 180.0) / (EARTH_RADIUS / sqrtmagic * math.cos(radlat) * math.pi)
+    
+    mglat = lat + dlat
+    mglng = lng + dlng
+    
+    return lng * 2 - mglng, lat * 2 - mglat
+
+
+def transform_lat(lng: float, lat: float) -> float:
+    """经纬度转换辅助函数"""
+    ret = -100.0 + 2.0 * lng + 3.0 * lat + 0.2 * lat * lat + 0.1 * lng * lat + 0.2 * math.sqrt(abs(lng))
+    ret += (20.0 * math.sin(6.0 * lng * math.pi) + 20.0 * math.sin(2.0 * lng * math.pi)) * 2.0 / 3.0
+    ret += (20.0 * math.sin(lat * math.pi) + 40.0 * math.sin(lat / 3.0 * math.pi)) * 2.0 / 3.0
+    ret += (160.0 * math.sin(lat / 12.0 * math.pi) + 320 * math.sin(lat * math.pi / 30.0)) * 2.0 / 3.0
+    return ret
+
+
+def transform_lng(lng: float, lat: float) -> float:
+    """经纬度转换辅助函数"""
+    ret = 300.0 + lng + 2.0 * lat + 0.1 * lng * lng + 0.1 * lng * lat + 0.1 * math.sqrt(abs(lng))
+    ret += (20.0 * math.sin(6.0 * lng * math.pi) + 20.0 * math.sin(2.0 * lng * math.pi)) * 2.0 / 3.0
+    ret += (20.0 * math.sin(lng * math.pi) + 40.0 * math.sin(lng / 3.0 * math.pi)) * 2.0 / 3.0
+    ret += (150.0 * math.sin(lng / 12.0 * math.pi) + 300.0 * math.sin(lng / 30.0 * math.pi)) * 2.0 / 3.0
+    return ret
+
+
+# 简化的中国边界（经度, 纬度），包含海南、香港和澳门，不包含台湾。
+# 海岸线向海外略微外扩，陆地边界的误差约为 10-30 公里。
+CHINA_BOUNDARY = (
+    (134.75, 48.37), (134.0, 48.45), (132.6, 47.75), (130.95, 47.7),
+    (130.6, 48.9), (129.5, 49.4), (127.6, 50.25), (126.9, 51.3),
+    (125.6, 53.1), (123.5, 53.55), (122.3, 53.55), (121.0, 53.3),
+    (120.1, 52.6), (119.2, 50.3), (117.9, 49.55), (116.7, 49.85),
+    (115.5, 48.1), (116.2, 47.8), (117.5, 47.7), (118.6, 47.9),
+    (119.8, 47.1), (119.2, 46.5), (117.5, 46.5), (116.2, 45.8),
+    (114.6, 45.4), (113.6, 44.8), (111.9, 43.72), (110.5, 42.85),
+    (109.0, 42.45), (107.3, 42.4), (105.0, 41.6), (103.5, 41.9),
+    (100.8, 42.65), (96.4, 42.75), (95.4, 44.25), (93.5, 44.95),
+    (91.0, 45.3), (90.8, 46.5), (90.3, 47.6), (88.6, 48.3),
+    (87.8, 49.15), (87.3, 49.17), (86.6, 48.5), (85.7, 47.2),
+    (83.1, 47.2), (82.3, 45.5), (80.0, 44.9), (80.8, 43.1),
+    (80.3, 42.2), (79.5, 42.0), (78.0, 41.3), (76.8, 40.9),
+    (75.6, 40.6), (74.8, 40.5), (73.7, 39.5), (73.5, 38.8),
+    (74.8, 38.4), (74.9, 37.3), (75.5, 36.8), (77.0, 35.9),
+    (78.0, 35.5), (78.5, 34.0), (79.0, 33.1), (78.8, 32.3),
+    (78.5, 31.9), (79.0, 31.3), (79.9, 30.9), (81.2, 30.05),
+    (82.2, 30.2), (83.5, 29.3), (85.0, 28.6), (86.0, 28.0),
+    (88.0, 27.9), (88.8, 28.1), (88.9, 27.3), (89.6, 28.2),
+    (90.5, 28.1), (91.6, 27.9), (92.0, 27.5), (93.0, 27.9),
+    (94.3, 28.9), (95.4, 29.1), (96.2, 29.4), (97.1, 28.3),
+    (98.2, 27.9), (98.7, 27.5), (98.7, 25.9), (97.6, 24.8),
+    (97.5, 23.9), (98.6, 24.1), (98.9, 23.2), (99.5, 22.9),
+    (99.2, 22.1), (100.1, 21.5), (101.1, 21.75), (101.2, 21.2),
+    (101.8, 21.1), (101.6, 22.2), (102.4, 22.4), (103.0, 22.5),
+    (103.9, 22.45), (105.3, 23.3), (106.2, 22.9), (106.7, 22.7),
+    (106.55, 22.2), (107.4, 21.75), (108.0, 21.5), (108.5, 20.0),
+    (108.4, 18.9), (109.3, 17.9), (110.3, 18.0), (111.3, 19.3),
+    (111.2, 20.4), (111.0, 21.3), (112.5, 21.5), (113.6, 21.8),
+    (114.4, 22.1), (115.5, 22.5), (116.7, 22.8), (117.8, 23.5),
+    (118.9, 24.6), (119.8, 25.4), (120.1, 26.3), (120.8, 27.0),
+    (121.5, 28.0), (122.3, 29.0), (122.9, 30.5), (122.2, 31.8),
+    (121.3, 32.6), (120.8, 33.5), (119.8, 34.6), (120.6, 35.8),
+    (122.0, 36.6), (122.8, 37.3), (122.3, 37.8), (121.1, 38.6),
+    (122.5, 39.0), (123.8, 39.5), (124.3, 39.85), (125.0, 40.45),
+    (126.0, 41.0), (126.6, 41.6), (127.3, 41.5), (128.2, 41.4),
+    (128.1, 42.0), (129.0, 42.1), (129.7, 42.45), (130.2, 42.7),
+    (130.6, 42.45), (131.1, 42.9), (131.2, 43.5), (131.3, 44.1),
+    (131.0, 44.9), (131.8, 45.3), (133.1, 45.1), (133.5, 45.8),
+    (134.0, 46.6), (134.2, 47.3),
+)
+# 预计算网格的单元大小（度）
+GRID_CELL_SIZE = 0.5
+
+_OUTSIDE = 0
+_INSIDE = 1
+_BOUNDARY = 2
+
+
+def _build_grid() -> tuple[tuple[float, float, int, int], bytearray]:
+    """
+    预计算覆盖中国边界外接矩形的网格
+
+    与边界相交的单元（按每条边的外接矩形保守标记）标记为边界，其余单元
+    整体位于边界一侧，按扫描线与边界的交点判断其中心点是否在境内。
+
+    Returns:
+        tuple: (最小经度, 最小纬度, 列数, 行数) 与按行存储的单元状态
+    """
+    min_lng = math.floor(min(lng for lng, _ in CHINA_BOUNDARY))
+    min_lat = math.floor(min(lat for _, lat in CHINA_BOUNDARY))
+    max_lng = max(lng for lng, _ in CHINA_BOUNDARY)
+    max_lat = max(lat for _, lat in CHINA_BOUNDARY)
+    cols = math.ceil((max_lng - min_lng) / GRID_CELL_SIZE)
+    rows = math.ceil((max_lat - min_lat) / GRID_CELL_SIZE)
+    grid = bytearray(cols * rows)
+
+    for (x1, y1), (x2, y2) in _EDGES:
+        for row in range(
+            int((min(y1, y2) - min_lat) / GRID_CELL_SIZE),
+            min(int((max(y1, y2) - min_lat) / GRID_CELL_SIZE), rows - 1) + 1,
+        ):
+            for col in range(
+                int((min(x1, x2) - min_lng) / GRID_CELL_SIZE),
+                min(int((max(x1, x2) - min_lng) / GRID_CELL_SIZE), cols - 1) + 1,
+            ):
+                grid[row * cols + col] = _BOUNDARY
+
+    for row in range(rows):
+        y = min_lat + (row + 0.5) * GRID_CELL_SIZE
+        crossings = sorted(
+            x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+            for (x1, y1), (x2, y2) in _EDGES
+            if (y1 > y) != (y2 > y)
+        )
+        for start, end in zip(crossings[::2], crossings[1::2]):
+            first = max(math.ceil((start - min_lng) / GRID_CELL_SIZE - 0.5), 0)
+            last = min(math.floor((end - min_lng) / GRID_CELL_SIZE - 0.5), cols - 1)
+            for index in range(row * cols + first, row * cols + last + 1):
+                if grid[index] == _OUTSIDE:
+                    grid[index] = _INSIDE
+    return (min_lng, min_lat, cols, rows), grid
+
+
+def _in_boundary(lng: float, lat: float) -> bool:
+    """射线法判断点是否在中国边界多边形内"""
+    inside = False
+    for (x1, y1), (x2, y2) in _EDGES:
+        if (y1 > lat) != (y2 > lat) and lng < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+_EDGES = tuple(zip(CHINA_BOUNDARY, CHINA_BOUNDARY[1:] + CHINA_BOUNDARY[:1]))
+(_MIN_LNG, _MIN_LAT, _COLS, _ROWS), _GRID = _build_grid()
+
+
+def out_of_china(lng: float, lat: float) -> bool:
+    """
+    判断是否在中国境外
+
+    绝大多数坐标只需一次网格查找，只有落在边界单元内的坐标才需要
+    对简化边界做点在多边形内的判断。
+    """
+    col = int((lng - _MIN_LNG) / GRID_CELL_SIZE)
+    row = int((lat - _MIN_LAT) / GRID_CELL_SIZE)
+    if lng < _MIN_LNG or lat < _MIN_LAT or col >= _COLS or row >= _ROWS:
+        return True
+    cell = _GRID[row * _COLS + col]
+    if cell != _BOUNDARY:
+        return cell == _OUTSIDE
+    return not _in_boundary(lng, lat)
@@ -2,11 +2,11 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime
+from collections.abc import Mapping
+from datetime import datetime, timedelta
 from typing import TYPE_CHECKING, Any, TypedDict
 
 from pytraccar import (
-    ApiClient,
     DeviceModel,
     GeofenceModel,
     PositionModel,
@@ -15,13 +15,81 @@ from pytraccar import (
 )
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import Platform
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, EVENTS, LOGGER
-from .helpers import get_device, get_first_geofence
+from .api import TraccarServerApiClient
+from .commands import CommandTracker
+from .const import (
+    CONF_ADAPTIVE_INTERVAL,
+    CONF_BACKFILL_EVENTS,
+    CONF_CUSTOM_ATTRIBUTES,
+    CONF_DATUM,
+    CONF_DUAL_TRACKER,
+    CONF_EVENTS,
+    CONF_FILTER_CATEGORIES,
+    CONF_FILTER_GEOFENCES,
+    CONF_FILTER_GROUPS,
+    CONF_GEOCODER_CELL_SIZE,
+    CONF_GEOCODER_FIELD,
+    CONF_GEOCODER_URL,
+    CONF_GROUP_DATUMS,
+    CONF_HISTORY_SIZE,
+    CONF_IDLE_INTERVAL,
+    CONF_MAX_ACCURACY,
+    CONF_MOVING_INTERVAL,
+    CONF_OFFLOAD_PROCESSING,
+    CONF_SKIP_ACCURACY_FILTER_FOR,
+    CONF_SMOOTHING,
+    CONF_STANDBY_ENDPOINTS,
+    CONF_TRACKER_ATTRIBUTES,
+    DEFAULT_GEOCODER_CELL_SIZE,
+    DEFAULT_GEOCODER_FIELD,
+    DOMAIN,
+    EVENT_POSITION_BACKFILL,
+    FIELD_ADDRESS,
+    FIELD_GEOFENCE,
+    LOGGER,
+    TRACKER_ATTRIBUTES,
+)
+from .coord_transform import DATUM_GCJ02, DATUMS
+from .events import EventPipeline
+from .frame_queue import FrameQueue
+from .geocoder import ReverseGeocoder
+from .helpers import (
+    filter_devices,
+    get_first_geofence,
+    position_key,
+    resolve_geofence_ids,
+)
+from .history import TrackHistory
+from .interval import (
+    DEFAULT_IDLE_INTERVAL,
+    DEFAULT_MOVING_INTERVAL,
+    IntervalController,
+)
+from .processing import (
+    build_coordinator_data,
+    changed_fields,
+    compute_subscription_updates,
+    extract_custom_attributes,
+)
+from .smoothing import SMOOTHING_NONE, PositionSmoother, create_smoother
+from .snapshot import SNAPSHOT_FIELDS, FleetSnapshot
+
+EVENT_IMPORT_INTERVAL = timedelta(seconds=30)
+GEOFENCE_SYNC_COOLDOWN = 60
+GEOFENCE_SYNC_INTERVAL = timedelta(minutes=15)
+# 少于该数量设备的帧直接在事件循环中处理，线程切换的开销更大
+OFFLOAD_MIN_DEVICES = 50
+# 定位时间超前当前时间超过该值的位置不会推进水位线，避免时钟错误的设备挡住后续位置
+FUTURE_FIX_TOLERANCE = timedelta(minutes=5)
 
 
 class TraccarServerCoordinatorDataDevice(TypedDict):
@@ -31,6 +99,9 @@ class TraccarServerCoordinatorDataDevice(TypedDict):
     geofence: GeofenceModel | None
     position: PositionModel
     attributes: dict[str, Any]
+    datum: str
+    wgs84: tuple[float, float]
+    derived: dict[str, Any]
 
 
 TraccarServerCoordinatorData = dict[int, TraccarServerCoordinatorDataDevice]
@@ -44,12 +115,8 @@ class TraccarServerCoordinator(DataUpdateCoordinator[TraccarServerCoordinatorDat
     def __init__(
         self,
         hass: HomeAssistant,
-        client: ApiClient,
-        *,
-        events: list[str],
-        max_accuracy: float,
-        skip_accuracy_filter_for: list[str],
-        custom_attributes: list[str],
+        client: TraccarServerApiClient,
+        options: Mapping[str, Any],
     ) -> None:
         """Initialize global ha_traccar data updater."""
         super().__init__(
@@ -59,28 +126,235 @@ class TraccarServerCoordinator(DataUpdateCoordinator[TraccarServerCoordinatorDat
             update_interval=None,
         )
         self.client = client
-        self.custom_attributes = custom_attributes
-        self.events = events
-        self.max_accuracy = max_accuracy
-        self.skip_accuracy_filter_for = skip_accuracy_filter_for
+        self.geocoder: ReverseGeocoder | None = None
+        self._excluded_devices: set[int] = set()
+        self._geofence_excluded: set[int] = set()
+        self._filter_geofence_ids: set[int] = set()
+        # 服务器上的全部设备（ID 到 uniqueId），包括被筛选排除的设备
+        self.server_devices: dict[int, str] = {}
         self._geofences: list[GeofenceModel] = []
+        self._geofence_hashes: dict[int, int] = {}
+        self._geofence_debouncer = Debouncer(
+            hass,
+            LOGGER,
+            cooldown=GEOFENCE_SYNC_COOLDOWN,
+            immediate=True,
+            function=self.async_sync_geofences,
+        )
+        self.geofence_version = 0
+        self.event_pipeline = EventPipeline(hass)
+        self.commands = CommandTracker()
+        self.interval_controller = IntervalController(hass, self)
         self._last_event_import: datetime | None = None
+        self._unsub_event_import: CALLBACK_TYPE | None = None
+        self._watermarks: dict[int, tuple[datetime, int]] = {}
+        self.history: dict[int, TrackHistory] = {}
+        # 每个设备最近一次通知给实体的逆地理编码地址
+        self._addresses: dict[int, str | None] = {}
+        self.history_size = 0
+        self.smoothers: dict[int, PositionSmoother] = {}
+        self.smoothing = SMOOTHING_NONE
+        self.rejected_positions = {"duplicate": 0, "stale": 0}
+        self.future_positions = 0
+        self.subscription_counters = {
+            "unchanged": 0,
+            "unknown": 0,
+            "full": 0,
+            "partial": 0,
+        }
+        self._signal_sequence = 0
+        self.frame_queue = FrameQueue()
+        self.snapshot = FleetSnapshot()
         self._should_log_subscription_error: bool = True
+        self._apply_options(options)
+        self._geocoder_config = self._get_geocoder_config(options)
+        self.geocoder = self._create_geocoder()
+
+    def _apply_options(self, options: Mapping[str, Any]) -> None:
+        """Store the options and compile the processing configuration."""
+        self.backfill_events = options.get(CONF_BACKFILL_EVENTS, False)
+        # 被合并掉的旧位置仍需作为回填事件发送
+        self.frame_queue.keep_replaced = self.backfill_events
+        self.custom_attributes = options.get(CONF_CUSTOM_ATTRIBUTES, [])
+        self.events = options.get(CONF_EVENTS, [])
+        self.filter_categories = set(options.get(CONF_FILTER_CATEGORIES, []))
+        self.filter_geofences = options.get(CONF_FILTER_GEOFENCES, [])
+        if (history_size := int(options.get(CONF_HISTORY_SIZE, 0))) != (
+            self.history_size
+        ):
+            self.history_size = history_size
+            self.history = {}
+        if (smoothing := options.get(CONF_SMOOTHING, SMOOTHING_NONE)) != (
+            self.smoothing
+        ):
+            self.smoothing = smoothing
+            self.smoothers = {}
+        self.filter_groups: set[int] = set()
+        for group in options.get(CONF_FILTER_GROUPS, []):
+            if str(group).strip().isdigit():
+                self.filter_groups.add(int(group))
+            else:
+                LOGGER.warning("Ignoring group filter %s, not a group ID", group)
+        self.max_accuracy = options.get(CONF_MAX_ACCURACY, 0.0)
+        self.offload_processing = options.get(CONF_OFFLOAD_PROCESSING, False)
+        self.skip_accuracy_filter_for = options.get(CONF_SKIP_ACCURACY_FILTER_FOR, [])
+        self.client.set_standby(options.get(CONF_STANDBY_ENDPOINTS, []))
+        self._processing_options = {
+            "custom_attributes": list(self.custom_attributes),
+            "max_accuracy": self.max_accuracy,
+            "skip_accuracy_filter_for": list(self.skip_accuracy_filter_for),
+        }
+        self.dual_tracker = options.get(CONF_DUAL_TRACKER, True)
+        self.tracker_attributes = set(
+            options.get(CONF_TRACKER_ATTRIBUTES, TRACKER_ATTRIBUTES)
+        )
+        self.interval_controller.configure(
+            options.get(CONF_ADAPTIVE_INTERVAL, False),
+            int(options.get(CONF_MOVING_INTERVAL, DEFAULT_MOVING_INTERVAL)),
+            int(options.get(CONF_IDLE_INTERVAL, DEFAULT_IDLE_INTERVAL)),
+        )
+        group_datums: dict[int, str] = {}
+        for value in options.get(CONF_GROUP_DATUMS, []):
+            group, _, datum = value.partition("=")
+            if group.strip().isdigit() and datum.strip() in DATUMS:
+                group_datums[int(group)] = datum.strip()
+        self._datum_options = {
+            "default": options.get(CONF_DATUM, DATUM_GCJ02),
+            "groups": group_datums,
+        }
+
+    @staticmethod
+    def _get_geocoder_config(
+        options: Mapping[str, Any],
+    ) -> tuple[str | None, str, float]:
+        """Return the reverse geocoding options."""
+        return (
+            options.get(CONF_GEOCODER_URL),
+            options.get(CONF_GEOCODER_FIELD, DEFAULT_GEOCODER_FIELD),
+            options.get(CONF_GEOCODER_CELL_SIZE, DEFAULT_GEOCODER_CELL_SIZE),
+        )
+
+    def _create_geocoder(self) -> ReverseGeocoder | None:
+        """Create the reverse geocoder if one is configured."""
+        url, field, cell_size = self._geocoder_config
+        if not url:
+            return None
+        return ReverseGeocoder(
+            self.hass,
+            url=url,
+            field=field,
+            cell_size=cell_size,
+            on_resolved=self._async_signal_address,
+        )
+
+    async def async_apply_options(self, options: Mapping[str, Any]) -> None:
+        """Apply changed options without reconnecting or recreating entities."""
+        filters = (self.filter_groups, self.filter_categories, self.filter_geofences)
+        layout = (self.dual_tracker, self._datum_options)
+        self._apply_options(options)
+
+        if layout != (self.dual_tracker, self._datum_options):
+            if not self.dual_tracker:
+                self._async_remove_wgs84_trackers()
+            # 设备跟踪器的数量取决于坐标系和双跟踪器设置，需要重新加载
+            self.hass.config_entries.async_schedule_reload(self.config_entry.entry_id)
+            return
+
+        if (geocoder_config := self._get_geocoder_config(options)) != (
+            self._geocoder_config
+        ):
+            self._geocoder_config = geocoder_config
+            if (geocoder := self._create_geocoder()) is not None:
+                await geocoder.async_load()
+            self.geocoder = geocoder
+
+        self.async_update_event_import()
+
+        if filters != (
+            self.filter_groups,
+            self.filter_categories,
+            self.filter_geofences,
+        ):
+            # 设备集合已变化，刷新后会自动添加或移除实体
+            await self.async_refresh()
+            return
+
+        for device_id, entry in self.data.items():
+            attr = extract_custom_attributes(
+                entry["device"], entry["position"], **self._processing_options
+            )
+            if attr is not None:
+                entry["attributes"] = attr
+            self._async_request_address(device_id, entry)
+        self.async_update_listeners()
+
+    @callback
+    def _async_remove_wgs84_trackers(self) -> None:
+        """Remove the separate WGS84 trackers from the entity registry."""
+        entity_registry = er.async_get(self.hass)
+        for entity_entry in er.async_entries_for_config_entry(
+            entity_registry, self.config_entry.entry_id
+        ):
+            if entity_entry.domain == Platform.DEVICE_TRACKER and (
+                entity_entry.unique_id.endswith("_wgs84")
+            ):
+                entity_registry.async_remove(entity_entry.entity_id)
+
+    @callback
+    def async_update_event_import(self) -> None:
+        """Start or stop importing events to match the options."""
+        if self.events and self._unsub_event_import is None:
+            self._unsub_event_import = async_track_time_interval(
+                self.hass,
+                self.import_events,
+                EVENT_IMPORT_INTERVAL,
+                cancel_on_shutdown=True,
+                name="ha_traccar_import_events",
+            )
+        elif not self.events:
+            self.async_stop_event_import()
+
+    async def async_shutdown(self) -> None:
+        """Cancel timers and pending work."""
+        await super().async_shutdown()
+        self.async_stop_event_import()
+        self.event_pipeline.async_shutdown()
+        self._geofence_debouncer.async_shutdown()
+
+    @callback
+    def async_stop_event_import(self) -> None:
+        """Stop importing events."""
+        if self._unsub_event_import is not None:
+            self._unsub_event_import()
+            self._unsub_event_import = None
 
     async def _async_update_data(self) -> TraccarServerCoordinatorData:
         """Fetch data from ha_traccar."""
         LOGGER.debug("Updating device data")
-        data: TraccarServerCoordinatorData = {}
         try:
-            (
-                devices,
-                positions,
-                geofences,
-            ) = await asyncio.gather(
-                self.client.get_devices(),
-                self.client.get_positions(),
-                self.client.get_geofences(),
-            )
+            if self.filter_groups or self.filter_categories:
+                all_devices, geofences = await asyncio.gather(
+                    self.client.get_devices(),
+                    self._async_get_geofences(),
+                )
+                # 只请求所选设备的位置，而不是整个服务器的位置
+                devices = filter_devices(
+                    all_devices, self.filter_groups, self.filter_categories
+                )
+                positions = await self.client.get_positions(
+                    [device["positionId"] for device in devices if device["positionId"]]
+                )
+            else:
+                (
+                    devices,
+                    positions,
+                    geofences,
+                ) = await asyncio.gather(
+                    self.client.get_devices(),
+                    self.client.get_positions(),
+                    self._async_get_geofences(),
+                )
+                all_devices = devices
         except TraccarException as ex:
             raise UpdateFailed(f"Error while updating device data: {ex}") from ex
 
@@ -89,77 +363,211 @@ class TraccarServerCoordinator(DataUpdateCoordinator[TraccarServerCoordinatorDat
             assert isinstance(positions, list[PositionModel])  # type: ignore[misc]
             assert isinstance(geofences, list[GeofenceModel])  # type: ignore[misc]
 
-        self._geofences = geofences
+        self.server_devices = {
+            device["id"]: device["uniqueId"] for device in all_devices
+        }
+        self._excluded_devices = self.server_devices.keys() - {
+            device["id"] for device in devices
+        }
+
+        self._geofence_excluded = set()
+        if self.filter_geofences:
+            self._filter_geofence_ids = resolve_geofence_ids(
+                geofences, self.filter_geofences
+            )
+            self._geofence_excluded = {
+                position["deviceId"]
+                for position in positions
+                if self._filter_geofence_ids.isdisjoint(position["geofenceIds"] or [])
+            }
+            self._excluded_devices.update(self._geofence_excluded)
+            positions = [
+                position
+                for position in positions
+                if position["deviceId"] not in self._excluded_devices
+            ]
+
+        # 传入当前的位置和派生值，刷新后继续计算转向速率等
+        previous = {
+            device_id: (entry["position"], entry["derived"])
+            for device_id, entry in (self.data or {}).items()
+        }
+        if self.offload_processing:
+            data = await self.hass.async_add_executor_job(
+                build_coordinator_data,
+                devices,
+                positions,
+                geofences,
+                self._processing_options,
+                self._datum_options,
+                previous,
+            )
+        else:
+            data = build_coordinator_data(
+                devices,
+                positions,
+                geofences,
+                self._processing_options,
+                self._datum_options,
+                previous,
+            )
 
-        for position in positions:
-            if (device := get_device(position["deviceId"], devices)) is None:
+        for device_id, entry in data.items():
+            key = position_key(entry["position"])
+            if (watermark := self._watermarks.get(device_id)) is not None and (
+                watermark > key
+            ):
+                # WebSocket 在刷新期间已送达更新的位置，保留它
+                if self.data and (current := self.data.get(device_id)) is not None:
+                    data[device_id] = {**current, "device": entry["device"]}
                 continue
+            if not _is_future(key):
+                self._watermarks[device_id] = key
+            if watermark != key:
+                self._async_track_position(device_id, entry)
+            self._async_request_address(device_id, entry)
+        for device_id in self.history.keys() - data.keys():
+            del self.history[device_id]
+        for device_id in self.smoothers.keys() - data.keys():
+            del self.smoothers[device_id]
+        for device_id in self._addresses.keys() - data.keys():
+            del self._addresses[device_id]
+        self.snapshot.sync(data)
+        return data
 
-            if (
-                attr
-                := self._return_custom_attributes_if_not_filtered_by_accuracy_configuration(
-                    device, position
-                )
-            ) is None:
-                continue
+    async def _async_get_geofences(self) -> list[GeofenceModel]:
+        """Return the geofences, fetching them only before the first sync."""
+        if self.geofence_version == 0:
+            self._set_geofences(await self.client.get_geofences())
+        return self._geofences
+
+    def _set_geofences(self, geofences: list[GeofenceModel]) -> set[int]:
+        """Store the geofences and return the IDs of those that changed."""
+        hashes = {
+            geofence["id"]: hash((geofence["name"], geofence["area"]))
+            for geofence in geofences
+        }
+        changed = {
+            geofence_id
+            for geofence_id in hashes.keys() | self._geofence_hashes.keys()
+            if hashes.get(geofence_id) != self._geofence_hashes.get(geofence_id)
+        }
+        self._geofences = geofences
+        self._geofence_hashes = hashes
+        if changed or self.geofence_version == 0:
+            self.geofence_version += 1
+        return changed
 
-            data[device["id"]] = {
-                "device": device,
-                "geofence": get_first_geofence(
-                    geofences,
-                    position["geofenceIds"] or [],
-                ),
-                "position": position,
-                "attributes": attr,
-            }
+    async def async_sync_geofences(self, _: datetime | None = None) -> None:
+        """Fetch the geofences and re-resolve the positions affected by edits."""
+        try:
+            geofences = await self.client.get_geofences()
+        except TraccarException as ex:
+            LOGGER.debug("Error while syncing geofences: %s", ex)
+            return
 
-        return data
+        if not (changed := self._set_geofences(geofences)) or not self.data:
+            return
+
+        LOGGER.debug("Geofences %s changed", changed)
+        if self.filter_geofences:
+            # 设备筛选依赖地理围栏，需要完整刷新
+            await self.async_request_refresh()
+            return
+        for device_id, entry in self.data.items():
+            geofence_ids = entry["position"]["geofenceIds"] or []
+            if changed.isdisjoint(geofence_ids) and (
+                entry["geofence"] is None or entry["geofence"]["id"] not in changed
+            ):
+                continue
+            entry["geofence"] = get_first_geofence(self._geofences, geofence_ids)
+            self._async_signal_device(device_id, {FIELD_GEOFENCE})
 
     async def handle_subscription_data(self, data: SubscriptionData) -> None:
         """Handle subscription data."""
         self.logger.debug("Received subscription data: %s", data)
         self._should_log_subscription_error = True
-        update_devices = set()
-        for device in data.get("devices") or []:
-            device_id = device["id"]
-            if device_id not in self.data:
-                continue
-
-            if (
-                attr
-                := self._return_custom_attributes_if_not_filtered_by_accuracy_configuration(
-                    device, self.data[device_id]["position"]
-                )
-            ) is None:
-                continue
-
-            self.data[device_id]["device"] = device
-            self.data[device_id]["attributes"] = attr
-            update_devices.add(device_id)
-
-        for position in data.get("positions") or []:
-            device_id = position["deviceId"]
-            if device_id not in self.data:
-                continue
-
-            if (
-                attr
-                := self._return_custom_attributes_if_not_filtered_by_accuracy_configuration(
-                    self.data[device_id]["device"], position
-                )
-            ) is None:
-                continue
+        if data.get("events"):
+            self.commands.async_process_events(data["events"])
+        if new_devices := self._find_new_devices(data):
+            LOGGER.debug("Found new devices %s, refreshing", new_devices)
+            self.hass.async_create_task(self.async_request_refresh())
+        elif self._geofence_filter_changed(data):
+            LOGGER.debug("Devices entered or left the filtered geofences, refreshing")
+            self.hass.async_create_task(self.async_request_refresh())
+        data = self._prefilter(data)
+        if data["positions"] and any(
+            geofence_id not in self._geofence_hashes
+            for position in data["positions"]
+            for geofence_id in position["geofenceIds"] or []
+        ):
+            # 位置引用了未知的地理围栏，说明服务器上新增了围栏
+            self.hass.async_create_task(self._geofence_debouncer.async_call())
+        current = {
+            device_id: (entry["device"], entry["position"])
+            for device_id in {
+                *(device["id"] for device in data["devices"]),
+                *(position["deviceId"] for position in data["positions"]),
+            }
+            if (entry := self.data.get(device_id)) is not None
+        }
+        if not current:
+            return
 
-            self.data[device_id]["position"] = position
-            self.data[device_id]["attributes"] = attr
-            self.data[device_id]["geofence"] = get_first_geofence(
+        if self.offload_processing and len(current) >= OFFLOAD_MIN_DEVICES:
+            updates = await self.hass.async_add_executor_job(
+                compute_subscription_updates,
+                data,
+                current,
                 self._geofences,
-                position["geofenceIds"] or [],
+                self._processing_options,
+                self._datum_options,
+            )
+        else:
+            updates = compute_subscription_updates(
+                data,
+                current,
+                self._geofences,
+                self._processing_options,
+                self._datum_options,
             )
-            update_devices.add(device_id)
 
-        for device_id in update_devices:
-            async_dispatcher_send(self.hass, f"{DOMAIN}_{device_id}")
+        for device_id, changes in updates.items():
+            # 刷新可能在处理期间替换了数据
+            if (entry := self.data.get(device_id)) is None:
+                continue
+            fields = changed_fields(entry, changes)  # type: ignore[arg-type]
+            entry.update(changes)  # type: ignore[typeddict-item]
+            if "position" in changes:
+                self._async_track_position(device_id, entry)
+                if self._async_request_address(device_id, entry) and fields is not None:
+                    fields.add(FIELD_ADDRESS)
+            self._async_signal_device(device_id, fields)
+
+    @callback
+    def _prefilter(self, data: SubscriptionData) -> SubscriptionData:
+        """Drop what a frame carries for unknown devices, before any work.
+
+        Device updates identical to the known device are dropped as well, and
+        positions must pass the duplicate and stale checks.
+        """
+        known = self.data
+        counters = self.subscription_counters
+        devices = []
+        for device in data.get("devices") or []:
+            if (entry := known.get(device["id"])) is None:
+                counters["unknown"] += 1
+            elif device == entry["device"]:
+                counters["unchanged"] += 1
+            else:
+                devices.append(device)
+        positions = []
+        for position in data.get("positions") or []:
+            if position["deviceId"] not in known:
+                counters["unknown"] += 1
+            elif self._async_accept_position(position):
+                positions.append(position)
+        return {**data, "devices": devices, "positions": positions}
 
     async def import_events(self, _: datetime) -> None:
         """Import events from Traccar."""
@@ -179,61 +587,238 @@ class TraccarServerCoordinator(DataUpdateCoordinator[TraccarServerCoordinatorDat
             return
 
         self._last_event_import = start_time
-        for event in events:
-            device = self.data[event["deviceId"]]["device"]
-            self.hass.bus.async_fire(
-                # This goes against two of the HA core guidelines:
-                # 1. Event names should be prefixed with the domain name of
-                #    the integration
-                # 2. This should be event entities
-                #
-                # However, to not break it for those who currently use
-                # the "old" integration, this is kept as is.
-                f"traccar_{EVENTS[event['type']]}",
-                {
-                    "device_traccar_id": event["deviceId"],
-                    "device_name": device["name"] if device else None,
-                    "type": event["type"],
-                    "serverTime": event["eventTime"],
-                    "attributes": event["attributes"],
-                },
-            )
+        self.commands.async_process_events(events)
+        self.event_pipeline.async_process(
+            events,
+            {
+                device_id: entry["device"]["name"]
+                for device_id, entry in self.data.items()
+            },
+        )
 
     async def subscribe(self) -> None:
-        """Subscribe to events."""
+        """Subscribe to events and process the received frames."""
+        processor = asyncio.create_task(self._async_process_frames())
         try:
-            await self.client.subscribe(self.handle_subscription_data)
+            await self._async_subscribe()
+        finally:
+            processor.cancel()
+
+    async def _async_subscribe(self) -> None:
+        """Read the websocket into the frame queue, reconnecting on errors."""
+        try:
+            await self.client.subscribe(self.frame_queue.put)
         except TraccarException as ex:
             if self._should_log_subscription_error:
                 self._should_log_subscription_error = False
                 LOGGER.error("Error while subscribing to Traccar: %s", ex)
             # Retry after 10 seconds
             await asyncio.sleep(10)
-            await self.subscribe()
+            await self._async_subscribe()
+
+    async def _async_process_frames(self) -> None:
+        """Process the merged frames from the queue until cancelled."""
+        while True:
+            data = await self.frame_queue.get()
+            for position in self.frame_queue.pop_replaced():
+                if position["deviceId"] in self.data:
+                    self._async_accept_position(position)
+            try:
+                await self.handle_subscription_data(data)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Error while processing subscription data")
+
+    def _geofence_filter_changed(self, data: SubscriptionData) -> bool:
+        """Return whether a frame moves a device into or out of the filter."""
+        if not self.filter_geofences:
+            return False
+        for position in data.get("positions") or []:
+            inside = not self._filter_geofence_ids.isdisjoint(
+                position["geofenceIds"] or []
+            )
+            device_id = position["deviceId"]
+            if (device_id in self.data and not inside) or (
+                device_id in self._geofence_excluded and inside
+            ):
+                return True
+        return False
+
+    def _find_new_devices(self, data: SubscriptionData) -> set[int]:
+        """Return devices in a frame that were not known at the last refresh.
+
+        Devices excluded by the filters are not new, and neither are known
+        devices that only send status updates until they report a position.
+        """
+        new_devices = {
+            position["deviceId"] for position in data.get("positions") or []
+        }
+        new_devices.update(
+            device["id"]
+            for device in data.get("devices") or []
+            if device["id"] not in self.server_devices
+        )
+        new_devices.difference_update(self.data, self._excluded_devices)
+        return new_devices
+
+    @callback
+    def _async_accept_position(self, position: PositionModel) -> bool:
+        """Return True if a position is newer than the last one of its device.
+
+        Duplicates are dropped. Older fixes, such as history a device uploads
+        after losing coverage, are passed to the backfill event instead of
+        replacing the live position. A fix time too far in the future is
+        accepted without moving the watermark, so a wrong device clock does
+        not hide the positions that follow it.
+        """
+        device_id = position["deviceId"]
+        key = position_key(position)
+        watermark = self._watermarks.get(device_id)
+        if watermark is None or key > watermark:
+            if _is_future(key):
+                self.future_positions += 1
+            else:
+                self._watermarks[device_id] = key
+            return True
+
+        if key[1] == watermark[1]:
+            self.rejected_positions["duplicate"] += 1
+            return False
+
+        self.rejected_positions["stale"] += 1
+        if self.backfill_events:
+            device = self.data[device_id]["device"]
+            self.hass.bus.async_fire(
+                EVENT_POSITION_BACKFILL,
+                {
+                    "device_traccar_id": device_id,
+                    "device_name": device["name"],
+                    "position": position,
+                },
+            )
+        return False
 
-    def _return_custom_attributes_if_not_filtered_by_accuracy_configuration(
+    @callback
+    def _async_track_position(
         self,
-        device: DeviceModel,
-        position: PositionModel,
-    ) -> dict[str, Any] | None:
-        """Return a dictionary of custom attributes if not filtered by accuracy configuration."""
-        attr = {}
-        # 始终跳过精度过滤
-        skip_accuracy_filter = True
-
-        for custom_attr in self.custom_attributes:
-            if custom_attr in self.skip_accuracy_filter_for:
-                skip_accuracy_filter = True
-            attr[custom_attr] = device["attributes"].get(
-                custom_attr,
-                position["attributes"].get(custom_attr, None),
+        device_id: int,
+        entry: TraccarServerCoordinatorDataDevice,
+    ) -> None:
+        """Add an accepted position to the track history and the smoother."""
+        if not self.history_size and self.smoothing == SMOOTHING_NONE:
+            return
+        position = entry["position"]
+        timestamp = position_key(position)[0].timestamp()
+        if self.history_size:
+            if (history := self.history.get(device_id)) is None:
+                history = self.history[device_id] = TrackHistory(self.history_size)
+            history.append(
+                timestamp,
+                position["latitude"],
+                position["longitude"],
+                entry["derived"]["speed"],
+                position["course"],
             )
+        if (smoother := self.smoothers.get(device_id)) is None:
+            if (smoother := create_smoother(self.smoothing)) is None:
+                return
+            self.smoothers[device_id] = smoother
+        smoother.update(
+            timestamp,
+            position["latitude"],
+            position["longitude"],
+            position["accuracy"],
+        )
 
-        accuracy = position["accuracy"] or 0.0
-        if (
-            not skip_accuracy_filter
-            and self.max_accuracy > 0
-            and accuracy > self.max_accuracy
-        ):
-            return None
-        return attr
+    @callback
+    def _async_request_address(
+        self,
+        device_id: int,
+        entry: TraccarServerCoordinatorDataDevice,
+    ) -> bool:
+        """Reverse geocode a position the Traccar server did not resolve.
+
+        Return whether the address shown for the device changed, which
+        happens without a lookup when the position moved into a cached cell.
+        """
+        if self.geocoder is None or entry["position"]["address"]:
+            return False
+        position = entry["position"]
+        address = self.geocoder.get(position["latitude"], position["longitude"])
+        changed = (
+            device_id not in self._addresses or self._addresses[device_id] != address
+        )
+        self._addresses[device_id] = address
+        if address is None:
+            self.geocoder.async_request(
+                device_id,
+                {
+                    "latitude": position["latitude"],
+                    "longitude": position["longitude"],
+                    "wgs84_latitude": entry["wgs84"][1],
+                    "wgs84_longitude": entry["wgs84"][0],
+                },
+            )
+        return changed
+
+    @callback
+    def _async_signal_device(
+        self, device_id: int, fields: set[str] | None = None
+    ) -> None:
+        """Tell the entities of a device that depend on ``fields`` to write.
+
+        Without ``fields`` every entity of the device writes its state. Each
+        field has its own signal; they share a sequence number so an entity
+        that depends on several of the fields still writes only once.
+        """
+        if (fields is None or not SNAPSHOT_FIELDS.isdisjoint(fields)) and (
+            entry := self.data.get(device_id)
+        ) is not None:
+            self.snapshot.update(device_id, entry)
+        if fields is None:
+            self.subscription_counters["full"] += 1
+            async_dispatcher_send(self.hass, f"{DOMAIN}_{device_id}")
+            return
+        if not fields:
+            return
+        self.subscription_counters["partial"] += 1
+        self._signal_sequence += 1
+        for field in fields:
+            async_dispatcher_send(
+                self.hass, f"{DOMAIN}_{device_id}_{field}", self._signal_sequence
+            )
+
+    @callback
+    def _async_signal_address(self, device_id: int) -> None:
+        """Tell the entities of a device that its address was resolved."""
+        if self.geocoder is None or (entry := self.data.get(device_id)) is None:
+            return
+        position = entry["position"]
+        self._addresses[device_id] = self.geocoder.get(
+            position["latitude"], position["longitude"]
+        )
+        self._async_signal_device(device_id, {FIELD_ADDRESS})
+
+    @property
+    def statistics(self) -> dict[str, Any]:
+        """Return counters for diagnostics."""
+        return {
+            "rejected_positions": dict(self.rejected_positions),
+            "future_positions": self.future_positions,
+            **self.client.endpoint_statistics,
+            "geofences": len(self._geofences),
+            "geofence_version": self.geofence_version,
+            "events": self.event_pipeline.statistics,
+            "subscription": dict(self.subscription_counters),
+            "frame_queue": self.frame_queue.statistics,
+            "snapshot_version": self.snapshot.version,
+            "commands": self.commands.statistics,
+            "intervals": self.interval_controller.statistics,
+            "history_bytes": sum(
+                history.nbytes for history in self.history.values()
+            ),
+        }
+
+
+def _is_future(key: tuple[datetime, int]) -> bool:
+    """Return whether a position key lies too far ahead of the current time."""
+    return key[0] > dt_util.utcnow() + FUTURE_FIX_TOLERANCE
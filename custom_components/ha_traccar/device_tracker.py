@@ -21,10 +21,46 @@ from .const import (
     ATTR_TRACCAR_ID,
     ATTR_TRACKER,
     DOMAIN,
+    FIELD_ADDRESS,
+    FIELD_ALTITUDE,
+    FIELD_ATTRIBUTES,
+    FIELD_BATTERY,
+    FIELD_GEOFENCE,
+    FIELD_MOTION,
+    FIELD_POSITION,
+    FIELD_SPEED,
+    FIELD_STATUS,
+)
+from .coord_transform import DATUM_BD09, DATUM_GCJ02, DATUM_WGS84, to_wgs84
+from .coordinator import (
+    TraccarServerCoordinator,
+    TraccarServerCoordinatorDataDevice,
+)
+from .entity import (
+    TraccarServerEntity,
+    async_setup_device_entities,
+    generate_entity_id,
+)
+
+# 每次上报都会变化的属性，已有对应的传感器或可从轨迹重新计算，不写入历史记录
+UNRECORDED_ATTRIBUTES = frozenset(
+    {
+        ATTR_ADDRESS,
+        ATTR_ALTITUDE,
+        ATTR_MOTION,
+        ATTR_SPEED,
+        ATTR_STATUS,
+        "average_speed",
+        "smoothed_latitude",
+        "smoothed_longitude",
+        "trail",
+        *(
+            f"{datum}_{axis}"
+            for datum in (DATUM_WGS84, DATUM_GCJ02, DATUM_BD09)
+            for axis in ("latitude", "longitude")
+        ),
+    }
 )
-from .coord_transform import gcj02_to_wgs84
-from .coordinator import TraccarServerCoordinator
-from .entity import TraccarServerEntity, generate_entity_id
 
 
 async def async_setup_entry(
@@ -34,39 +70,80 @@ async def async_setup_entry(
 ) -> None:
     """Set up device tracker entities."""
     coordinator: TraccarServerCoordinator = hass.data[DOMAIN][entry.entry_id]
-    
-    entities = []
-    for device_entry in coordinator.data.values():
-        device = device_entry["device"]
-        device_name = device["name"]
-        # 处理设备名称，转换为有效的实体ID格式
-        device_id = re.sub(r'[^\w\s]', '', device_name.lower()).replace(" ", "_")
-        
-        # 添加标准设备跟踪器
-        tracker = TraccarServerDeviceTracker(coordinator, device)
-        # 强制设置实体ID
+    async_setup_device_entities(entry, coordinator, _create_entities)
+
+
+def _create_entities(
+    coordinator: TraccarServerCoordinator,
+    device_entry: TraccarServerCoordinatorDataDevice,
+) -> list[Entity]:
+    """Create the device tracker entities of a device."""
+    entities: list[Entity] = []
+    device = device_entry["device"]
+    device_name = device["name"]
+    # 处理设备名称，转换为有效的实体ID格式
+    device_id = re.sub(r'[^\w\s]', '', device_name.lower()).replace(" ", "_")
+
+    if not coordinator.dual_tracker or device_entry["datum"] == DATUM_WGS84:
+        # 只创建一个跟踪器，发布 WGS84 坐标
+        tracker = TraccarServerDeviceTracker(coordinator, device, wgs84=True)
         tracker.entity_id = f"device_tracker.{device_id}"
         entities.append(tracker)
-        
-        # 添加WGS84设备跟踪器
-        wgs84_tracker = TraccarServerWGS84DeviceTracker(coordinator, device)
-        # 强制设置实体ID
-        wgs84_tracker.entity_id = f"device_tracker.{device_id}_wgs84"
-        entities.append(wgs84_tracker)
+        return entities
+
+    # 添加标准设备跟踪器
+    tracker = TraccarServerDeviceTracker(coordinator, device)
+    # 强制设置实体ID
+    tracker.entity_id = f"device_tracker.{device_id}"
+    entities.append(tracker)
     
-    async_add_entities(entities)
+    # 添加WGS84设备跟踪器
+    wgs84_tracker = TraccarServerWGS84DeviceTracker(coordinator, device)
+    # 强制设置实体ID
+    wgs84_tracker.entity_id = f"device_tracker.{device_id}_wgs84"
+    entities.append(wgs84_tracker)
+
+    return entities
 
 
 class TraccarServerDeviceTracker(TraccarServerEntity, TrackerEntity):
-    """Represent a tracked device."""
+    """Represent a tracked device.
 
-    def __init__(self, coordinator: TraccarServerCoordinator, device: dict) -> None:
+    The tracker publishes the coordinates as the device reports them, or
+    their WGS84 conversion from the coordinator when ``wgs84`` is set.
+    Only the built-in attributes selected in the options are published, and
+    the ones that change with every position are kept out of the recorder.
+    """
+
+    _unrecorded_attributes = UNRECORDED_ATTRIBUTES
+    _traccar_fields = frozenset(
+        {
+            FIELD_ADDRESS,
+            FIELD_ALTITUDE,
+            FIELD_ATTRIBUTES,
+            FIELD_BATTERY,
+            FIELD_GEOFENCE,
+            FIELD_MOTION,
+            FIELD_POSITION,
+            FIELD_SPEED,
+            FIELD_STATUS,
+        }
+    )
+
+    def __init__(
+        self,
+        coordinator: TraccarServerCoordinator,
+        device: dict,
+        *,
+        wgs84: bool = False,
+    ) -> None:
         """Initialize the device tracker."""
         super().__init__(coordinator, device)
         # 使用设备名称作为实体名称
         self._attr_name = device["name"]
         # 设置与官方版本一致的unique_id
         self._attr_unique_id = self._device_id
+        self._wgs84 = wgs84
         
     @property
     def entity_id(self) -> str:
@@ -87,29 +164,62 @@ class TraccarServerDeviceTracker(TraccarServerEntity, TrackerEntity):
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return device specific attributes."""
+        selected = self.coordinator.tracker_attributes
         geofence_name = self.traccar_geofence["name"] if self.traccar_geofence else None
-        return {
-            **self.traccar_attributes,
-            ATTR_ADDRESS: self.traccar_position["address"],
+        builtin = {
+            ATTR_ADDRESS: self.traccar_address,
             ATTR_ALTITUDE: self.traccar_position["altitude"],
             ATTR_CATEGORY: self.traccar_device["category"],
             ATTR_GEOFENCE: geofence_name,
             ATTR_MOTION: self.traccar_position["attributes"].get("motion", False),
-            ATTR_SPEED: self.traccar_position["speed"],
+            ATTR_SPEED: self.traccar_derived["speed"],
             ATTR_STATUS: self.traccar_device["status"],
             ATTR_TRACCAR_ID: self.traccar_device["id"],
             ATTR_TRACKER: DOMAIN,
         }
+        attributes = {
+            **self.traccar_attributes,
+            **{key: value for key, value in builtin.items() if key in selected},
+            **self.traccar_history_attributes,
+        }
+        if self._wgs84:
+            attributes.update(self._coordinate_attributes)
+        return attributes
+
+    @property
+    def _coordinate_attributes(self) -> dict[str, float]:
+        """Return the WGS84 coordinates and the reported ones if converted."""
+        # 坐标已在协调器中转换
+        lng, lat = self.traccar_wgs84
+        attributes = {"wgs84_longitude": lng, "wgs84_latitude": lat}
+        if (datum := self.traccar_datum) != DATUM_WGS84:
+            attributes[f"{datum}_longitude"] = self.traccar_position["longitude"]
+            attributes[f"{datum}_latitude"] = self.traccar_position["latitude"]
+        return attributes
+
+    @property
+    def _location(self) -> tuple[float, float]:
+        """Return the (latitude, longitude) to publish, smoothed if enabled."""
+        smoothed = self.traccar_smoothed
+        if not self._wgs84:
+            if smoothed is not None:
+                return smoothed
+            return self.traccar_position["latitude"], self.traccar_position["longitude"]
+        if smoothed is not None:
+            lng, lat = to_wgs84(smoothed[1], smoothed[0], self.traccar_datum)
+        else:
+            lng, lat = self.traccar_wgs84
+        return lat, lng
 
     @property
     def latitude(self) -> float:
         """Return latitude value of the device."""
-        return self.traccar_position["latitude"]
+        return self._location[0]
 
     @property
     def longitude(self) -> float:
         """Return longitude value of the device."""
-        return self.traccar_position["longitude"]
+        return self._location[1]
 
     @property
     def location_accuracy(self) -> int:
@@ -122,14 +232,14 @@ class TraccarServerDeviceTracker(TraccarServerEntity, TrackerEntity):
         return SourceType.GPS
 
 
-class TraccarServerWGS84DeviceTracker(TraccarServerEntity, TrackerEntity):
+class TraccarServerWGS84DeviceTracker(TraccarServerDeviceTracker):
     """Represent a tracked device with WGS84 coordinates."""
     
     _attr_icon = "mdi:account-arrow-right"
 
     def __init__(self, coordinator: TraccarServerCoordinator, device: dict) -> None:
         """Initialize the device tracker."""
-        super().__init__(coordinator, device)
+        super().__init__(coordinator, device, wgs84=True)
         # 设置与官方版本一致的unique_id
         self._attr_unique_id = f"{self._device_id}_wgs84"
         # 使用设备名称 + WGS84 作为实体名称
@@ -145,62 +255,3 @@ class TraccarServerWGS84DeviceTracker(TraccarServerEntity, TrackerEntity):
     def entity_id(self, entity_id: str) -> None:
         """Set the entity ID."""
         self._entity_id = entity_id
-
-    @property
-    def battery_level(self) -> int:
-        """Return battery value of the device."""
-        return self.traccar_position["attributes"].get("batteryLevel", -1)
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return device specific attributes."""
-        geofence_name = self.traccar_geofence["name"] if self.traccar_geofence else None
-        # 转换坐标
-        lng, lat = gcj02_to_wgs84(
-            self.traccar_position["longitude"],
-            self.traccar_position["latitude"]
-        )
-        return {
-            **self.traccar_attributes,
-            ATTR_ADDRESS: self.traccar_position["address"],
-            ATTR_ALTITUDE: self.traccar_position["altitude"],
-            ATTR_CATEGORY: self.traccar_device["category"],
-            ATTR_GEOFENCE: geofence_name,
-            ATTR_MOTION: self.traccar_position["attributes"].get("motion", False),
-            ATTR_SPEED: self.traccar_position["speed"],
-            ATTR_STATUS: self.traccar_device["status"],
-            ATTR_TRACCAR_ID: self.traccar_device["id"],
-            ATTR_TRACKER: DOMAIN,
-            "wgs84_longitude": lng,
-            "wgs84_latitude": lat,
-        }
-
-    @property
-    def latitude(self) -> float:
-        """Return latitude value of the device in WGS84."""
-        # 转换坐标
-        _, lat = gcj02_to_wgs84(
-            self.traccar_position["longitude"],
-            self.traccar_position["latitude"]
-        )
-        return lat
-
-    @property
-    def longitude(self) -> float:
-        """Return longitude value of the device in WGS84."""
-        # 转换坐标
-        lng, _ = gcj02_to_wgs84(
-            self.traccar_position["longitude"],
-            self.traccar_position["latitude"]
-        )
-        return lng
-
-    @property
-    def location_accuracy(self) -> int:
-        """Return the gps accuracy of the device."""
-        return self.traccar_position["accuracy"]
-
-    @property
-    def source_type(self) -> SourceType:
-        """Return the source type, eg gps or router, of the device."""
-        return SourceType.GPS
@@ -11,6 +11,7 @@ from homeassistant.helpers import device_registry as dr, entity_registry as er
 
 from .const import DOMAIN
 from .coordinator import TraccarServerCoordinator
+from .session import DATA_SESSIONS
 
 TO_REDACT = {CONF_ADDRESS, CONF_LATITUDE, CONF_LONGITUDE}
 
@@ -31,6 +32,8 @@ async def async_get_config_entry_diagnostics(
     return async_redact_data(
         {
             "subscription_status": coordinator.client.subscription_status,
+            "statistics": coordinator.statistics,
+            "sessions": hass.data[DATA_SESSIONS].statistics,
             "config_entry_options": dict(config_entry.options),
             "coordinator_data": coordinator.data,
             "entities": [
@@ -1,17 +1,33 @@
 """Base entity for ha_traccar."""
 from __future__ import annotations
 
+from collections.abc import Callable, Sequence
 import re
+import time
 from typing import Any
 
 from pytraccar import DeviceModel, GeofenceModel, PositionModel
 
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import (
+    EntityPlatform,
+    async_get_current_platform,
+)
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, ENTITY_ID_MAP
-from .coordinator import TraccarServerCoordinator
+from .const import DOMAIN, ENTITY_ID_MAP, FIELDS, LOGGER
+from .coordinator import (
+    TraccarServerCoordinator,
+    TraccarServerCoordinatorDataDevice,
+)
+from .history import TrackHistory
+
+# 每批注册的实体数量，批次之间让出事件循环
+ENTITY_CHUNK_SIZE = 250
 
 
 def generate_entity_id(device_name: str, suffix: str) -> str:
@@ -26,10 +42,75 @@ def generate_entity_id(device_name: str, suffix: str) -> str:
     return f"{device_id}_{suffix}"
 
 
+@callback
+def async_setup_device_entities(
+    entry: ConfigEntry,
+    coordinator: TraccarServerCoordinator,
+    create_entities: Callable[
+        [TraccarServerCoordinator, TraccarServerCoordinatorDataDevice],
+        list[Entity],
+    ],
+) -> None:
+    """Add the entities of every device, and of devices added later.
+
+    A single ``async_add_entities`` call for a large fleet registers tens of
+    thousands of entities before the platform setup returns. Entities are
+    added in chunks from a background task instead, so Home Assistant
+    finishes starting while the rest of the fleet is still loading.
+    """
+    platform = async_get_current_platform()
+    known_devices: set[int] = set()
+
+    @callback
+    def _async_add_new_devices() -> None:
+        """Create the entities of devices that are not known yet."""
+        if not coordinator.data:
+            return
+        # 从服务器删除的设备会在重新出现时再次创建，被筛选排除的设备保留实体
+        known_devices.intersection_update(coordinator.server_devices)
+        entities: list[Entity] = []
+        for device_id, device_entry in coordinator.data.items():
+            if device_id not in known_devices:
+                known_devices.add(device_id)
+                entities.extend(create_entities(coordinator, device_entry))
+        if entities:
+            entry.async_create_background_task(
+                platform.hass,
+                _async_add_chunks(platform, entities),
+                name=f"{DOMAIN} add {platform.domain} entities",
+            )
+
+    _async_add_new_devices()
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_new_devices))
+
+
+async def _async_add_chunks(
+    platform: EntityPlatform,
+    entities: Sequence[Entity],
+) -> None:
+    """Add entities chunk by chunk and log how long it took."""
+    start = time.monotonic()
+    for index in range(0, len(entities), ENTITY_CHUNK_SIZE):
+        await platform.async_add_entities(entities[index : index + ENTITY_CHUNK_SIZE])
+    LOGGER.debug(
+        "Added %s %s entities in %.2f seconds",
+        len(entities),
+        platform.domain,
+        time.monotonic() - start,
+    )
+
+
 class TraccarServerEntity(CoordinatorEntity[TraccarServerCoordinator]):
-    """Base entity for ha_traccar."""
+    """Base entity for ha_traccar.
+
+    The coordinator signals which fields of a device changed, and an entity
+    only writes its state when one of its ``_traccar_fields`` did. Changes
+    to the device itself are signalled to every entity of the device.
+    """
 
     _attr_has_entity_name = False
+    # 实体依赖的设备数据字段
+    _traccar_fields: frozenset[str] = FIELDS
 
     def __init__(
         self,
@@ -47,6 +128,7 @@ class TraccarServerEntity(CoordinatorEntity[TraccarServerCoordinator]):
         # 保存设备ID和名称
         self._device_id = device["uniqueId"]
         self._device_name = device["name"]
+        self._signal_sequence = 0
         
         # 设置默认的entity_id前缀，使用设备名称
         self.entity_id_prefix = re.sub(r'[^\w\s]', '', device["name"].lower()).replace(" ", "_")
@@ -71,6 +153,54 @@ class TraccarServerEntity(CoordinatorEntity[TraccarServerCoordinator]):
         """Return the position."""
         return self.coordinator.data[self.device_id]["position"]
 
+    @property
+    def traccar_address(self) -> str | None:
+        """Return the address from Traccar, or the reverse geocoded one."""
+        position = self.traccar_position
+        if position["address"] or (geocoder := self.coordinator.geocoder) is None:
+            return position["address"]
+        return geocoder.get(position["latitude"], position["longitude"])
+
+    @property
+    def traccar_wgs84(self) -> tuple[float, float]:
+        """Return the (longitude, latitude) of the position in WGS84."""
+        return self.coordinator.data[self.device_id]["wgs84"]
+
+    @property
+    def traccar_datum(self) -> str:
+        """Return the datum the device reports its coordinates in."""
+        return self.coordinator.data[self.device_id]["datum"]
+
+    @property
+    def traccar_derived(self) -> dict[str, Any]:
+        """Return the values derived from the position by the coordinator."""
+        return self.coordinator.data[self.device_id]["derived"]
+
+    @property
+    def traccar_smoothed(self) -> tuple[float, float] | None:
+        """Return the smoothed (latitude, longitude), if smoothing is enabled."""
+        if (smoother := self.coordinator.smoothers.get(self.device_id)) is None:
+            return None
+        return smoother.position
+
+    @property
+    def traccar_history(self) -> TrackHistory | None:
+        """Return the recent track of the device, if history is enabled."""
+        return self.coordinator.history.get(self.device_id)
+
+    @property
+    def traccar_history_attributes(self) -> dict[str, Any]:
+        """Return the attributes computed from the recent track."""
+        if (history := self.traccar_history) is None:
+            return {}
+        smoothed = history.smoothed_position()
+        return {
+            "average_speed": history.average_speed(),
+            "smoothed_latitude": smoothed[0] if smoothed else None,
+            "smoothed_longitude": smoothed[1] if smoothed else None,
+            "trail": history.trail(),
+        }
+
     @property
     def traccar_attributes(self) -> dict[str, Any]:
         """Return the attributes."""
@@ -85,4 +215,20 @@ class TraccarServerEntity(CoordinatorEntity[TraccarServerCoordinator]):
                 self.async_write_ha_state,
             )
         )
+        for field in self._traccar_fields:
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass,
+                    f"{DOMAIN}_{self.device_id}_{field}",
+                    self._async_field_changed,
+                )
+            )
         await super().async_added_to_hass()
+
+    @callback
+    def _async_field_changed(self, sequence: int) -> None:
+        """Write the state once per update, however many fields changed."""
+        if sequence == self._signal_sequence:
+            return
+        self._signal_sequence = sequence
+        self.async_write_ha_state()
@@ -0,0 +1,248 @@
+"""Rate limiting and prioritization of Traccar events fired on the bus."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+import time
+from typing import Any
+
+from pytraccar import ReportsEventeModel
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import EVENTS, LOGGER
+
+# 报警类事件立即优先发送，既不合并也不受令牌桶限制
+ALARM_EVENT_TYPES = {"alarm"}
+# 相同事件在此时间窗口内合并为一个（秒）
+COLLAPSE_WINDOW = 60.0
+DEVICE_RATE = 0.2
+DEVICE_BURST = 10
+TYPE_RATE = 2.0
+TYPE_BURST = 50
+
+
+@dataclass(slots=True)
+class TokenBucket:
+    """A token bucket refilled at ``rate`` tokens per second up to ``burst``."""
+
+    rate: float
+    burst: float
+    tokens: float = field(init=False)
+    updated: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self) -> None:
+        """Start with a full bucket."""
+        self.tokens = self.burst
+
+    def has_token(self, now: float) -> bool:
+        """Refill the bucket and return whether a token is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens >= 1
+
+    def take(self) -> None:
+        """Consume a token."""
+        self.tokens -= 1
+
+
+@dataclass(slots=True)
+class _Collapsed:
+    """An event that was fired recently and the repeats held back since."""
+
+    event: ReportsEventeModel
+    fired_at: float
+    device_name: str | None
+    pending: int = 0
+
+
+Candidate = tuple[ReportsEventeModel, int, str | None]
+
+
+class EventPipeline:
+    """Fire imported Traccar events on the bus without flooding it.
+
+    Repeated events of a device (same type, geofence, maintenance and
+    attributes) other than alarms are collapsed: the first one is fired and repeats within
+    ``COLLAPSE_WINDOW`` are counted and fired as the latest repeat with a
+    ``count`` when the window ends, whether or not more events arrive.
+    Every other event needs a token from both its device's bucket and its
+    type's bucket, or it is dropped. Alarm events are fired first, each one
+    as it arrives, and are never dropped.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the pipeline."""
+        self.hass = hass
+        self.fired = 0
+        self.merged = 0
+        self.dropped = 0
+        self._collapsed: dict[tuple[Any, ...], _Collapsed] = {}
+        self._unsub_release: CALLBACK_TYPE | None = None
+        self._device_buckets: dict[int, TokenBucket] = {}
+        self._type_buckets: dict[str, TokenBucket] = {}
+
+    @property
+    def statistics(self) -> dict[str, int]:
+        """Return the event counters."""
+        return {
+            "fired": self.fired,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "collapsing": len(self._collapsed),
+        }
+
+    @callback
+    def async_process(
+        self,
+        events: list[ReportsEventeModel],
+        device_names: Mapping[int, str | None],
+    ) -> None:
+        """Collapse, prioritize and rate limit a batch of events and fire them."""
+        now = time.monotonic()
+        candidates = self._async_release_expired(now)
+
+        batch: dict[tuple[Any, ...], list[Any]] = {}
+        for event in events:
+            if event["type"] in ALARM_EVENT_TYPES:
+                candidates.append((event, 1, device_names.get(event["deviceId"])))
+                continue
+            key = (
+                event["deviceId"],
+                event["type"],
+                event.get("geofenceId"),
+                event.get("maintenanceId"),
+                repr(sorted((event["attributes"] or {}).items())),
+            )
+            if (grouped := batch.get(key)) is not None:
+                # 合并后的事件使用最新一次的内容
+                grouped[0] = event
+                grouped[1] += 1
+            else:
+                batch[key] = [event, 1]
+
+        for key, (event, count) in batch.items():
+            if (collapsed := self._collapsed.get(key)) is not None:
+                collapsed.event = event
+                collapsed.pending += count
+                self.merged += count
+                continue
+            if count > 1:
+                self.merged += count - 1
+            device_name = device_names.get(event["deviceId"])
+            self._collapsed[key] = _Collapsed(event, now, device_name)
+            candidates.append((event, count, device_name))
+
+        self._async_fire_candidates(candidates, now)
+        self._async_schedule_release()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel the pending release of held repeats."""
+        if self._unsub_release is not None:
+            self._unsub_release()
+            self._unsub_release = None
+
+    @callback
+    def _async_fire_candidates(self, candidates: list[Candidate], now: float) -> None:
+        """Fire events, alarms first, as far as the token buckets allow."""
+        # 报警类事件排在最前面
+        candidates.sort(
+            key=lambda candidate: candidate[0]["type"] not in ALARM_EVENT_TYPES
+        )
+        for event, count, device_name in candidates:
+            if event["type"] not in ALARM_EVENT_TYPES and not self._async_take_token(
+                event, now
+            ):
+                self.dropped += count
+                continue
+            self._async_fire(event, count, device_name)
+
+    @callback
+    def _async_schedule_release(self) -> None:
+        """Release the held repeats when the oldest collapse window ends."""
+        if self._unsub_release is not None or not self._collapsed:
+            return
+        # 窗口按开始时间插入，第一个最早结束
+        oldest = next(iter(self._collapsed.values()))
+        self._unsub_release = async_call_later(
+            self.hass,
+            max(0.0, oldest.fired_at + COLLAPSE_WINDOW - time.monotonic()),
+            HassJob(
+                self._async_release,
+                "ha_traccar release collapsed events",
+                cancel_on_shutdown=True,
+            ),
+        )
+
+    @callback
+    def _async_release(self, _: datetime) -> None:
+        """Fire the repeats of the windows that ended."""
+        self._unsub_release = None
+        now = time.monotonic()
+        self._async_fire_candidates(self._async_release_expired(now), now)
+        self._async_schedule_release()
+
+    @callback
+    def _async_release_expired(self, now: float) -> list[Candidate]:
+        """End the collapse windows that are over and return the held repeats."""
+        released = []
+        for key, collapsed in list(self._collapsed.items()):
+            if now - collapsed.fired_at < COLLAPSE_WINDOW:
+                break
+            del self._collapsed[key]
+            if collapsed.pending:
+                released.append(
+                    (collapsed.event, collapsed.pending, collapsed.device_name)
+                )
+        return released
+
+    @callback
+    def _async_take_token(self, event: ReportsEventeModel, now: float) -> bool:
+        """Take a token from the device and type buckets if both have one."""
+        if (device_bucket := self._device_buckets.get(event["deviceId"])) is None:
+            device_bucket = self._device_buckets[event["deviceId"]] = TokenBucket(
+                DEVICE_RATE, DEVICE_BURST
+            )
+        if (type_bucket := self._type_buckets.get(event["type"])) is None:
+            type_bucket = self._type_buckets[event["type"]] = TokenBucket(
+                TYPE_RATE, TYPE_BURST
+            )
+        if not device_bucket.has_token(now) or not type_bucket.has_token(now):
+            LOGGER.debug(
+                "Dropping %s event of device %s", event["type"], event["deviceId"]
+            )
+            return False
+        device_bucket.take()
+        type_bucket.take()
+        return True
+
+    @callback
+    def _async_fire(
+        self,
+        event: ReportsEventeModel,
+        count: int,
+        device_name: str | None,
+    ) -> None:
+        """Fire an event on the bus."""
+        self.fired += 1
+        self.hass.bus.async_fire(
+            # This goes against two of the HA core guidelines:
+            # 1. Event names should be prefixed with the domain name of
+            #    the integration
+            # 2. This should be event entities
+            #
+            # However, to not break it for those who currently use
+            # the "old" integration, this is kept as is.
+            f"traccar_{EVENTS[event['type']]}",
+            {
+                "device_traccar_id": event["deviceId"],
+                "device_name": device_name,
+                "type": event["type"],
+                "serverTime": event["eventTime"],
+                "attributes": event["attributes"],
+                "count": count,
+            },
+        )
@@ -0,0 +1,114 @@
+"""Fleet snapshot websocket command and HTTP view for ha_traccar."""
+from __future__ import annotations
+
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import web
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.json import json_bytes
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .coordinator import TraccarServerCoordinator
+
+ATTR_ENTRY_ID = "entry_id"
+ATTR_SINCE = "since"
+
+
+@callback
+def async_setup_fleet_api(hass: HomeAssistant) -> None:
+    """Register the fleet snapshot websocket command and HTTP view."""
+    websocket_api.async_register_command(hass, websocket_fleet_snapshot)
+    hass.http.register_view(FleetSnapshotView())
+
+
+@callback
+def _get_coordinator(
+    hass: HomeAssistant, entry_id: str | None
+) -> TraccarServerCoordinator | None:
+    """Return the coordinator of an entry, or the only one without an entry."""
+    coordinators: dict[str, TraccarServerCoordinator] = hass.data.get(DOMAIN, {})
+    if entry_id is not None:
+        return coordinators.get(entry_id)
+    if len(coordinators) == 1:
+        return next(iter(coordinators.values()))
+    return None
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/fleet",
+        vol.Optional(ATTR_ENTRY_ID): str,
+        vol.Optional(ATTR_SINCE): int,
+    }
+)
+@callback
+def websocket_fleet_snapshot(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the fleet snapshot, or the changes since a version."""
+    if (coordinator := _get_coordinator(hass, msg.get(ATTR_ENTRY_ID))) is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Traccar server not found"
+        )
+        return
+    connection.send_result(
+        msg["id"], coordinator.snapshot.as_dict(msg.get(ATTR_SINCE))
+    )
+
+
+class FleetSnapshotView(HomeAssistantView):
+    """Serve the fleet snapshot with an ETag of its version.
+
+    ``?since=<version>`` returns the changes since that version. The full
+    snapshot is encoded once per version and the same bytes are served to
+    every client.
+    """
+
+    url = f"/api/{DOMAIN}/fleet"
+    extra_urls = [f"/api/{DOMAIN}/fleet/{{entry_id}}"]
+    name = f"api:{DOMAIN}:fleet"
+
+    def __init__(self) -> None:
+        """Initialize the view."""
+        self._encoded: dict[str, tuple[int, bytes]] = {}
+
+    async def get(
+        self, request: web.Request, entry_id: str | None = None
+    ) -> web.Response:
+        """Return the snapshot of a Traccar server."""
+        hass: HomeAssistant = request.app["hass"]
+        if (coordinator := _get_coordinator(hass, entry_id)) is None:
+            return self.json_message("Traccar server not found", HTTPStatus.NOT_FOUND)
+        since = None
+        if ATTR_SINCE in request.query:
+            try:
+                since = int(request.query[ATTR_SINCE])
+            except ValueError:
+                return self.json_message("Invalid version", HTTPStatus.BAD_REQUEST)
+
+        snapshot = coordinator.snapshot
+        etag = f'"{snapshot.version}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        data = snapshot.as_dict(since)
+        if data["full"]:
+            # 完整快照按版本缓存编码结果
+            key = entry_id or ""
+            cached = self._encoded.get(key)
+            if cached is None or cached[0] != data["version"]:
+                cached = self._encoded[key] = (data["version"], json_bytes(data))
+            body = cached[1]
+        else:
+            body = json_bytes(data)
+        return web.Response(body=body, content_type="application/json", headers=headers)
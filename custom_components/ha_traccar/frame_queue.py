@@ -0,0 +1,117 @@
+"""Latest-value queue between the Traccar websocket and frame processing."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from pytraccar import (
+    DeviceModel,
+    PositionModel,
+    ReportsEventeModel,
+    SubscriptionData,
+)
+
+from .helpers import position_key
+
+# 等待处理的设备和位置更新数量达到该值时，暂停读取 WebSocket
+FRAME_QUEUE_SIZE = 20_000
+
+
+class FrameQueue:
+    """Pending websocket updates, merged to the newest state per device.
+
+    The socket reader puts every frame into the queue and the processor
+    takes all pending updates at once. A device or position update for a
+    device that is still pending replaces the queued one (positions are
+    compared by fix time, so an older fix never replaces a newer one), so a
+    device is processed once however many frames arrived for it in the
+    meantime. Events are kept in order without merging. When ``maxsize``
+    updates are pending, ``put`` waits until the processor catches up,
+    which leaves the frames in the socket buffer and slows the server down
+    instead of growing the queue.
+
+    Positions replaced in the queue are dropped, unless ``keep_replaced`` is
+    set; then they are returned by ``pop_replaced`` so the older fixes can
+    still be reported as backfill.
+    """
+
+    def __init__(self, maxsize: int = FRAME_QUEUE_SIZE) -> None:
+        """Initialize the queue."""
+        self.maxsize = maxsize
+        self.keep_replaced = False
+        self.frames = 0
+        self.merged = 0
+        self.waits = 0
+        self.max_depth = 0
+        self._devices: dict[int, DeviceModel] = {}
+        self._positions: dict[int, PositionModel] = {}
+        self._replaced: list[PositionModel] = []
+        self._events: list[ReportsEventeModel] = []
+        self._pending = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+
+    def __len__(self) -> int:
+        """Return the number of pending updates."""
+        return len(self._devices) + len(self._positions) + len(self._events)
+
+    @property
+    def statistics(self) -> dict[str, Any]:
+        """Return counters for diagnostics."""
+        return {
+            "depth": len(self),
+            "max_depth": self.max_depth,
+            "frames": self.frames,
+            "merged": self.merged,
+            "waits": self.waits,
+        }
+
+    async def put(self, data: SubscriptionData) -> None:
+        """Merge a websocket frame into the pending updates."""
+        while len(self) >= self.maxsize:
+            self.waits += 1
+            self._drained.clear()
+            await self._drained.wait()
+
+        self.frames += 1
+        for device in data.get("devices") or []:
+            if device["id"] in self._devices:
+                self.merged += 1
+            self._devices[device["id"]] = device
+        for position in data.get("positions") or []:
+            device_id = position["deviceId"]
+            if (queued := self._positions.get(device_id)) is None:
+                self._positions[device_id] = position
+                continue
+            self.merged += 1
+            if position_key(position) < position_key(queued):
+                position, queued = queued, position
+            self._positions[device_id] = position
+            if self.keep_replaced and len(self._replaced) < self.maxsize:
+                self._replaced.append(queued)
+
+        # 事件不合并，按顺序全部处理
+        self._events.extend(data.get("events") or [])
+
+        self.max_depth = max(self.max_depth, len(self))
+        if self:
+            self._pending.set()
+
+    async def get(self) -> SubscriptionData:
+        """Wait for pending updates and return them as a single frame."""
+        await self._pending.wait()
+        self._pending.clear()
+        devices, self._devices = self._devices, {}
+        positions, self._positions = self._positions, {}
+        events, self._events = self._events, []
+        self._drained.set()
+        return {
+            "devices": list(devices.values()),
+            "positions": list(positions.values()),
+            "events": events,
+        }
+
+    def pop_replaced(self) -> list[PositionModel]:
+        """Return and forget the positions replaced by newer fixes."""
+        replaced, self._replaced = self._replaced, []
+        return replaced
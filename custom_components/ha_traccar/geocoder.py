@@ -0,0 +1,187 @@
+"""Reverse geocoding with a spatially bucketed cache for ha_traccar."""
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import Callable
+from hashlib import sha1
+import time
+from typing import Any
+
+from aiohttp import ClientError, ClientTimeout
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, LOGGER
+
+STORAGE_KEY = f"{DOMAIN}.geocode_cache"
+STORAGE_VERSION = 1
+SAVE_DELAY = 60
+CACHE_SIZE = 10_000
+MAX_CONCURRENT_LOOKUPS = 2
+# 等待查询的网格数上限，超出时新网格暂不查询，由设备的下一个位置再次请求
+MAX_PENDING_LOOKUPS = 1_000
+LOOKUP_TIMEOUT = ClientTimeout(total=10)
+METERS_PER_DEGREE = 111_320.0
+# 查询失败的网格在该时间（秒）内不再查询，避免服务故障或限流时反复请求
+FAILURE_BACKOFF = 300
+
+
+class ReverseGeocoder:
+    """Resolve addresses through a configurable geocoder, cached per grid cell.
+
+    Latitude and longitude are rounded to steps of ``cell_size`` meters of
+    latitude, so cells narrow in the east-west direction away from the
+    equator. The first address found for a cell is reused for every later
+    position in it. The cache is an LRU of at most ``CACHE_SIZE`` cells and
+    is saved to disk, so parked and repeat-route devices almost never cause
+    a lookup. A cell whose lookup failed is not looked up again for
+    ``FAILURE_BACKOFF`` seconds.
+
+    Uncached cells wait in a queue of at most ``MAX_PENDING_LOOKUPS`` cells
+    that ``MAX_CONCURRENT_LOOKUPS`` workers drain, so a reload or a fleet
+    wide jump does not start a task per cell.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        *,
+        url: str,
+        field: str,
+        cell_size: float,
+        on_resolved: Callable[[int], None],
+    ) -> None:
+        """Initialize the geocoder."""
+        self.hass = hass
+        self.url = url
+        self.field = field.split(".")
+        self.lookups = 0
+        self.failures = 0
+        self._step = cell_size / METERS_PER_DEGREE
+        self._on_resolved = on_resolved
+        self._cache: OrderedDict[str, str | None] = OrderedDict()
+        self._waiters: dict[str, set[int]] = {}
+        self._failed: dict[str, float] = {}
+        self._pending: OrderedDict[str, dict[str, float]] = OrderedDict()
+        self._workers = 0
+        # 每个地理编码服务使用独立的缓存文件
+        self._store: Store[dict[str, Any]] = Store(
+            hass,
+            STORAGE_VERSION,
+            f"{STORAGE_KEY}.{sha1(f'{url}|{field}'.encode()).hexdigest()[:8]}",
+        )
+
+    async def async_load(self) -> None:
+        """Load the cache from disk."""
+        if (stored := await self._store.async_load()) is None:
+            return
+        if stored.get("step") != self._step:
+            # 网格大小已更改，旧的缓存不再适用
+            return
+        self._cache.update(stored["cells"])
+        self._evict()
+
+    def _cell(self, latitude: float, longitude: float) -> str:
+        """Return the key of the cell containing a point."""
+        return f"{round(latitude / self._step)}:{round(longitude / self._step)}"
+
+    def _evict(self) -> None:
+        """Drop the least recently used cells above the cache size."""
+        while len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to store."""
+        return {"step": self._step, "cells": dict(self._cache)}
+
+    @property
+    def cache_size(self) -> int:
+        """Return the number of cached cells."""
+        return len(self._cache)
+
+    @callback
+    def get(self, latitude: float, longitude: float) -> str | None:
+        """Return the cached address of a point, if any."""
+        cell = self._cell(latitude, longitude)
+        if (address := self._cache.get(cell)) is not None:
+            self._cache.move_to_end(cell)
+        return address
+
+    @callback
+    def async_request(
+        self,
+        device_id: int,
+        coordinates: dict[str, float],
+    ) -> None:
+        """Look up the address of a device's position unless its cell is known."""
+        cell = self._cell(coordinates["latitude"], coordinates["longitude"])
+        if cell in self._cache:
+            self._cache.move_to_end(cell)
+            return
+        if (waiters := self._waiters.get(cell)) is not None:
+            waiters.add(device_id)
+            return
+        if (retry_at := self._failed.get(cell)) is not None:
+            if time.monotonic() < retry_at:
+                return
+            del self._failed[cell]
+        if len(self._pending) >= MAX_PENDING_LOOKUPS:
+            return
+        self._waiters[cell] = {device_id}
+        self._pending[cell] = coordinates
+        if self._workers < MAX_CONCURRENT_LOOKUPS:
+            self._workers += 1
+            self.hass.async_create_background_task(
+                self._async_worker(), name=f"{DOMAIN} reverse geocode"
+            )
+
+    async def _async_worker(self) -> None:
+        """Look up queued cells until the queue is empty."""
+        try:
+            while self._pending:
+                await self._async_lookup(*self._pending.popitem(last=False))
+        finally:
+            self._workers -= 1
+
+    async def _async_lookup(self, cell: str, coordinates: dict[str, float]) -> None:
+        """Resolve the address of a cell and notify the devices waiting for it."""
+        self.lookups += 1
+        try:
+            address = await self._async_fetch(coordinates)
+        except (
+            ClientError,
+            asyncio.TimeoutError,
+            IndexError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ) as ex:
+            self.failures += 1
+            LOGGER.debug("Reverse geocoding failed for %s: %s", coordinates, ex)
+            self._waiters.pop(cell, None)
+            self._failed[cell] = time.monotonic() + FAILURE_BACKOFF
+            if len(self._failed) > CACHE_SIZE:
+                del self._failed[next(iter(self._failed))]
+            return
+
+        self._cache[cell] = address
+        self._evict()
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        for device_id in self._waiters.pop(cell, ()):
+            self._on_resolved(device_id)
+
+    async def _async_fetch(self, coordinates: dict[str, float]) -> str | None:
+        """Query the geocoder and return the configured field of the response."""
+        session = async_get_clientsession(self.hass)
+        async with session.get(
+            self.url.format(**coordinates), timeout=LOOKUP_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            result: Any = await response.json(content_type=None)
+        for key in self.field:
+            result = result[int(key)] if isinstance(result, list) else result[key]
+        return str(result) if result else None
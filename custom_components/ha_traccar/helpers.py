@@ -1,7 +1,12 @@
 """Helper functions for the ha_traccar integration."""
 from __future__ import annotations
 
-from pytraccar import DeviceModel, GeofenceModel
+from datetime import UTC, datetime
+
+from pytraccar import DeviceModel, GeofenceModel, PositionModel
+
+# 没有定位时间的位置排在最前面
+EPOCH = datetime.fromtimestamp(0, UTC)
 
 
 def get_device(device_id: int, devices: list[DeviceModel]) -> DeviceModel | None:
@@ -21,3 +26,36 @@ def get_first_geofence(
         (geofence for geofence in geofences if geofence["id"] in target),
         None,
     )
+
+
+def filter_devices(
+    devices: list[DeviceModel],
+    groups: set[int],
+    categories: set[str],
+) -> list[DeviceModel]:
+    """Return the devices in one of the groups and categories, if any are set."""
+    return [
+        device
+        for device in devices
+        if (not groups or device["groupId"] in groups)
+        and (not categories or device["category"] in categories)
+    ]
+
+
+def resolve_geofence_ids(
+    geofences: list[GeofenceModel],
+    targets: list[str],
+) -> set[int]:
+    """Return the IDs of the geofences matching the given names or IDs."""
+    return {
+        geofence["id"]
+        for geofence in geofences
+        if geofence["name"] in targets or str(geofence["id"]) in targets
+    }
+
+
+def position_key(position: PositionModel) -> tuple[datetime, int]:
+    """Return a key that orders positions by fix time, then by ID."""
+    if fix_time := position["fixTime"]:
+        return datetime.fromisoformat(fix_time), position["id"]
+    return EPOCH, position["id"]
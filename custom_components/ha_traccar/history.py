@@ -0,0 +1,110 @@
+"""Fixed-size in-memory track history for ha_traccar."""
+from __future__ import annotations
+
+from array import array
+import math
+
+# 计算平均速度的时间窗口（秒）
+AVERAGE_SPEED_WINDOW = 300.0
+# 平滑位置使用的最近点数
+SMOOTHING_POINTS = 5
+TRAIL_POINTS = 20
+
+
+class TrackHistory:
+    """Ring buffer of the last ``size`` positions of a device.
+
+    Time (POSIX seconds), latitude, longitude, speed (km/h, NaN when unknown)
+    and course are kept in parallel ``array('d')`` columns that are allocated
+    once, so a device uses ``40 * size`` bytes of samples however many
+    positions it reports.
+    """
+
+    __slots__ = (
+        "size",
+        "_count",
+        "_course",
+        "_lat",
+        "_lng",
+        "_next",
+        "_speed",
+        "_time",
+    )
+
+    def __init__(self, size: int) -> None:
+        """Initialize the buffer."""
+        self.size = size
+        self._count = 0
+        self._next = 0
+        self._time = array("d", bytes(8 * size))
+        self._lat = array("d", bytes(8 * size))
+        self._lng = array("d", bytes(8 * size))
+        self._speed = array("d", bytes(8 * size))
+        self._course = array("d", bytes(8 * size))
+
+    def __len__(self) -> int:
+        """Return the number of stored positions."""
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory used by the sample columns."""
+        return 5 * self._time.itemsize * self.size
+
+    def append(
+        self,
+        timestamp: float,
+        latitude: float,
+        longitude: float,
+        speed: float | None,
+        course: float | None,
+    ) -> None:
+        """Store a position, overwriting the oldest one when full."""
+        index = self._next
+        self._time[index] = timestamp
+        self._lat[index] = latitude
+        self._lng[index] = longitude
+        self._speed[index] = math.nan if speed is None else speed
+        self._course[index] = math.nan if course is None else course
+        self._next = (index + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def _indexes(self, count: int) -> range:
+        """Return the indexes of the latest ``count`` positions, oldest first."""
+        count = min(count, self._count)
+        start = self._next - count
+        return range(start, start + count)
+
+    @property
+    def latest_time(self) -> float | None:
+        """Return the time of the latest position."""
+        return self._time[self._next - 1] if self._count else None
+
+    def smoothed_position(
+        self, points: int = SMOOTHING_POINTS
+    ) -> tuple[float, float] | None:
+        """Return the mean (latitude, longitude) of the latest positions."""
+        if not (indexes := self._indexes(points)):
+            return None
+        return (
+            math.fsum(self._lat[index] for index in indexes) / len(indexes),
+            math.fsum(self._lng[index] for index in indexes) / len(indexes),
+        )
+
+    def average_speed(self, window: float = AVERAGE_SPEED_WINDOW) -> float | None:
+        """Return the mean known speed over the latest ``window`` seconds."""
+        if (latest := self.latest_time) is None:
+            return None
+        total = 0.0
+        count = 0
+        for index in reversed(self._indexes(self._count)):
+            if latest - self._time[index] > window:
+                break
+            if not math.isnan(speed := self._speed[index]):
+                total += speed
+                count += 1
+        return total / count if count else None
+
+    def trail(self, points: int = TRAIL_POINTS) -> list[tuple[float, float]]:
+        """Return the latest (latitude, longitude) pairs, oldest first."""
+        return [(self._lat[index], self._lng[index]) for index in self._indexes(points)]
@@ -0,0 +1,229 @@
+"""Adaptive reporting intervals for Traccar devices."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.person import (
+    ATTR_DEVICE_TRACKERS,
+    DOMAIN as PERSON_DOMAIN,
+)
+from homeassistant.components.zone import ATTR_PASSIVE, DOMAIN as ZONE_DOMAIN
+from homeassistant.const import (
+    ATTR_LATITUDE,
+    ATTR_LONGITUDE,
+    ATTR_RADIUS,
+    STATE_HOME,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util.location import distance
+
+from .commands import COMMAND_FAILED
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from .coordinator import (
+        TraccarServerCoordinator,
+        TraccarServerCoordinatorDataDevice,
+    )
+
+EVALUATION_INTERVAL = timedelta(seconds=30)
+DEFAULT_MOVING_INTERVAL = 30
+DEFAULT_IDLE_INTERVAL = 600
+# 速度超过该值（km/h）视为移动
+MOVING_SPEED = 5.0
+# 设备停止超过该时间（秒）后才降低上报频率，避免在红绿灯处来回切换
+STOP_DELAY = 120.0
+# 在区域外、距离区域边界该距离（米）内的设备按移动频率上报，以便及时发现到达
+ZONE_EDGE_DISTANCE = 200.0
+
+Zone = tuple[float, float, float]
+
+
+class IntervalController:
+    """Send ``positionPeriodic`` commands so idle devices report less often.
+
+    Every ``EVALUATION_INTERVAL`` each device gets a reporting interval:
+
+    * the moving interval up to ``ZONE_EDGE_DISTANCE`` outside a Home
+      Assistant zone, so arriving is noticed quickly;
+    * the idle interval if a person the device tracks is home;
+    * the moving interval if the device is moving;
+    * the idle interval once the device has stood still for ``STOP_DELAY``.
+
+    A command is only sent when a device's interval changes. Turning the
+    controller off sends the moving interval to every device it slowed down.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: TraccarServerCoordinator,
+    ) -> None:
+        """Initialize the controller."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.enabled = False
+        self.moving_interval = DEFAULT_MOVING_INTERVAL
+        self.idle_interval = DEFAULT_IDLE_INTERVAL
+        self.clock: Callable[[], float] = time.monotonic
+        self.commands_sent = 0
+        self._intervals: dict[int, int] = {}
+        self._stopped_since: dict[int, float] = {}
+        # 保证评估和恢复不会同时发送命令
+        self._lock = asyncio.Lock()
+
+    @property
+    def statistics(self) -> dict[str, Any]:
+        """Return the controller counters."""
+        intervals = list(self._intervals.values())
+        return {
+            "enabled": self.enabled,
+            "commands_sent": self.commands_sent,
+            "moving": intervals.count(self.moving_interval),
+            "idle": intervals.count(self.idle_interval),
+        }
+
+    def configure(
+        self, enabled: bool, moving_interval: int, idle_interval: int
+    ) -> None:
+        """Apply the options; changed intervals are sent again."""
+        if self.enabled and not enabled and self._intervals:
+            self.hass.async_create_background_task(
+                self._async_restore(moving_interval),
+                name=f"{DOMAIN} restore reporting intervals",
+            )
+        elif moving_interval != self.moving_interval or (
+            idle_interval != self.idle_interval
+        ):
+            self._intervals = {}
+        self.enabled = enabled
+        self.moving_interval = moving_interval
+        self.idle_interval = idle_interval
+
+    async def async_evaluate(self, _: datetime | None = None) -> None:
+        """Update the reporting interval of every device that needs it."""
+        if not self.enabled or not self.coordinator.data or self._lock.locked():
+            # 上一次评估的命令还在发送时跳过本次评估
+            return
+        async with self._lock:
+            await self._async_evaluate()
+
+    async def _async_restore(self, interval: int) -> None:
+        """Send an interval to the devices the controller changed and forget them."""
+        async with self._lock:
+            if self.enabled:
+                return
+            device_ids = [
+                device_id
+                for device_id, current in self._intervals.items()
+                if current != interval
+            ]
+            self._intervals = {}
+            self._stopped_since = {}
+            if device_ids:
+                await self._async_send(device_ids, interval)
+
+    async def _async_evaluate(self) -> None:
+        """Send the intervals that changed since the last evaluation."""
+        now = self.clock()
+        zones = self._zones()
+        home = self._home_devices()
+        data = self.coordinator.data
+        for device_id in set(self._intervals).difference(data):
+            del self._intervals[device_id]
+            self._stopped_since.pop(device_id, None)
+
+        changes: dict[int, list[int]] = {}
+        for device_id, entry in data.items():
+            interval = self._interval(device_id, entry, zones, home, now)
+            if interval is not None and self._intervals.get(device_id) != interval:
+                changes.setdefault(interval, []).append(device_id)
+
+        for interval, device_ids in changes.items():
+            for device_id in await self._async_send(device_ids, interval):
+                self._intervals[device_id] = interval
+
+    async def _async_send(self, device_ids: list[int], interval: int) -> list[int]:
+        """Send an interval to devices and return those that accepted it."""
+        outcomes = await self.coordinator.commands.async_send(
+            self.coordinator.client,
+            device_ids,
+            "positionPeriodic",
+            {"frequency": interval},
+            0,
+        )
+        accepted = []
+        for device_id, outcome in outcomes.items():
+            if outcome["status"] == COMMAND_FAILED:
+                LOGGER.debug(
+                    "Could not set the interval of device %s: %s",
+                    device_id,
+                    outcome["error"],
+                )
+                continue
+            self.commands_sent += 1
+            accepted.append(device_id)
+        return accepted
+
+    @callback
+    def _interval(
+        self,
+        device_id: int,
+        entry: TraccarServerCoordinatorDataDevice,
+        zones: list[Zone],
+        home: set[str],
+        now: float,
+    ) -> int | None:
+        """Return the interval a device should report at, None to keep it."""
+        longitude, latitude = entry["wgs84"]
+        if any(
+            0 < distance(latitude, longitude, zone_lat, zone_lng) - radius
+            <= ZONE_EDGE_DISTANCE
+            for zone_lat, zone_lng, radius in zones
+        ):
+            self._stopped_since.pop(device_id, None)
+            return self.moving_interval
+        if entry["device"]["uniqueId"] in home:
+            return self.idle_interval
+
+        speed = entry["derived"]["speed"] or 0.0
+        if speed > MOVING_SPEED or entry["position"]["attributes"].get("motion"):
+            self._stopped_since.pop(device_id, None)
+            return self.moving_interval
+        stopped_since = self._stopped_since.setdefault(device_id, now)
+        if now - stopped_since < STOP_DELAY:
+            return None
+        return self.idle_interval
+
+    @callback
+    def _zones(self) -> list[Zone]:
+        """Return the active Home Assistant zones."""
+        return [
+            (
+                state.attributes[ATTR_LATITUDE],
+                state.attributes[ATTR_LONGITUDE],
+                state.attributes[ATTR_RADIUS],
+            )
+            for state in self.hass.states.async_all(ZONE_DOMAIN)
+            if ATTR_LATITUDE in state.attributes
+            and not state.attributes.get(ATTR_PASSIVE)
+        ]
+
+    @callback
+    def _home_devices(self) -> set[str]:
+        """Return the unique IDs of the devices tracking a person at home."""
+        entity_registry = er.async_get(self.hass)
+        home: set[str] = set()
+        for state in self.hass.states.async_all(PERSON_DOMAIN):
+            if state.state != STATE_HOME:
+                continue
+            for entity_id in state.attributes.get(ATTR_DEVICE_TRACKERS, []):
+                entity_entry = entity_registry.async_get(entity_id)
+                if entity_entry is not None and entity_entry.platform == DOMAIN:
+                    home.add(entity_entry.unique_id.removesuffix("_wgs84"))
+        return home
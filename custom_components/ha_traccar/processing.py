@@ -0,0 +1,321 @@
+"""Pure data processing for ha_traccar.
+
+Nothing in this module or the helpers it imports touches Home Assistant or
+the coordinator, so every function here is safe to run in an executor
+thread.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from datetime import datetime
+import math
+from typing import Any
+
+from pytraccar import DeviceModel, GeofenceModel, PositionModel, SubscriptionData
+
+from .const import (
+    FIELD_ADDRESS,
+    FIELD_ALTITUDE,
+    FIELD_ATTRIBUTES,
+    FIELD_BATTERY,
+    FIELD_COURSE,
+    FIELD_DISTANCE,
+    FIELD_GEOFENCE,
+    FIELD_MOTION,
+    FIELD_POSITION,
+    FIELD_SPEED,
+    FIELD_STATUS,
+    FIELD_TEMPERATURE,
+)
+from .coord_transform import DATUMS, to_wgs84
+from .helpers import get_first_geofence
+
+# Traccar 的速度单位是节
+KNOTS_TO_KMH = 1.852
+EARTH_MEAN_RADIUS = 6_371_008.8
+# 两次定位间隔超过该值（秒）时不再计算速度和转向率
+MAX_FIX_INTERVAL = 300
+# Traccar 设备属性，用于为单个设备指定坐标系
+DATUM_ATTRIBUTE = "datum"
+# 设备上下线时 Traccar 只改变这些字段
+STATUS_FIELDS = frozenset({"status", "lastUpdate"})
+
+
+def extract_custom_attributes(
+    device: DeviceModel,
+    position: PositionModel,
+    *,
+    custom_attributes: list[str],
+    max_accuracy: float,
+    skip_accuracy_filter_for: list[str],
+) -> dict[str, Any] | None:
+    """Return a dictionary of custom attributes if not filtered by accuracy configuration."""
+    attr = {}
+    # 始终跳过精度过滤
+    skip_accuracy_filter = True
+
+    for custom_attr in custom_attributes:
+        if custom_attr in skip_accuracy_filter_for:
+            skip_accuracy_filter = True
+        attr[custom_attr] = device["attributes"].get(
+            custom_attr,
+            position["attributes"].get(custom_attr, None),
+        )
+
+    accuracy = position["accuracy"] or 0.0
+    if not skip_accuracy_filter and max_accuracy > 0 and accuracy > max_accuracy:
+        return None
+    return attr
+
+
+def resolve_datum(device: DeviceModel, datums: dict[str, Any]) -> str:
+    """Return the datum of a device's coordinates.
+
+    The ``datum`` attribute of the device wins over the datum of its group,
+    which wins over the default datum.
+    """
+    if (datum := device["attributes"].get(DATUM_ATTRIBUTE)) in DATUMS:
+        return datum
+    return datums["groups"].get(device["groupId"], datums["default"])
+
+
+def is_status_change(old: DeviceModel, new: DeviceModel) -> bool:
+    """Return whether a device update only changes its status."""
+    return all(
+        new.get(key) == value for key, value in old.items() if key not in STATUS_FIELDS
+    )
+
+
+def _position_fields(
+    position: PositionModel, derived: dict[str, Any]
+) -> dict[str, Any]:
+    """Return the values of the fields that come from a position."""
+    attributes = position["attributes"]
+    return {
+        FIELD_POSITION: (
+            position["latitude"],
+            position["longitude"],
+            position["accuracy"],
+        ),
+        FIELD_SPEED: (position["speed"], derived["speed"]),
+        FIELD_COURSE: (position["course"], derived["heading_rate"]),
+        FIELD_ALTITUDE: position["altitude"],
+        FIELD_MOTION: attributes.get("motion"),
+        FIELD_BATTERY: (
+            attributes.get("batteryLevel"),
+            derived["battery"],
+            derived["charging"],
+        ),
+        FIELD_TEMPERATURE: attributes.get("deviceTemp"),
+        FIELD_DISTANCE: attributes.get("totalDistance"),
+        FIELD_ADDRESS: position["address"],
+    }
+
+
+def changed_fields(
+    entry: dict[str, Any], changes: dict[str, Any]
+) -> set[str] | None:
+    """Return the fields that ``changes`` would change in a device entry.
+
+    None means the device itself changed and every field has to be written.
+    """
+    if "device" in changes and not is_status_change(
+        entry["device"], changes["device"]
+    ):
+        return None
+    fields: set[str] = set()
+    if "device" in changes and (
+        changes["device"]["status"] != entry["device"]["status"]
+    ):
+        fields.add(FIELD_STATUS)
+    if "attributes" in changes and changes["attributes"] != entry["attributes"]:
+        fields.add(FIELD_ATTRIBUTES)
+    if "position" in changes:
+        old = _position_fields(entry["position"], entry["derived"])
+        new = _position_fields(changes["position"], changes["derived"])
+        fields.update(field for field, value in new.items() if old[field] != value)
+        if changes["geofence"] != entry["geofence"]:
+            fields.add(FIELD_GEOFENCE)
+    return fields
+
+
+def position_to_wgs84(position: PositionModel, datum: str) -> tuple[float, float]:
+    """Return the (longitude, latitude) of a position in WGS84."""
+    return to_wgs84(position["longitude"], position["latitude"], datum)
+
+
+def derive_kinematics(
+    position: PositionModel,
+    previous: PositionModel | None,
+) -> dict[str, Any]:
+    """Return the values derived from a position and the one before it.
+
+    ``speed`` is in km/h. When the position has no speed it is computed from
+    the distance to the previous fix. ``heading_rate`` is the signed course
+    change in degrees per second, or None without a recent previous fix.
+    """
+    attributes = position["attributes"]
+    battery = attributes.get("batteryLevel") or 0
+    # 小数（0-1）转换为百分比
+    battery = round(battery if battery > 1 else battery * 100)
+
+    charging = attributes.get("charge")
+    if charging is None:
+        charging = attributes.get("charging")
+    if charging is None:
+        # 有些设备只提供 ignition 属性
+        charging = attributes.get("ignition", False)
+
+    speed = position["speed"]
+    speed = speed * KNOTS_TO_KMH if speed is not None else None
+    heading_rate = None
+
+    if (
+        previous is not None
+        and previous["id"] != position["id"]
+        # 缺少定位时间时无法计算间隔
+        and position.get("fixTime")
+        and previous.get("fixTime")
+    ):
+        interval = (
+            datetime.fromisoformat(position["fixTime"])
+            - datetime.fromisoformat(previous["fixTime"])
+        ).total_seconds()
+        if 0 < interval <= MAX_FIX_INTERVAL:
+            if speed is None:
+                speed = _distance(previous, position) / interval * 3.6
+            if position["course"] is not None and previous["course"] is not None:
+                change = (position["course"] - previous["course"] + 180) % 360 - 180
+                heading_rate = change / interval
+
+    return {
+        "battery": battery,
+        "charging": bool(charging),
+        "heading_rate": heading_rate,
+        "speed": speed,
+    }
+
+
+def _distance(start: PositionModel, end: PositionModel) -> float:
+    """Return the great-circle distance between two positions in meters."""
+    lat1 = math.radians(start["latitude"])
+    lat2 = math.radians(end["latitude"])
+    dlat = lat2 - lat1
+    dlng = math.radians(end["longitude"] - start["longitude"])
+    hav = (
+        math.sin(dlat / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin(dlng / 2) ** 2
+    )
+    return 2 * EARTH_MEAN_RADIUS * math.asin(math.sqrt(hav))
+
+
+def build_coordinator_data(
+    devices: list[DeviceModel],
+    positions: list[PositionModel],
+    geofences: list[GeofenceModel],
+    options: dict[str, Any],
+    datums: dict[str, Any],
+    previous: Mapping[int, tuple[PositionModel, dict[str, Any]]] | None = None,
+) -> dict[int, dict[str, Any]]:
+    """Build the coordinator data from a full REST refresh.
+
+    ``previous`` holds the position and derived values the coordinator knows
+    for each device, so a refresh continues the kinematics instead of
+    starting them over.
+    """
+    devices_by_id = {device["id"]: device for device in devices}
+    data: dict[int, dict[str, Any]] = {}
+    for position in positions:
+        if (device := devices_by_id.get(position["deviceId"])) is None:
+            continue
+
+        if (attr := extract_custom_attributes(device, position, **options)) is None:
+            continue
+
+        known = previous.get(device["id"]) if previous else None
+        if known is not None and known[0]["id"] == position["id"]:
+            # 位置未变化，沿用已计算的值
+            derived = known[1]
+        else:
+            derived = derive_kinematics(position, known[0] if known else None)
+
+        datum = resolve_datum(device, datums)
+        data[device["id"]] = {
+            "device": device,
+            "geofence": get_first_geofence(
+                geofences,
+                position["geofenceIds"] or [],
+            ),
+            "position": position,
+            "attributes": attr,
+            "datum": datum,
+            "wgs84": position_to_wgs84(position, datum),
+            "derived": derived,
+        }
+    return data
+
+
+def compute_subscription_updates(
+    frame: SubscriptionData,
+    current: dict[int, tuple[DeviceModel, PositionModel]],
+    geofences: list[GeofenceModel],
+    options: dict[str, Any],
+    datums: dict[str, Any],
+) -> dict[int, dict[str, Any]]:
+    """Return the changes a subscription frame makes, keyed by device ID.
+
+    ``current`` holds the device and position the coordinator knows for every
+    device in the frame. Devices missing from it are ignored. The returned
+    changes only contain the keys that have to be replaced in the
+    coordinator data: a device update that keeps the attributes and group
+    only replaces the device.
+    """
+    state = {device_id: list(pair) for device_id, pair in current.items()}
+    updates: dict[int, dict[str, Any]] = {}
+
+    for device in frame.get("devices") or []:
+        device_id = device["id"]
+        if (known := state.get(device_id)) is None:
+            continue
+
+        if (
+            device["attributes"] == known[0]["attributes"]
+            and device["groupId"] == known[0]["groupId"]
+        ):
+            # 自定义属性和坐标系都不变，无需重新计算
+            known[0] = device
+            updates.setdefault(device_id, {})["device"] = device
+            continue
+
+        if (attr := extract_custom_attributes(device, known[1], **options)) is None:
+            continue
+
+        known[0] = device
+        datum = resolve_datum(device, datums)
+        updates.setdefault(device_id, {}).update(
+            device=device,
+            attributes=attr,
+            datum=datum,
+            wgs84=position_to_wgs84(known[1], datum),
+        )
+
+    for position in frame.get("positions") or []:
+        device_id = position["deviceId"]
+        if (known := state.get(device_id)) is None:
+            continue
+
+        if (attr := extract_custom_attributes(known[0], position, **options)) is None:
+            continue
+
+        previous, known[1] = known[1], position
+        datum = resolve_datum(known[0], datums)
+        updates.setdefault(device_id, {}).update(
+            position=position,
+            attributes=attr,
+            geofence=get_first_geofence(geofences, position["geofenceIds"] or []),
+            datum=datum,
+            wgs84=position_to_wgs84(position, datum),
+            derived=derive_kinematics(position, previous),
+        )
+
+    return updates
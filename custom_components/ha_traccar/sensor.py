@@ -17,11 +17,29 @@ from homeassistant.const import (
     UnitOfTemperature,
 )
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN
-from .coordinator import TraccarServerCoordinator
-from .entity import TraccarServerEntity, generate_entity_id
+from .const import (
+    DOMAIN,
+    FIELD_ADDRESS,
+    FIELD_ALTITUDE,
+    FIELD_BATTERY,
+    FIELD_COURSE,
+    FIELD_DISTANCE,
+    FIELD_GEOFENCE,
+    FIELD_SPEED,
+    FIELD_TEMPERATURE,
+)
+from .coordinator import (
+    TraccarServerCoordinator,
+    TraccarServerCoordinatorDataDevice,
+)
+from .entity import (
+    TraccarServerEntity,
+    async_setup_device_entities,
+    generate_entity_id,
+)
 
 
 async def async_setup_entry(
@@ -31,62 +49,69 @@ async def async_setup_entry(
 ) -> None:
     """Set up sensor entities."""
     coordinator: TraccarServerCoordinator = hass.data[DOMAIN][entry.entry_id]
+    async_setup_device_entities(entry, coordinator, _create_entities)
+
+
+def _create_entities(
+    coordinator: TraccarServerCoordinator,
+    device_entry: TraccarServerCoordinatorDataDevice,
+) -> list[Entity]:
+    """Create the sensor entities of a device."""
+    entities: list[Entity] = []
+    device = device_entry["device"]
+    device_name = device["name"]
+    # 处理设备名称，转换为有效的实体ID格式
+    device_id = re.sub(r'[^\w\s]', '', device_name.lower()).replace(" ", "_")
     
-    entities = []
-    for device_entry in coordinator.data.values():
-        device = device_entry["device"]
-        device_name = device["name"]
-        # 处理设备名称，转换为有效的实体ID格式
-        device_id = re.sub(r'[^\w\s]', '', device_name.lower()).replace(" ", "_")
-        
-        # 创建电池传感器
-        battery_sensor = TraccarServerBatterySensor(coordinator, device)
-        battery_sensor.entity_id = f"sensor.{device_id}_battery"
-        entities.append(battery_sensor)
-        
-        # 创建海拔传感器
-        altitude_sensor = TraccarServerAltitudeSensor(coordinator, device)
-        altitude_sensor.entity_id = f"sensor.{device_id}_altitude"
-        entities.append(altitude_sensor)
-        
-        # 创建速度传感器
-        speed_sensor = TraccarServerSpeedSensor(coordinator, device)
-        speed_sensor.entity_id = f"sensor.{device_id}_speed"
-        entities.append(speed_sensor)
-        
-        # 创建方向传感器
-        course_sensor = TraccarServerCourseSensor(coordinator, device)
-        course_sensor.entity_id = f"sensor.{device_id}_course"
-        entities.append(course_sensor)
-        
-        # 创建地址传感器
-        address_sensor = TraccarServerAddressSensor(coordinator, device)
-        address_sensor.entity_id = f"sensor.{device_id}_address"
-        entities.append(address_sensor)
-        
-        # 创建地理围栏传感器
-        geofence_sensor = TraccarServerGeofenceSensor(coordinator, device)
-        geofence_sensor.entity_id = f"sensor.{device_id}_geofence"
-        entities.append(geofence_sensor)
-        
-        # 创建温度传感器（如果有）
-        if "deviceTemp" in device_entry["position"]["attributes"]:
-            temp_sensor = TraccarServerTemperatureSensor(coordinator, device)
-            temp_sensor.entity_id = f"sensor.{device_id}_temperature"
-            entities.append(temp_sensor)
-        
-        # 创建距离传感器（如果有）
-        if "totalDistance" in device_entry["position"]["attributes"]:
-            distance_sensor = TraccarServerDistanceSensor(coordinator, device)
-            distance_sensor.entity_id = f"sensor.{device_id}_distance"
-            entities.append(distance_sensor)
+    # 创建电池传感器
+    battery_sensor = TraccarServerBatterySensor(coordinator, device)
+    battery_sensor.entity_id = f"sensor.{device_id}_battery"
+    entities.append(battery_sensor)
     
-    async_add_entities(entities)
+    # 创建海拔传感器
+    altitude_sensor = TraccarServerAltitudeSensor(coordinator, device)
+    altitude_sensor.entity_id = f"sensor.{device_id}_altitude"
+    entities.append(altitude_sensor)
+    
+    # 创建速度传感器
+    speed_sensor = TraccarServerSpeedSensor(coordinator, device)
+    speed_sensor.entity_id = f"sensor.{device_id}_speed"
+    entities.append(speed_sensor)
+    
+    # 创建方向传感器
+    course_sensor = TraccarServerCourseSensor(coordinator, device)
+    course_sensor.entity_id = f"sensor.{device_id}_course"
+    entities.append(course_sensor)
+    
+    # 创建地址传感器
+    address_sensor = TraccarServerAddressSensor(coordinator, device)
+    address_sensor.entity_id = f"sensor.{device_id}_address"
+    entities.append(address_sensor)
+    
+    # 创建地理围栏传感器
+    geofence_sensor = TraccarServerGeofenceSensor(coordinator, device)
+    geofence_sensor.entity_id = f"sensor.{device_id}_geofence"
+    entities.append(geofence_sensor)
+    
+    # 创建温度传感器（如果有）
+    if "deviceTemp" in device_entry["position"]["attributes"]:
+        temp_sensor = TraccarServerTemperatureSensor(coordinator, device)
+        temp_sensor.entity_id = f"sensor.{device_id}_temperature"
+        entities.append(temp_sensor)
+    
+    # 创建距离传感器（如果有）
+    if "totalDistance" in device_entry["position"]["attributes"]:
+        distance_sensor = TraccarServerDistanceSensor(coordinator, device)
+        distance_sensor.entity_id = f"sensor.{device_id}_distance"
+        entities.append(distance_sensor)
+
+    return entities
 
 
 class TraccarServerBatterySensor(TraccarServerEntity, SensorEntity):
     """Represent a battery sensor."""
 
+    _traccar_fields = frozenset({FIELD_BATTERY})
     _attr_device_class = SensorDeviceClass.BATTERY
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = PERCENTAGE
@@ -112,17 +137,13 @@ class TraccarServerBatterySensor(TraccarServerEntity, SensorEntity):
     @property
     def native_value(self) -> int:
         """Return the value of the sensor."""
-        battery_level = self.traccar_position["attributes"].get("batteryLevel", 0)
-        # 如果已经是百分比值（0-100），直接返回
-        if battery_level > 1:
-            return round(battery_level)
-        # 如果是小数（0-1），转换为百分比
-        return round(battery_level * 100)
+        return self.traccar_derived["battery"]
 
 
 class TraccarServerAltitudeSensor(TraccarServerEntity, SensorEntity):
     """Represent an altitude sensor."""
 
+    _traccar_fields = frozenset({FIELD_ALTITUDE})
     _attr_device_class = SensorDeviceClass.DISTANCE
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = UnitOfLength.METERS
@@ -154,6 +175,7 @@ class TraccarServerAltitudeSensor(TraccarServerEntity, SensorEntity):
 class TraccarServerSpeedSensor(TraccarServerEntity, SensorEntity):
     """Represent a speed sensor."""
 
+    _traccar_fields = frozenset({FIELD_SPEED})
     _attr_device_class = SensorDeviceClass.SPEED
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = UnitOfSpeed.KILOMETERS_PER_HOUR
@@ -177,17 +199,20 @@ class TraccarServerSpeedSensor(TraccarServerEntity, SensorEntity):
         self._entity_id = entity_id
 
     @property
-    def native_value(self) -> float:
+    def native_value(self) -> float | None:
         """Return the value of the sensor."""
-        return self.traccar_position["speed"] * 3.6
+        return self.traccar_derived["speed"]
 
 
 class TraccarServerCourseSensor(TraccarServerEntity, SensorEntity):
     """Represent a course sensor."""
 
+    _traccar_fields = frozenset({FIELD_COURSE})
     _attr_icon = "mdi:compass"
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = "°"
+    # 转向速率可从方向的历史记录计算，不必写入
+    _unrecorded_attributes = frozenset({"heading_rate"})
 
     def __init__(self, coordinator: TraccarServerCoordinator, device: dict) -> None:
         """Initialize the sensor."""
@@ -211,10 +236,16 @@ class TraccarServerCourseSensor(TraccarServerEntity, SensorEntity):
         """Return the value of the sensor."""
         return self.traccar_position["course"]
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the rate of change of the course in degrees per second."""
+        return {"heading_rate": self.traccar_derived["heading_rate"]}
+
 
 class TraccarServerTemperatureSensor(TraccarServerEntity, SensorEntity):
     """Represent a temperature sensor."""
 
+    _traccar_fields = frozenset({FIELD_TEMPERATURE})
     _attr_device_class = SensorDeviceClass.TEMPERATURE
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
@@ -245,6 +276,7 @@ class TraccarServerTemperatureSensor(TraccarServerEntity, SensorEntity):
 class TraccarServerDistanceSensor(TraccarServerEntity, SensorEntity):
     """Represent a distance sensor."""
 
+    _traccar_fields = frozenset({FIELD_DISTANCE})
     _attr_device_class = SensorDeviceClass.DISTANCE
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
     _attr_native_unit_of_measurement = UnitOfLength.KILOMETERS
@@ -278,6 +310,7 @@ class TraccarServerDistanceSensor(TraccarServerEntity, SensorEntity):
 class TraccarServerAddressSensor(TraccarServerEntity, SensorEntity):
     """Represent an address sensor."""
 
+    _traccar_fields = frozenset({FIELD_ADDRESS})
     _attr_icon = "mdi:map-marker-outline"
 
     def __init__(self, coordinator: TraccarServerCoordinator, device: dict) -> None:
@@ -298,14 +331,15 @@ class TraccarServerAddressSensor(TraccarServerEntity, SensorEntity):
         self._entity_id = entity_id
 
     @property
-    def native_value(self) -> str:
+    def native_value(self) -> str | None:
         """Return the value of the sensor."""
-        return self.traccar_position["address"]
+        return self.traccar_address
 
 
 class TraccarServerGeofenceSensor(TraccarServerEntity, SensorEntity):
     """Represent a geofence sensor."""
 
+    _traccar_fields = frozenset({FIELD_GEOFENCE})
     _attr_icon = "mdi:map-marker-radius"
 
     def __init__(self, coordinator: TraccarServerCoordinator, device: dict) -> None:
@@ -0,0 +1,108 @@
+"""Services for the ha_traccar integration."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_DEVICE_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+
+from .commands import COMMAND_RESULT_TIMEOUT
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .coordinator import TraccarServerCoordinator
+
+SERVICE_SEND_COMMAND = "send_command"
+
+ATTR_ATTRIBUTES = "attributes"
+ATTR_COMMAND = "command"
+ATTR_TIMEOUT = "timeout"
+
+SEND_COMMAND_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required(ATTR_COMMAND): cv.string,
+        vol.Optional(ATTR_ATTRIBUTES, default={}): dict,
+        vol.Optional(ATTR_TIMEOUT, default=COMMAND_RESULT_TIMEOUT): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=600)
+        ),
+    }
+)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the ha_traccar services."""
+
+    async def _async_send_command(call: ServiceCall) -> ServiceResponse:
+        """Send a command to Traccar devices."""
+        targets: dict[TraccarServerCoordinator, dict[int, str]] = {}
+        device_registry = dr.async_get(hass)
+        for device_id in call.data[ATTR_DEVICE_ID]:
+            coordinator, traccar_id = _resolve_device(hass, device_registry, device_id)
+            targets.setdefault(coordinator, {})[traccar_id] = device_id
+
+        results = []
+        for coordinator, devices in targets.items():
+            outcomes = await coordinator.commands.async_send(
+                coordinator.client,
+                list(devices),
+                call.data[ATTR_COMMAND],
+                call.data[ATTR_ATTRIBUTES],
+                call.data[ATTR_TIMEOUT],
+            )
+            results.extend(
+                {
+                    ATTR_DEVICE_ID: devices[traccar_id],
+                    "traccar_id": traccar_id,
+                    "name": coordinator.data[traccar_id]["device"]["name"]
+                    if traccar_id in coordinator.data
+                    else None,
+                    **outcome,
+                }
+                for traccar_id, outcome in outcomes.items()
+            )
+        if call.return_response:
+            return {"results": results}
+        return None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEND_COMMAND,
+        _async_send_command,
+        schema=SEND_COMMAND_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _resolve_device(
+    hass: HomeAssistant,
+    device_registry: dr.DeviceRegistry,
+    device_id: str,
+) -> tuple[TraccarServerCoordinator, int]:
+    """Return the coordinator and Traccar ID of a Home Assistant device."""
+    if (device := device_registry.async_get(device_id)) is not None:
+        unique_ids = {
+            identifier for domain, identifier in device.identifiers if domain == DOMAIN
+        }
+        for entry_id in device.config_entries:
+            coordinator = hass.data.get(DOMAIN, {}).get(entry_id)
+            if coordinator is None:
+                continue
+            for traccar_id, entry in coordinator.data.items():
+                if entry["device"]["uniqueId"] in unique_ids:
+                    return coordinator, traccar_id
+    raise ServiceValidationError(
+        f"Device {device_id} is not a loaded Traccar device",
+        translation_domain=DOMAIN,
+        translation_key="unknown_device",
+        translation_placeholders={"device_id": device_id},
+    )
@@ -0,0 +1,152 @@
+"""HTTP sessions to Traccar kept across config entry reloads."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import ClientSession, CookieJar
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    CONF_ACCESS_TOKEN,
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_SSL,
+    CONF_USERNAME,
+    CONF_VERIFY_SSL,
+)
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .api import TraccarServerApiClient
+
+DATA_SESSIONS = f"{DOMAIN}_sessions"
+# 释放后保留会话的时间，在此期间重新加载的条目无需重新登录
+SESSION_LINGER = timedelta(minutes=5)
+
+
+@dataclass(slots=True, eq=False)
+class _PooledSession:
+    """A session and the client that used it last."""
+
+    fingerprint: tuple[Any, ...]
+    session: ClientSession
+    client: TraccarServerApiClient | None = None
+    cancel_close: CALLBACK_TYPE | None = None
+
+
+class SessionPool:
+    """One aiohttp session with its Traccar cookie per config entry.
+
+    A reloaded entry gets the session of its previous setup back, still
+    logged in. A released session is logged out and closed after
+    ``SESSION_LINGER`` unless the entry acquires it again, and at once when
+    the entry is removed or its connection settings change.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the pool."""
+        self.hass = hass
+        self.created = 0
+        self.reused = 0
+        self.closed = 0
+        self._sessions: dict[str, _PooledSession] = {}
+
+    @property
+    def statistics(self) -> dict[str, int]:
+        """Return the session counters."""
+        return {
+            "open": len(self._sessions),
+            "created": self.created,
+            "reused": self.reused,
+            "closed": self.closed,
+        }
+
+    @callback
+    def async_acquire(self, entry: ConfigEntry) -> ClientSession:
+        """Return the session of an entry, creating it if needed."""
+        fingerprint = _fingerprint(entry.data)
+        if (pooled := self._sessions.pop(entry.entry_id, None)) is not None:
+            if pooled.cancel_close is not None:
+                pooled.cancel_close()
+                pooled.cancel_close = None
+            if pooled.fingerprint == fingerprint:
+                self.reused += 1
+                self._sessions[entry.entry_id] = pooled
+                return pooled.session
+            # 连接设置已更改，旧会话的 Cookie 不再适用
+            entry.async_create_background_task(
+                self.hass, self._async_close(pooled), f"{DOMAIN} close session"
+            )
+
+        # 会话只连接该 Traccar 服务器，接受 IP 地址主机的 Cookie
+        session = async_create_clientsession(
+            self.hass, cookie_jar=CookieJar(unsafe=True)
+        )
+        self.created += 1
+        self._sessions[entry.entry_id] = _PooledSession(fingerprint, session)
+        return session
+
+    @callback
+    def async_release(self, entry_id: str, client: TraccarServerApiClient) -> None:
+        """Keep the session of an unloaded entry for a while, then close it."""
+        if (pooled := self._sessions.get(entry_id)) is None:
+            return
+        pooled.client = client
+        if pooled.cancel_close is not None:
+            pooled.cancel_close()
+        pooled.cancel_close = async_call_later(
+            self.hass,
+            SESSION_LINGER,
+            HassJob(
+                partial(self._async_expire, entry_id),
+                f"{DOMAIN} close idle session",
+                cancel_on_shutdown=True,
+            ),
+        )
+
+    async def async_close(self, entry_id: str) -> None:
+        """Log out and close the session of an entry now."""
+        if (pooled := self._sessions.pop(entry_id, None)) is None:
+            return
+        if pooled.cancel_close is not None:
+            pooled.cancel_close()
+        await self._async_close(pooled)
+
+    async def _async_expire(self, entry_id: str, _: datetime) -> None:
+        """Close a session nobody acquired again."""
+        if (pooled := self._sessions.get(entry_id)) is None:
+            return
+        pooled.cancel_close = None
+        await self.async_close(entry_id)
+
+    async def _async_close(self, pooled: _PooledSession) -> None:
+        """Log out and close a session."""
+        if pooled.client is not None:
+            await pooled.client.async_logout()
+        await pooled.session.close()
+        self.closed += 1
+
+
+def _fingerprint(data: Mapping[str, Any]) -> tuple[Any, ...]:
+    """Return the connection settings a session is only valid for."""
+    return tuple(
+        data.get(key)
+        for key in (
+            CONF_HOST,
+            CONF_PORT,
+            CONF_SSL,
+            CONF_VERIFY_SSL,
+            CONF_USERNAME,
+            CONF_PASSWORD,
+            CONF_ACCESS_TOKEN,
+        )
+    )
@@ -0,0 +1,180 @@
+"""Position smoothing for noisy trackers."""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import math
+
+SMOOTHING_NONE = "none"
+SMOOTHING_KALMAN = "kalman"
+SMOOTHING_EMA = "ema"
+SMOOTHING_MODES = [SMOOTHING_NONE, SMOOTHING_KALMAN, SMOOTHING_EMA]
+
+METERS_PER_DEGREE = 111_320.0
+# 没有精度信息时假定的定位精度（米）
+DEFAULT_ACCURACY = 20.0
+MIN_ACCURACY = 1.0
+# 两次定位间隔超过该值（秒）时重新开始滤波
+MAX_GAP = 600.0
+# 卡尔曼滤波的加速度噪声（m/s²）
+ACCELERATION_NOISE = 0.5
+# 指数平均的时间常数（秒）
+EMA_TIME_CONSTANT = 30.0
+
+
+class PositionSmoother(ABC):
+    """Base class of the per-device smoothing filters.
+
+    ``update`` takes one fix and returns the filtered (latitude, longitude)
+    in constant time. The filter starts over after a gap of ``MAX_GAP``
+    seconds or when fixes arrive out of order.
+    """
+
+    __slots__ = ("position", "_time")
+
+    def __init__(self) -> None:
+        """Initialize the filter."""
+        self.position: tuple[float, float] | None = None
+        self._time: float | None = None
+
+    def update(
+        self,
+        timestamp: float,
+        latitude: float,
+        longitude: float,
+        accuracy: float | None,
+    ) -> tuple[float, float]:
+        """Add a fix and return the filtered position."""
+        variance = max(accuracy or DEFAULT_ACCURACY, MIN_ACCURACY) ** 2
+        if (
+            self._time is None
+            or not 0 <= (interval := timestamp - self._time) <= MAX_GAP
+        ):
+            self._reset(latitude, longitude, variance)
+            self.position = (latitude, longitude)
+        else:
+            self.position = self._update(interval, latitude, longitude, variance)
+        self._time = timestamp
+        return self.position
+
+    @abstractmethod
+    def _reset(self, latitude: float, longitude: float, variance: float) -> None:
+        """Start over from a fix."""
+
+    @abstractmethod
+    def _update(
+        self,
+        interval: float,
+        latitude: float,
+        longitude: float,
+        variance: float,
+    ) -> tuple[float, float]:
+        """Filter a fix that arrived ``interval`` seconds after the last one."""
+
+
+class KalmanSmoother(PositionSmoother):
+    """Constant-velocity Kalman filter in a local metric frame.
+
+    Both axes have the same measurement and process noise, so they share a
+    single 2x2 covariance matrix.
+    """
+
+    __slots__ = (
+        "_origin",
+        "_scale",
+        "_x",
+        "_y",
+        "_vx",
+        "_vy",
+        "_p00",
+        "_p01",
+        "_p11",
+    )
+
+    def _reset(self, latitude: float, longitude: float, variance: float) -> None:
+        """Start over from a fix."""
+        self._origin = (latitude, longitude)
+        self._scale = METERS_PER_DEGREE * math.cos(math.radians(latitude))
+        self._x = self._y = self._vx = self._vy = 0.0
+        self._p00 = variance
+        self._p01 = 0.0
+        self._p11 = variance
+
+    def _update(
+        self,
+        interval: float,
+        latitude: float,
+        longitude: float,
+        variance: float,
+    ) -> tuple[float, float]:
+        """Filter a fix that arrived ``interval`` seconds after the last one."""
+        dt = interval
+        # 预测
+        self._x += self._vx * dt
+        self._y += self._vy * dt
+        noise = ACCELERATION_NOISE**2
+        p00 = (
+            self._p00
+            + 2 * dt * self._p01
+            + dt * dt * self._p11
+            + noise * dt**3 / 3
+        )
+        p01 = self._p01 + dt * self._p11 + noise * dt * dt / 2
+        p11 = self._p11 + noise * dt
+
+        # 更新
+        gain_position = p00 / (p00 + variance)
+        gain_velocity = p01 / (p00 + variance)
+        residual_x = (longitude - self._origin[1]) * self._scale - self._x
+        residual_y = (latitude - self._origin[0]) * METERS_PER_DEGREE - self._y
+        self._x += gain_position * residual_x
+        self._y += gain_position * residual_y
+        self._vx += gain_velocity * residual_x
+        self._vy += gain_velocity * residual_y
+        self._p00 = (1 - gain_position) * p00
+        self._p01 = (1 - gain_position) * p01
+        self._p11 = p11 - gain_velocity * p01
+
+        return (
+            self._origin[0] + self._y / METERS_PER_DEGREE,
+            self._origin[1] + self._x / self._scale,
+        )
+
+
+class EmaSmoother(PositionSmoother):
+    """Accuracy-weighted exponential moving average.
+
+    Each fix is weighted by the inverse of its variance, and the weight of
+    the past decays with a time constant of ``EMA_TIME_CONSTANT`` seconds.
+    """
+
+    __slots__ = ("_latitude", "_longitude", "_weight")
+
+    def _reset(self, latitude: float, longitude: float, variance: float) -> None:
+        """Start over from a fix."""
+        self._latitude = latitude
+        self._longitude = longitude
+        self._weight = 1 / variance
+
+    def _update(
+        self,
+        interval: float,
+        latitude: float,
+        longitude: float,
+        variance: float,
+    ) -> tuple[float, float]:
+        """Filter a fix that arrived ``interval`` seconds after the last one."""
+        past = self._weight * math.exp(-interval / EMA_TIME_CONSTANT)
+        weight = 1 / variance
+        self._weight = past + weight
+        self._latitude = (self._latitude * past + latitude * weight) / self._weight
+        self._longitude = (self._longitude * past + longitude * weight) / self._weight
+        return self._latitude, self._longitude
+
+
+def create_smoother(mode: str) -> PositionSmoother | None:
+    """Return a new filter for a smoothing mode, or None if it is disabled."""
+    if mode == SMOOTHING_KALMAN:
+        return KalmanSmoother()
+    if mode == SMOOTHING_EMA:
+        return EmaSmoother()
+    return None
@@ -0,0 +1,129 @@
+"""Versioned columnar snapshot of a Traccar fleet."""
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from .const import FIELD_GEOFENCE, FIELD_POSITION, FIELD_SPEED, FIELD_STATUS
+
+# 快照包含的字段变化时才更新快照
+SNAPSHOT_FIELDS = frozenset({FIELD_GEOFENCE, FIELD_POSITION, FIELD_SPEED, FIELD_STATUS})
+SNAPSHOT_COLUMNS = ("id", "latitude", "longitude", "speed", "status", "geofence")
+# 保留的已移除设备数量，更早的版本只能获取完整快照
+MAX_REMOVED = 1_000
+
+Row = tuple[float, float, float | None, str | None, str | None]
+
+
+class FleetSnapshot:
+    """The position, speed, status and geofence of every device.
+
+    Every change increases ``version`` and records the version on the
+    device, so ``as_dict`` can return only the devices that changed since a
+    version a client already has, together with the devices removed since.
+    Coordinates are WGS84 and speeds km/h. Versions start at the current
+    time in microseconds, so a version from before a reload is older than
+    every version after it.
+
+    The full snapshot is built once per version and shared by every reader,
+    so it must not be modified.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty snapshot."""
+        self.version = time.time_ns() // 1000
+        self._rows: dict[int, Row] = {}
+        self._versions: dict[int, int] = {}
+        self._removed: dict[int, int] = {}
+        # 早于该版本的增量请求返回完整快照
+        self._floor = self.version
+        self._full: dict[str, Any] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of devices."""
+        return len(self._rows)
+
+    def update(self, device_id: int, entry: dict[str, Any]) -> None:
+        """Store the current values of a device if they changed."""
+        longitude, latitude = entry["wgs84"]
+        row = (
+            latitude,
+            longitude,
+            entry["derived"]["speed"],
+            entry["device"]["status"],
+            entry["geofence"]["name"] if entry["geofence"] else None,
+        )
+        if self._rows.get(device_id) == row:
+            return
+        self.version += 1
+        self._rows[device_id] = row
+        # 重新插入，使字典按版本排序
+        self._versions.pop(device_id, None)
+        self._versions[device_id] = self.version
+        self._removed.pop(device_id, None)
+        self._full = None
+
+    def remove(self, device_id: int) -> None:
+        """Remove a device."""
+        if self._rows.pop(device_id, None) is None:
+            return
+        del self._versions[device_id]
+        self.version += 1
+        self._removed[device_id] = self.version
+        if len(self._removed) > MAX_REMOVED:
+            oldest = next(iter(self._removed))
+            self._floor = self._removed.pop(oldest)
+        self._full = None
+
+    def sync(self, data: dict[int, dict[str, Any]]) -> None:
+        """Make the snapshot match the coordinator data after a refresh."""
+        for device_id in self._rows.keys() - data.keys():
+            self.remove(device_id)
+        for device_id, entry in data.items():
+            self.update(device_id, entry)
+
+    def as_dict(self, since: int | None = None) -> dict[str, Any]:
+        """Return the snapshot, or the changes since version ``since``.
+
+        ``full`` tells whether the result replaces what the client has. A
+        version that is too old or unknown also returns the full snapshot.
+        """
+        if since is None or not self._floor <= since <= self.version:
+            if self._full is None:
+                self._full = self._columns(list(self._rows), full=True)
+            return self._full
+        return self._columns(
+            _changed_since(self._versions, since),
+            full=False,
+            removed=_changed_since(self._removed, since),
+        )
+
+    def _columns(
+        self,
+        device_ids: list[int],
+        *,
+        full: bool,
+        removed: list[int] | None = None,
+    ) -> dict[str, Any]:
+        """Return the rows of ``device_ids`` as one list per column."""
+        rows = [self._rows[device_id] for device_id in device_ids]
+        columns: dict[str, list[Any]] = {"id": device_ids}
+        for index, name in enumerate(SNAPSHOT_COLUMNS[1:]):
+            columns[name] = [row[index] for row in rows]
+        return {
+            "version": self.version,
+            "full": full,
+            "columns": columns,
+            "removed": removed or [],
+        }
+
+
+def _changed_since(versions: dict[int, int], since: int) -> list[int]:
+    """Return the devices of a version-ordered dict changed after ``since``."""
+    changed = []
+    for device_id in reversed(versions):
+        if versions[device_id] <= since:
+            break
+        changed.append(device_id)
+    changed.reverse()
+    return changed